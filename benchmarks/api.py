@@ -0,0 +1,228 @@
+"""
+Нагрузочный бенчмарк API через in-process ASGI клиент (без сети и внешнего сервера).
+
+База создаётся во временном каталоге миграциями и заполняется генератором benchmarks.datagen.
+Для каждого сценария выводятся пропускная способность и p50/p95/p99; результаты можно сохранить как baseline
+и сравнивать с ним последующие прогоны (код возврата 1 при регрессии).
+
+Запуск из корня репозитория:
+    python -m benchmarks.api --products 5000 --requests 500 --concurrency 16 --save-baseline
+    python -m benchmarks.api --products 5000 --requests 500 --concurrency 16 --compare
+    python -m benchmarks.api --database-url postgresql+asyncpg://postgres@localhost/catalog_bench
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.datagen import Dataset, DatasetSpec
+from benchmarks.utils import percentile
+
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+def filter_params(filters: dict[str, list[str] | dict[str, int]]) -> list[tuple[str, str | int]]:
+    params = []
+    for prop_uid, values in filters.items():
+        if isinstance(values, list):
+            params.extend((f"property_{prop_uid}", value) for value in values)
+        else:
+            params.extend((f"property_{prop_uid}_{bound}", value) for bound, value in values.items())
+    return params
+
+
+class Scenarios:
+    def __init__(self, dataset: Dataset, rng: random.Random):
+        self.dataset = dataset
+        self.rng = rng
+        self.counter = itertools.count()
+        self.created: list[str] = []
+
+    def catalog(self):
+        return "GET", "/catalog/", {"params": {"page": self.rng.randint(1, 10), "page_size": 20}}
+
+    def catalog_filtered(self):
+        params = [("page_size", 20), ("sort", "name")] + filter_params(self.dataset.random_filters(self.rng))
+        return "GET", "/catalog/", {"params": params}
+
+    def catalog_sorted(self):
+        params = {"page": self.rng.randint(1, 10), "page_size": 20}
+        if self.dataset.int_properties:
+            params["sort"] = f"property_{self.rng.choice(self.dataset.int_properties)}:desc,name"
+        return "GET", "/catalog/", {"params": params}
+
+    def filter_stats(self):
+        return "GET", "/catalog/filter/", {"params": filter_params(self.dataset.random_filters(self.rng, count=1))}
+
+    def product(self):
+        return "GET", f"/product/{self.rng.choice(self.dataset.product_uids)}", {}
+
+    def product_create(self):
+        uid = f"bench{next(self.counter):08d}"
+        self.created.append(uid)
+        properties = []
+        for prop_uid in self.rng.sample(list(self.dataset.list_values), min(2, len(self.dataset.list_values))):
+            properties.append({"uid": prop_uid, "value_uid": self.rng.choice(self.dataset.list_values[prop_uid])})
+        for prop_uid in self.dataset.int_properties[:1]:
+            properties.append({"uid": prop_uid, "value": self.rng.randint(0, 10000)})
+        return "POST", "/product/", {"json": {"uid": uid, "name": f"Бенчмарк {uid}", "properties": properties}}
+
+    def product_delete(self):
+        return "DELETE", f"/product/{self.created.pop()}", {}
+
+
+SCENARIO_NAMES = ["catalog", "catalog_filtered", "catalog_sorted", "filter_stats", "product", "product_create", "product_delete"]
+
+
+async def run_scenario(client, make_request, requests: int, concurrency: int) -> dict[str, float]:
+    latencies: list[float] = []
+    errors = 0
+    remaining = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while next(remaining) < requests:
+            method, url, kwargs = make_request()
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ms = [value * 1000 for value in latencies]
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "throughput": round(len(ms) / elapsed, 2),
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput']} -> {current['throughput']} req/s")
+    return regressions
+
+
+async def run(args: argparse.Namespace, tmp_dir: str) -> dict:
+    # настройки читаются при первом обращении к get_settings(), поэтому URL задаётся до создания приложения
+    os.environ["DATABASE__URL"] = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    # без --redis кеш отключается в самой фабрике get_redis_cache: её вызывают и фоновые компоненты
+    # (диспетчер outbox, кеш метаданных), а не только обработчики запросов
+    if not args.redis:
+        os.environ["REDIS__ENABLED"] = "false"
+
+    import httpx
+    from product_catalog.di.database import get_engine
+    from product_catalog.entrypoints.fastapi_app import get_app
+    from benchmarks.datagen import seed
+
+    spec = DatasetSpec(
+        products=args.products,
+        list_properties=args.list_properties,
+        int_properties=args.int_properties,
+        values_per_property=args.values_per_property,
+        properties_per_product=args.properties_per_product,
+        seed=args.seed,
+    )
+    dataset = await seed(await get_engine(), spec)
+
+    app = get_app()
+
+    rng = random.Random(args.seed)
+    scenarios = Scenarios(dataset, rng)
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for name in args.scenarios:
+                make_request = getattr(scenarios, name)
+                if name != "product_delete":
+                    await run_scenario(client, make_request, args.warmup, args.concurrency)
+                requests = min(args.requests, len(scenarios.created)) if name == "product_delete" else args.requests
+                results[name] = await run_scenario(client, make_request, requests, args.concurrency)
+                row = results[name]
+                print(
+                    f"{name:<17} req/s={row['throughput']:9.1f}  p50={row['p50_ms']:8.2f}ms  "
+                    f"p95={row['p95_ms']:8.2f}ms  p99={row['p99_ms']:8.2f}ms  errors={row['errors']}"
+                )
+
+    return {
+        "spec": vars(spec),
+        "database": os.environ["DATABASE__URL"].split(":", 1)[0],
+        "concurrency": args.concurrency,
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--list-properties", type=int, default=5)
+    parser.add_argument("--int-properties", type=int, default=3)
+    parser.add_argument("--values-per-property", type=int, default=10)
+    parser.add_argument("--properties-per-product", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIO_NAMES, default=SCENARIO_NAMES)
+    parser.add_argument(
+        "--database-url",
+        help="пустая одноразовая БД, например postgresql+asyncpg://postgres@localhost/bench (по умолчанию временный SQLite)"
+    )
+    parser.add_argument("--redis", action="store_true", help="использовать Redis из настроек вместо отключённого кеша")
+    parser.add_argument("--baseline", default="default", help="имя файла baseline в benchmarks/baselines")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое ухудшение p95/throughput")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report = asyncio.run(run(args, tmp_dir))
+
+    baseline_path = os.path.join(BASELINES_DIR, f"{args.baseline}.json")
+    if args.compare:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["spec"] != report["spec"] or baseline["concurrency"] != report["concurrency"]:
+            print("Warning: baseline was recorded with different dataset or concurrency")
+        if baseline.get("database", report["database"]) != report["database"]:
+            print(f"Warning: baseline was recorded on {baseline['database']}, current run uses {report['database']}")
+        regressions = compare(report["results"], baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+    if args.save_baseline:
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Baseline saved to {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Генератор синтетического каталога для бенчмарков. Схема создаётся миграциями alembic (а не metadata.create_all),
+чтобы бенчмарки работали с теми же таблицами и индексами, что и production-база. В PostgreSQL данные
+загружаются через COPY.
+"""
+import os
+import random
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from alembic.script import ScriptDirectory
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from product_catalog.domain.models import Product, ProductProperty, Property, PropertyType, PropertyValue
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BATCH_SIZE = 10000
+
+
+@dataclass
+class DatasetSpec:
+    products: int = 1000
+    list_properties: int = 5
+    int_properties: int = 3
+    values_per_property: int = 10
+    properties_per_product: int = 4
+    seed: int = 0
+
+
+@dataclass
+class Dataset:
+    spec: DatasetSpec
+    list_values: dict[str, list[str]] = field(default_factory=dict)
+    int_properties: list[str] = field(default_factory=list)
+    product_uids: list[str] = field(default_factory=list)
+
+    def random_filters(self, rng: random.Random, count: int = 2) -> dict[str, list[str] | dict[str, int]]:
+        filters = {}
+        list_uids = rng.sample(list(self.list_values), min(count, len(self.list_values)))
+        for prop_uid in list_uids:
+            values = self.list_values[prop_uid]
+            filters[prop_uid] = rng.sample(values, min(2, len(values)))
+        if self.int_properties:
+            low = rng.randint(0, 5000)
+            filters[rng.choice(self.int_properties)] = {"from": low, "to": low + 5000}
+        return filters
+
+
+def upgrade_schema(sync_connection) -> None:
+    """
+    Применяет все ревизии из product_catalog/migrations к переданному соединению.
+    """
+    config = Config(os.path.join(ROOT_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT_DIR, "product_catalog", "migrations"))
+    script = ScriptDirectory.from_config(config)
+    revisions = list(reversed(list(script.walk_revisions("base", "heads"))))
+    context = MigrationContext.configure(sync_connection)
+    with Operations.context(context):
+        for revision in revisions:
+            revision.module.upgrade()
+
+
+def generate_properties(dataset: Dataset) -> tuple[list[dict], list[dict]]:
+    spec = dataset.spec
+    properties, values = [], []
+    for i in range(spec.list_properties):
+        prop_uid = f"list{i}"
+        properties.append({"uid": prop_uid, "name": f"Свойство list {i}", "type": PropertyType.LIST})
+        dataset.list_values[prop_uid] = []
+        for j in range(spec.values_per_property):
+            value_uid = f"list{i}_v{j}"
+            values.append({"uid": value_uid, "value": f"Значение {i}-{j}", "property_uid": prop_uid})
+            dataset.list_values[prop_uid].append(value_uid)
+
+    for i in range(spec.int_properties):
+        prop_uid = f"int{i}"
+        properties.append({"uid": prop_uid, "name": f"Свойство int {i}", "type": PropertyType.INT})
+        dataset.int_properties.append(prop_uid)
+    return properties, values
+
+
+def generate_products(dataset: Dataset, rng: random.Random) -> Iterator[tuple[list[dict], list[dict]]]:
+    """
+    Товары и их свойства пачками по BATCH_SIZE товаров, чтобы каталог на миллионы строк не держать в памяти.
+    """
+    spec = dataset.spec
+    all_properties = list(dataset.list_values) + dataset.int_properties
+    per_product = min(spec.properties_per_product, len(all_properties))
+    for batch_start in range(0, spec.products, BATCH_SIZE):
+        products, product_properties = [], []
+        for i in range(batch_start, min(batch_start + BATCH_SIZE, spec.products)):
+            product_uid = f"product{i:08d}"
+            dataset.product_uids.append(product_uid)
+            products.append({"uid": product_uid, "name": f"Товар {i}"})
+            for prop_uid in rng.sample(all_properties, per_product):
+                if prop_uid in dataset.list_values:
+                    value_uid, int_value = rng.choice(dataset.list_values[prop_uid]), None
+                else:
+                    value_uid, int_value = None, rng.randint(0, 10000)
+                product_properties.append({
+                    "product_uid": product_uid,
+                    "property_uid": prop_uid,
+                    "value_uid": value_uid,
+                    "int_value": int_value,
+                })
+        yield products, product_properties
+
+
+async def insert_rows(conn: AsyncConnection, model, rows: list[dict]) -> None:
+    if conn.dialect.name == "postgresql":
+        # импорт репозиториев читает настройки, а бенчмарки задают DATABASE__URL уже после импорта datagen
+        from product_catalog.adapters.postgres import copy_rows
+
+        await copy_rows(conn, model.__table__, rows)
+        return
+    for start in range(0, len(rows), BATCH_SIZE):
+        await conn.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+async def seed(engine: AsyncEngine, spec: DatasetSpec) -> Dataset:
+    dataset = Dataset(spec=spec)
+    properties, values = generate_properties(dataset)
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade_schema)
+        await insert_rows(conn, Property, properties)
+        await insert_rows(conn, PropertyValue, values)
+        for products, product_properties in generate_products(dataset, random.Random(spec.seed)):
+            await insert_rows(conn, Product, products)
+            await insert_rows(conn, ProductProperty, product_properties)
+    return dataset
@@ -0,0 +1,114 @@
+"""
+Статистика фильтров (/catalog/filter/): запрос к БД (CatalogRepository.get_filter_stats) против колоночного
+снимка (product_catalog.adapters.facets). По умолчанию 1.25M товаров по 4 свойства - 5M строк product_properties.
+
+Выводятся время сборки снимка, его размер на диске и задержки обоих путей на одинаковых случайных фильтрах;
+ответы сравниваются между собой.
+
+Запуск из корня репозитория (требует numpy):
+    python -m benchmarks.facets --products 1250000 --queries 50
+    python -m benchmarks.facets --database-url postgresql+asyncpg://postgres@localhost/catalog_bench
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from benchmarks.api import filter_params
+from benchmarks.datagen import DatasetSpec, seed
+from benchmarks.utils import percentile
+from product_catalog.adapters.facets import FacetSnapshot
+from product_catalog.adapters.postgres import PostgresCatalogRepository
+from product_catalog.adapters.repository import CatalogRepository
+from product_catalog.config import FacetsConfig
+
+
+def report(name: str, latencies: list[float]) -> None:
+    ms = [value * 1000 for value in latencies]
+    print(
+        f"{name:<9} mean={statistics.fmean(ms):9.2f}ms  p50={percentile(ms, 50):9.2f}ms  "
+        f"p95={percentile(ms, 95):9.2f}ms  p99={percentile(ms, 99):9.2f}ms"
+    )
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+async def run(args: argparse.Namespace, tmp_dir: str) -> int:
+    url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    engine = create_async_engine(url)
+    spec = DatasetSpec(
+        products=args.products,
+        list_properties=args.list_properties,
+        int_properties=args.int_properties,
+        values_per_property=args.values_per_property,
+        properties_per_product=args.properties_per_product,
+        seed=args.seed,
+    )
+    started = time.perf_counter()
+    dataset = await seed(engine, spec)
+    print(f"seed: {spec.products * min(spec.properties_per_product, spec.list_properties + spec.int_properties)} "
+          f"property rows in {time.perf_counter() - started:.1f}s")
+
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    snapshot = FacetSnapshot(session_maker, FacetsConfig(enabled=True, path=os.path.join(tmp_dir, "facets")))
+    started = time.perf_counter()
+    await snapshot.refresh()
+    print(f"snapshot: built in {time.perf_counter() - started:.1f}s, "
+          f"{directory_size(snapshot.config.path) / 2 ** 20:.1f} MiB on disk")
+
+    repository_class = PostgresCatalogRepository if engine.dialect.name == "postgresql" else CatalogRepository
+    rng = random.Random(args.seed)
+    # первый запрос без фильтров - панель фильтров на главной странице каталога
+    queries = [{}] + [dataset.random_filters(rng, count=rng.randint(0, 2)) for _ in range(args.queries - 1)]
+    sql_latencies, snapshot_latencies, mismatches = [], [], 0
+    for filters in queries:
+        started = time.perf_counter()
+        async with session_maker() as session:
+            expected = await repository_class(session).get_filter_stats(property_filters=filters)
+        sql_latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        actual = await snapshot.get_filter_stats(filters)
+        snapshot_latencies.append(time.perf_counter() - started)
+        if actual != expected:
+            mismatches += 1
+            print(f"MISMATCH for {filter_params(filters)}")
+
+    report("sql", sql_latencies)
+    report("snapshot", snapshot_latencies)
+    print(f"speedup (p50): {percentile(sql_latencies, 50) / percentile(snapshot_latencies, 50):.1f}x")
+    await engine.dispose()
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1250000)
+    parser.add_argument("--list-properties", type=int, default=5)
+    parser.add_argument("--int-properties", type=int, default=3)
+    parser.add_argument("--values-per-property", type=int, default=10)
+    parser.add_argument("--properties-per-product", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument(
+        "--database-url",
+        help="пустая одноразовая БД, например postgresql+asyncpg://postgres@localhost/bench (по умолчанию временный SQLite)"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mismatches = asyncio.run(run(args, tmp_dir))
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Размер и стоимость ответа /catalog/: форма страницы (полная, fields, compact) и кодировка (identity, gzip, br,
+zstd - из доступных, см. CompressionMiddleware). Страница синтетическая, в форме CatalogResponse; время - форма +
+сериализация JSONResponse и сжатие на одну страницу.
+
+Запуск из корня репозитория:
+    python -m benchmarks.payload --page-size 100 --properties 10
+"""
+import argparse
+import random
+import time
+import uuid
+
+from fastapi.responses import JSONResponse
+
+from product_catalog.api.middleware import available_encoders
+from product_catalog.config import CompressionConfig
+from product_catalog.domain.projection import PRODUCT_FIELDS, parse_fields, shape_catalog_page
+
+
+def make_page(rng: random.Random, page_size: int, properties: int, values: int) -> dict:
+    definitions = []
+    for index in range(properties):
+        if index % 3 == 2:
+            definitions.append((str(uuid.UUID(int=rng.getrandbits(128))), f"Свойство int {index}", None))
+        else:
+            value_uids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(values)]
+            definitions.append((str(uuid.UUID(int=rng.getrandbits(128))), f"Свойство list {index}", value_uids))
+    products = []
+    for index in range(page_size):
+        product_properties = []
+        for property_uid, name, value_uids in definitions:
+            if value_uids is None:
+                product_properties.append(
+                    {"uid": property_uid, "name": name, "value_uid": None, "value": rng.randint(0, 1000)}
+                )
+                continue
+            value_index = rng.randrange(len(value_uids))
+            product_properties.append({
+                "uid": property_uid,
+                "name": name,
+                "value_uid": value_uids[value_index],
+                "value": f"Значение {value_index}",
+            })
+        products.append({
+            "uid": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": f"Товар {index}",
+            "version": 1,
+            "properties": product_properties,
+        })
+    return {"products": products, "count": 10 * page_size, "next_cursor": None}
+
+
+def per_call_us(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--properties", type=int, default=10)
+    parser.add_argument("--values", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    page = make_page(random.Random(args.seed), args.page_size, args.properties, args.values)
+    encoders = {"identity": None, **available_encoders(CompressionConfig())}
+    shapes = {
+        "full": (PRODUCT_FIELDS, False),
+        "compact": (PRODUCT_FIELDS, True),
+        "fields=uid,name": (parse_fields("uid,name"), False),
+    }
+    print(f"{'shape':<16} {'encoding':<9} {'bytes':>8} {'render':>10} {'compress':>10}")
+    for shape, (fields, compact) in shapes.items():
+        def render():
+            return JSONResponse(shape_catalog_page(page, fields, compact)).body
+
+        body = render()
+        render_us = per_call_us(render, args.iterations)
+        for encoding, encode in encoders.items():
+            size, compress_us = len(body), 0.0
+            if encode is not None:
+                size = len(encode(body))
+                compress_us = per_call_us(lambda: encode(body), args.iterations)
+            print(f"{shape:<16} {encoding:<9} {size:>8} {render_us:>8.0f}us {compress_us:>8.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Разбор параметров запроса каталога: CatalogQuery.from_params (фильтры по свойствам и сортировка) и построение
+ключа кеша в зависимости от числа фильтров. Для сравнения выводится время разбора самой query-строки
+в starlette QueryParams, которое запрос платит в любом случае.
+
+Запуск из корня репозитория:
+    python -m benchmarks.query_parse --iterations 20000
+"""
+import argparse
+import random
+import time
+from urllib.parse import urlencode
+
+from starlette.datastructures import QueryParams
+
+from product_catalog.domain.query import CatalogQuery
+
+
+def make_query_string(rng: random.Random, filters: int) -> str:
+    params = [("page", rng.randint(1, 10)), ("page_size", 20), ("sort", "property_price:desc,name")]
+    for index in range(filters):
+        if index % 3 == 2:
+            params.extend([(f"property_int{index}_from", rng.randint(0, 100)), (f"property_int{index}_to", 1000)])
+        else:
+            # значения в случайном порядке и с повтором: ключ кеша от этого не зависит
+            values = [f"value{rng.randint(0, 9)}" for _ in range(3)]
+            params.extend((f"property_list{index}", value) for value in values)
+    rng.shuffle(params)
+    return urlencode(params)
+
+
+def per_call_us(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--filters", type=int, nargs="+", default=[0, 1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'filters':>7} {'params':>6} {'querystring':>12} {'from_params':>12} {'cache_key':>10}")
+    for filters in args.filters:
+        query_string = make_query_string(rng, filters)
+        query_params = QueryParams(query_string)
+        items = query_params.multi_items()
+
+        def parse():
+            return CatalogQuery.from_params(
+                items, page=1, page_size=20, sort=query_params.get("sort"), name=query_params.get("name")
+            )
+
+        def cache_key():
+            # cached_property: ключ строится при первом обращении к новому объекту
+            return parse().cache_key
+
+        querystring_us = per_call_us(lambda: QueryParams(query_string).multi_items(), args.iterations)
+        parse_us = per_call_us(parse, args.iterations)
+        cache_key_us = per_call_us(cache_key, args.iterations) - parse_us
+        print(f"{filters:>7} {len(items):>6} {querystring_us:>10.2f}us {parse_us:>10.2f}us {cache_key_us:>8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Смешанная нагрузка чтение/запись на SQLite: сравнение настроек по умолчанию
+(один движок, journal_mode=DELETE) с профилем из config.SQLiteConfig (WAL + отдельный пул для чтения).
+
+Запуск из корня репозитория:
+    python -m benchmarks.sqlite_concurrency --products 2000 --readers 8 --writers 2 --duration 10
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from benchmarks.datagen import Dataset, DatasetSpec, seed
+from benchmarks.utils import percentile
+from product_catalog.adapters.repository import CatalogRepository, ProductRepository
+from product_catalog.config import DatabaseConfig
+from product_catalog.di.database import create_engine_from_config
+from product_catalog.domain.dto import ProductCreate, ProductPropertyCreate
+
+
+async def reader(
+    session_maker: async_sessionmaker,
+    dataset: Dataset,
+    deadline: float,
+    latencies: list[float],
+    errors: list[str]
+) -> None:
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        filters = dataset.random_filters(rng)
+        started = time.perf_counter()
+        try:
+            async with session_maker() as session:
+                await CatalogRepository(session).get_all(page=random.randint(1, 20), property_filters=filters)
+        except Exception as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def writer(
+    session_maker: async_sessionmaker,
+    dataset: Dataset,
+    deadline: float,
+    counter: itertools.count,
+    latencies: list[float],
+    errors: list[str]
+) -> None:
+    while time.perf_counter() < deadline:
+        uid = f"w{next(counter):07d}"
+        product = ProductCreate(
+            uid=uid,
+            name=f"Новый товар {uid}",
+            properties=[
+                ProductPropertyCreate(uid=prop_uid, value_uid=random.choice(values))
+                for prop_uid, values in dataset.list_values.items()
+            ] + [
+                ProductPropertyCreate(uid=prop_uid, value=random.randint(0, 10000))
+                for prop_uid in dataset.int_properties
+            ]
+        )
+        started = time.perf_counter()
+        try:
+            async with session_maker() as session:
+                await ProductRepository(session).add(product)
+        except Exception as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+def report(profile: str, kind: str, latencies: list[float], errors: list[str], duration: float) -> None:
+    ms = [value * 1000 for value in latencies]
+    print(
+        f"{profile:<9} {kind:<6} "
+        f"ops/s={len(ms) / duration:9.1f}  "
+        f"mean={statistics.fmean(ms) if ms else 0:7.2f}ms  "
+        f"p50={percentile(ms, 50):7.2f}ms  p95={percentile(ms, 95):7.2f}ms  p99={percentile(ms, 99):7.2f}ms  "
+        f"errors={len(errors)}"
+    )
+
+
+async def run_profile(profile: str, args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        if profile == "baseline":
+            write_engine = read_engine = create_async_engine(url)
+        else:
+            config = DatabaseConfig(url=url, read_pool_size=args.readers)
+            write_engine = create_engine_from_config(config)
+            read_engine = create_engine_from_config(config, read_only=True)
+
+        dataset = await seed(write_engine, DatasetSpec(products=args.products))
+
+        read_maker = async_sessionmaker(read_engine, class_=AsyncSession)
+        write_maker = async_sessionmaker(write_engine, class_=AsyncSession)
+        read_latencies, write_latencies, read_errors, write_errors = [], [], [], []
+        counter = itertools.count()
+        deadline = time.perf_counter() + args.duration
+
+        await asyncio.gather(
+            *(reader(read_maker, dataset, deadline, read_latencies, read_errors) for _ in range(args.readers)),
+            *(writer(write_maker, dataset, deadline, counter, write_latencies, write_errors)
+              for _ in range(args.writers)),
+        )
+
+        report(profile, "read", read_latencies, read_errors, args.duration)
+        report(profile, "write", write_latencies, write_errors, args.duration)
+
+        await write_engine.dispose()
+        if read_engine is not write_engine:
+            await read_engine.dispose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--profile", choices=["baseline", "tuned", "both"], default="both")
+    args = parser.parse_args()
+
+    random.seed(0)
+    profiles = ["baseline", "tuned"] if args.profile == "both" else [args.profile]
+    for profile in profiles:
+        await run_profile(profile, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,231 @@
+"""
+Время запуска воркера: импорт приложения (по данным python -X importtime) и путь от старта интерпретатора
+до первого обслуженного запроса. Каждый прогон - отдельный процесс, поэтому замеры не зависят от уже
+импортированных модулей и прогретых кешей.
+
+Фазы запуска воркера:
+* interpreter - старт интерпретатора до выполнения кода;
+* import - импорт product_catalog.entrypoints.fastapi_app;
+* build - get_app(): роутеры, middleware, схема OpenAPI из файла;
+* startup - lifespan: прогрев пулов, метаданные, Redis;
+* first_request - первый GET /catalog/;
+* openapi - первый GET /openapi.json (без заранее собранной схемы она строится здесь).
+
+С --cold байткод пишется и читается только во временном каталоге (PYTHONPYCACHEPREFIX), а не в __pycache__
+репозитория: зависимости компилируются туда один раз прогревочным запуском, байткод product_catalog удаляется перед
+каждым прогоном, и запись новых .pyc отключается - так стартует контейнер, в образе которого код приложения не
+скомпилирован (зависимости pip компилирует при установке).
+С --budget-ms код возврата 1, если медиана времени до первого
+запроса больше бюджета.
+
+Запуск из корня репозитория:
+    python -m benchmarks.startup --runs 5 --budget-ms 1500
+    python -m product_catalog.entrypoints.openapi && python -m benchmarks.startup --cold
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Optional
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_MODULE = "product_catalog.entrypoints.fastapi_app"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# выполняется в отдельном процессе; ASGI-вызов без httpx, чтобы импорт клиента не попадал в замер
+WORKER = """
+import time
+started = time.time()
+import asyncio
+import json
+from product_catalog.entrypoints.fastapi_app import get_app
+imported = time.time()
+
+
+async def request(app, path):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "scheme": "http", "method": "GET",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"startup")], "server": ("startup", 80), "client": ("127.0.0.1", 1),
+    }
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+
+async def main():
+    app = get_app()
+    built = time.time()
+    async with app.router.lifespan_context(app):
+        ready = time.time()
+        status = await request(app, "/catalog/")
+        served = time.time()
+        openapi_status = await request(app, "/openapi.json")
+        openapi = time.time()
+    print(json.dumps({
+        "started": started, "imported": imported, "built": built, "ready": ready, "served": served,
+        "openapi": openapi, "status": status, "openapi_status": openapi_status,
+    }))
+
+
+asyncio.run(main())
+"""
+
+
+def worker_env(args: argparse.Namespace, database_url: str, pycache_prefix: Optional[str] = None) -> dict[str, str]:
+    """
+    pycache_prefix - холодный запуск: байткод product_catalog удаляется из pycache_prefix (зависимости там уже
+    скомпилированы прогревом), новый не записывается.
+    """
+    env = dict(os.environ, DATABASE__URL=database_url, PYTHONPATH=ROOT_DIR)
+    if not args.redis:
+        env["REDIS__ENABLED"] = "false"
+    if pycache_prefix:
+        env["PYTHONPYCACHEPREFIX"] = pycache_prefix
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+        # байткод модуля /path/x.py лежит в <pycache_prefix>/path/
+        shutil.rmtree(os.path.join(pycache_prefix, ROOT_DIR.lstrip(os.sep), "product_catalog"), ignore_errors=True)
+    return env
+
+
+def warm_pycache(args: argparse.Namespace, database_url: str, pycache_prefix: str) -> None:
+    # полный путь запуска воркера, чтобы скомпилировались и модули, импортируемые при старте и первом запросе
+    env = dict(worker_env(args, database_url), PYTHONPYCACHEPREFIX=pycache_prefix)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    run_python(["-c", WORKER], env)
+
+
+def run_python(args: list[str], env: dict[str, str]) -> subprocess.CompletedProcess:
+    result = subprocess.run([sys.executable, *args], env=env, cwd=ROOT_DIR, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"worker exited with {result.returncode}:\n{result.stderr}")
+    return result
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """
+    Строки "import time: self | cumulative | name" -> {модуль: (self, cumulative)} в микросекундах.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return modules
+
+
+def measure_import(
+    args: argparse.Namespace, database_url: str, pycache_prefix: Optional[str]
+) -> list[dict[str, tuple[int, int]]]:
+    runs = []
+    for _ in range(args.runs):
+        env = worker_env(args, database_url, pycache_prefix)
+        result = run_python(["-X", "importtime", "-c", f"import {APP_MODULE}"], env)
+        runs.append(parse_importtime(result.stderr))
+    return runs
+
+
+def report_import(runs: list[dict[str, tuple[int, int]]], top: int) -> None:
+    total_ms = statistics.median(run[APP_MODULE][1] for run in runs) / 1000
+    print(f"import {APP_MODULE}: {total_ms:.1f}ms (median of {len(runs)})")
+
+    packages: dict[str, list[float]] = defaultdict(list)
+    for run in runs:
+        totals: dict[str, int] = defaultdict(int)
+        for name, (self_us, _) in run.items():
+            totals[name.split(".", 1)[0]] += self_us
+        for package, self_us in totals.items():
+            packages[package].append(self_us / 1000)
+    print("by top-level package (self time):")
+    for package, values in sorted(packages.items(), key=lambda item: -statistics.median(item[1]))[:top]:
+        print(f"  {package:<30} {statistics.median(values):8.1f}ms")
+
+    modules: dict[str, list[float]] = defaultdict(list)
+    for run in runs:
+        for name, (self_us, _) in run.items():
+            modules[name].append(self_us / 1000)
+    print("slowest modules (self time):")
+    for name, values in sorted(modules.items(), key=lambda item: -statistics.median(item[1]))[:top]:
+        print(f"  {name:<50} {statistics.median(values):8.1f}ms")
+
+
+def measure_serving(args: argparse.Namespace, database_url: str, pycache_prefix: Optional[str]) -> dict[str, float]:
+    phases: dict[str, list[float]] = defaultdict(list)
+    for _ in range(args.runs):
+        env = worker_env(args, database_url, pycache_prefix)
+        spawned = time.time()
+        result = run_python(["-c", WORKER], env)
+        marks = json.loads(result.stdout.strip().splitlines()[-1])
+        if marks["status"] != 200 or marks["openapi_status"] != 200:
+            raise RuntimeError(f"worker responded {marks['status']}/{marks['openapi_status']}: {result.stderr}")
+        previous = spawned
+        for phase, mark in (
+            ("interpreter", "started"), ("import", "imported"), ("build", "built"), ("startup", "ready"),
+            ("first_request", "served"), ("openapi", "openapi"),
+        ):
+            phases[phase].append((marks[mark] - previous) * 1000)
+            previous = marks[mark]
+        phases["serving"].append((marks["served"] - spawned) * 1000)
+    return {phase: statistics.median(values) for phase, values in phases.items()}
+
+
+async def prepare_database(args: argparse.Namespace, tmp_dir: str) -> str:
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from benchmarks.datagen import DatasetSpec, seed
+
+    url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    engine = create_async_engine(url)
+    await seed(engine, DatasetSpec(products=args.products))
+    await engine.dispose()
+    return url
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--top", type=int, default=15, help="сколько пакетов и модулей показать")
+    parser.add_argument("--cold", action="store_true", help="запуск без скомпилированного байткода product_catalog")
+    parser.add_argument("--redis", action="store_true", help="использовать Redis из настроек вместо отключённого кеша")
+    parser.add_argument("--budget-ms", type=float, help="бюджет времени от старта процесса до первого ответа")
+    parser.add_argument(
+        "--database-url",
+        help="пустая одноразовая БД, например postgresql+asyncpg://postgres@localhost/bench (по умолчанию временный SQLite)"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_url = asyncio.run(prepare_database(args, tmp_dir))
+        pycache_prefix = None
+        if args.cold:
+            pycache_prefix = os.path.join(tmp_dir, "pycache")
+            warm_pycache(args, database_url, pycache_prefix)
+        report_import(measure_import(args, database_url, pycache_prefix), args.top)
+        phases = measure_serving(args, database_url, pycache_prefix)
+
+    print(f"worker start (median of {args.runs}):")
+    for phase, elapsed in phases.items():
+        print(f"  {phase:<14} {elapsed:8.1f}ms")
+    if args.budget_ms is not None and phases["serving"] > args.budget_ms:
+        print(f"OVER BUDGET: first request served after {phases['serving']:.1f}ms, budget {args.budget_ms:.1f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+"""
+Колоночный снимок product_properties для /catalog/filter/ на больших каталогах.
+
+Строки product_properties хранятся массивами NumPy (порядковый номер товара, код свойства, код значения,
+числовое значение), отсортированными по коду свойства, так что строки одного свойства - непрерывный срез.
+Фильтр превращается в маску товаров, количество товаров по значениям считается одним np.bincount по
+маскированным строкам, min/max числовых свойств - редукциями по срезам.
+
+Снимок хранится поколениями в FacetsConfig.path: каталог <id последнего события>/ с файлами .npy,
+которые открываются через mmap и делят page cache между воркерами хоста. Изменения товаров применяются
+инкрементально по событиям outbox (catalog_events): строки изменённых товаров помечаются удалёнными,
+актуальные строки дописываются в небольшую дельту в памяти. Когда дельта вырастает, снимок уплотняется
+в новое поколение; изменение свойств и rebuild_interval приводят к полной пересборке из БД.
+
+Снимок отстаёт от БД не больше чем на refresh_interval, поэтому используется только для статистики фильтров.
+"""
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from product_catalog.adapters.profiling import span
+from product_catalog.adapters.repository import chunked
+from product_catalog.config import FacetsConfig
+from product_catalog.domain.models import CatalogEvent, Product, ProductProperty, Property, PropertyType, PropertyValue
+
+
+logger = logging.getLogger(__name__)
+
+ROW_ARRAYS = ("products", "properties", "values", "int_values")
+DTYPES = {"products": np.int32, "properties": np.int32, "values": np.int32, "int_values": np.int64}
+DICTIONARIES_FILE = "dictionaries.json"
+PARTITION_SIZE = 100000
+GAP_TIMEOUT = 5.0  # секунды, в течение которых пропущенный id события ждёт commit своей транзакции
+REBUILD_EVENT_PREFIXES = ("property.", "properties.")
+
+
+def empty_rows() -> dict[str, np.ndarray]:
+    return {name: np.empty(0, dtype=DTYPES[name]) for name in ROW_ARRAYS}
+
+
+@dataclass(frozen=True)
+class FacetSegment:
+    """
+    Строки product_properties, отсортированные по коду свойства. values - код значения + 1
+    (0 у числовых свойств), чтобы np.bincount работал без отрицательных индексов.
+    """
+    products: np.ndarray
+    properties: np.ndarray
+    values: np.ndarray
+    int_values: np.ndarray
+    alive: np.ndarray
+    bounds: np.ndarray
+
+    @classmethod
+    def build(cls, rows: dict[str, np.ndarray], property_count: int, presorted: bool = False) -> "FacetSegment":
+        if not presorted:
+            order = np.argsort(rows["properties"], kind="stable")
+            rows = {name: rows[name][order] for name in ROW_ARRAYS}
+        return cls(
+            **rows,
+            alive=np.ones(len(rows["products"]), dtype=bool),
+            bounds=np.searchsorted(rows["properties"], np.arange(property_count + 1)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def rows(self, code: int) -> slice:
+        return slice(int(self.bounds[code]), int(self.bounds[code + 1]))
+
+    def live_rows(self) -> dict[str, np.ndarray]:
+        return {name: getattr(self, name)[self.alive] for name in ROW_ARRAYS}
+
+
+@dataclass(frozen=True)
+class FacetState:
+    """
+    Поколение снимка вместе с применёнными поверх него событиями. Обновление создаёт новый FacetState,
+    поэтому расчёт, запущенный в потоке, работает с согласованными массивами. product_index только
+    дополняется: новые товары получают следующие номера, а старые состояния их не видят.
+    """
+    event_id: int
+    built_at: float
+    product_index: dict[str, int]
+    property_uids: tuple[str, ...]
+    property_index: dict[str, int]
+    int_codes: tuple[int, ...]
+    value_uids: tuple[str, ...]  # по коду значения - 1, упорядочены по коду свойства
+    value_owners: tuple[str, ...]
+    value_index: dict[str, int]  # uid -> код значения + 1
+    product_alive: np.ndarray
+    base: FacetSegment
+    delta: FacetSegment
+
+    @property
+    def segments(self) -> tuple[FacetSegment, FacetSegment]:
+        return self.base, self.delta
+
+    def product_mask(self, property_filters: dict[str, list[str] | dict[str, int]]) -> np.ndarray:
+        """
+        Маска товаров, подходящих под фильтры, с той же семантикой, что и apply_product_filters:
+        товар должен иметь строку каждого фильтруемого свойства, подходящую под условие.
+        """
+        mask = self.product_alive.copy()
+        for prop_uid, values in property_filters.items():
+            matched = np.zeros_like(mask)
+            code = self.property_index.get(prop_uid)
+            if code is not None:
+                if isinstance(values, list):
+                    value_codes = [self.value_index[uid] for uid in values if uid in self.value_index]
+                for segment in self.segments:
+                    rows = segment.rows(code)
+                    selected = segment.alive[rows]
+                    if isinstance(values, list):
+                        selected = selected & np.isin(segment.values[rows], value_codes)
+                    elif isinstance(values, dict) and ("from" in values or "to" in values):
+                        # у строк списочных свойств int_value пустой и под диапазон не подходит
+                        selected = selected & (segment.values[rows] == 0)
+                        if "from" in values:
+                            selected = selected & (segment.int_values[rows] >= values["from"])
+                        if "to" in values:
+                            selected = selected & (segment.int_values[rows] <= values["to"])
+                    matched[segment.products[rows][selected]] = True
+            mask &= matched
+        return mask
+
+    def filter_stats(self, property_filters: dict[str, list[str] | dict[str, int]]) -> dict[str, Any]:
+        """
+        Тот же ответ, что и CatalogRepository.get_filter_stats без фильтра по названию.
+        """
+        mask = self.product_mask(property_filters)
+        counts = np.zeros(len(self.value_uids) + 1, dtype=np.int64)
+        ranges: dict[int, tuple[int, int]] = {}
+        for segment in self.segments:
+            if not len(segment):
+                continue
+            selected = segment.alive & mask[segment.products]
+            counts += np.bincount(segment.values[selected], minlength=len(counts))
+            for code in self.int_codes:
+                rows = segment.rows(code)
+                values = segment.int_values[rows][selected[rows]]
+                if values.size:
+                    low, high = int(values.min()), int(values.max())
+                    if code in ranges:
+                        low, high = min(low, ranges[code][0]), max(high, ranges[code][1])
+                    ranges[code] = (low, high)
+
+        stats: dict[str, Any] = {"count": int(np.count_nonzero(mask))}
+        for value_code in np.flatnonzero(counts[1:]):
+            owner = self.value_owners[value_code]
+            stats.setdefault(owner, {})[self.value_uids[value_code]] = int(counts[value_code + 1])
+        for code in self.int_codes:
+            if code in ranges:
+                stats[self.property_uids[code]] = {"min_value": ranges[code][0], "max_value": ranges[code][1]}
+        return stats
+
+    def compacted(self) -> "FacetState":
+        """
+        Сливает живые строки основного снимка и дельты в новый основной снимок (в памяти).
+        """
+        base, delta = self.base.live_rows(), self.delta.live_rows()
+        rows = {name: np.concatenate([base[name], delta[name]]) for name in ROW_ARRAYS}
+        return replace(
+            self,
+            base=FacetSegment.build(rows, len(self.property_uids)),
+            delta=FacetSegment.build(empty_rows(), len(self.property_uids)),
+        )
+
+
+def write_generation(root: str, state: FacetState) -> str:
+    """
+    Записывает основной снимок (дельта должна быть пустой) во временный каталог и переименовывает его
+    в <event_id>: воркеры видят только полностью записанные поколения.
+    """
+    path = os.path.join(root, f"{state.event_id:012d}")
+    tmp_path = os.path.join(root, f".{state.event_id:012d}.{os.getpid()}.tmp")
+    os.makedirs(tmp_path, exist_ok=True)
+    try:
+        for name in ROW_ARRAYS:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(state.base, name))
+        np.save(os.path.join(tmp_path, "product_alive.npy"), state.product_alive)
+        with open(os.path.join(tmp_path, DICTIONARIES_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "event_id": state.event_id,
+                "built_at": state.built_at,
+                "products": list(state.product_index),
+                "properties": [
+                    [uid, PropertyType.INT.value if code in state.int_codes else PropertyType.LIST.value]
+                    for code, uid in enumerate(state.property_uids)
+                ],
+                "values": [list(value) for value in zip(state.value_uids, state.value_owners)],
+            }, f)
+        os.rename(tmp_path, path)
+    except OSError:
+        # поколение с этим id уже записал другой воркер
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.isdir(path):
+            raise
+    return path
+
+
+def load_generation(path: str) -> FacetState:
+    with open(os.path.join(path, DICTIONARIES_FILE), encoding="utf-8") as f:
+        data = json.load(f)
+    property_uids = tuple(uid for uid, _ in data["properties"])
+    rows = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ROW_ARRAYS}
+    return FacetState(
+        event_id=data["event_id"],
+        built_at=data["built_at"],
+        product_index={uid: ordinal for ordinal, uid in enumerate(data["products"])},
+        property_uids=property_uids,
+        property_index={uid: code for code, uid in enumerate(property_uids)},
+        int_codes=tuple(
+            code for code, (_, prop_type) in enumerate(data["properties"]) if prop_type == PropertyType.INT.value
+        ),
+        value_uids=tuple(uid for uid, _ in data["values"]),
+        value_owners=tuple(owner for _, owner in data["values"]),
+        value_index={uid: code + 1 for code, (uid, _) in enumerate(data["values"])},
+        product_alive=np.load(os.path.join(path, "product_alive.npy")),
+        base=FacetSegment.build(rows, len(property_uids), presorted=True),
+        delta=FacetSegment.build(empty_rows(), len(property_uids)),
+    )
+
+
+class FacetSnapshot:
+    """
+    Колоночный снимок для статистики фильтров. Пока снимок не загружен (первая сборка идёт в фоне),
+    get_filter_stats возвращает None и статистика считается запросом к БД.
+    """
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession], config: FacetsConfig):
+        self.session_maker = session_maker
+        self.config = config
+        self.state: Optional[FacetState] = None
+        self._gaps: dict[int, float] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def get_filter_stats(
+        self,
+        property_filters: Optional[dict[str, list[str] | dict[str, int]]] = None
+    ) -> Optional[dict[str, Any]]:
+        state = self.state
+        if state is None:
+            return None
+        with span("facets"):
+            # NumPy отпускает GIL на больших массивах, расчёт не блокирует цикл событий
+            return await asyncio.to_thread(state.filter_stats, property_filters or {})
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            state = self.state or self._load_latest()
+            if state is None or time.time() - state.built_at > self.config.rebuild_interval:
+                state = await self._build()
+            self.state = await self._apply_events(state)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        async with self._lock:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.shield(self.refresh())
+            except Exception:
+                logger.exception("Facet snapshot refresh failed")
+            await asyncio.sleep(self.config.refresh_interval)
+
+    def _load_latest(self) -> Optional[FacetState]:
+        if not os.path.isdir(self.config.path):
+            return None
+        generations = sorted(name for name in os.listdir(self.config.path) if name.isdigit())
+        if not generations:
+            return None
+        try:
+            return load_generation(os.path.join(self.config.path, generations[-1]))
+        except (OSError, ValueError, KeyError):
+            logger.warning("Facet snapshot %s is unreadable, rebuilding", generations[-1], exc_info=True)
+            return None
+
+    def _save(self, state: FacetState) -> FacetState:
+        """
+        Сохраняет поколение, открывает его через mmap и удаляет старые поколения, кроме предыдущего
+        (его ещё может читать другой воркер; удалённые файлы остаются доступны уже открывшим их).
+        """
+        os.makedirs(self.config.path, exist_ok=True)
+        path = write_generation(self.config.path, state)
+        generations = sorted(name for name in os.listdir(self.config.path) if name.isdigit())
+        for name in generations[:-2]:
+            shutil.rmtree(os.path.join(self.config.path, name), ignore_errors=True)
+        return load_generation(path)
+
+    async def _build(self) -> FacetState:
+        started = time.perf_counter()
+        async with self.session_maker() as session:
+            # события после этого id применятся поверх снимка, даже если изменения уже попали в сам снимок
+            event_id = (await session.execute(select(func.max(CatalogEvent.id)))).scalar() or 0
+            latest = self._load_latest()
+            if (
+                latest is not None and latest.event_id >= event_id
+                and time.time() - latest.built_at <= self.config.rebuild_interval
+            ):
+                # другой воркер только что собрал снимок
+                return latest
+
+            properties = (await session.execute(select(Property.uid, Property.type))).all()
+            properties.sort(key=lambda row: row[1] == PropertyType.INT)
+            property_uids = tuple(uid for uid, _ in properties)
+            property_index = {uid: code for code, uid in enumerate(property_uids)}
+            values = (await session.execute(select(PropertyValue.uid, PropertyValue.property_uid))).all()
+            values = [row for row in values if row[1] in property_index]
+            values.sort(key=lambda row: (property_index[row[1]], row[0]))
+            value_index = {uid: code + 1 for code, (uid, _) in enumerate(values)}
+            product_index = {
+                uid: ordinal for ordinal, uid in enumerate((await session.execute(select(Product.uid))).scalars())
+            }
+
+            chunks = {name: [] for name in ROW_ARRAYS}
+            result = await session.stream(
+                select(
+                    ProductProperty.product_uid,
+                    ProductProperty.property_uid,
+                    ProductProperty.value_uid,
+                    ProductProperty.int_value,
+                ).execution_options(yield_per=PARTITION_SIZE)
+            )
+            async for partition in result.partitions():
+                for name, array in self._encode(partition, product_index, property_index, value_index).items():
+                    chunks[name].append(array)
+
+        rows = {
+            name: np.concatenate(chunks[name]) if chunks[name] else empty_rows()[name] for name in ROW_ARRAYS
+        }
+        state = FacetState(
+            event_id=event_id,
+            built_at=time.time(),
+            product_index=product_index,
+            property_uids=property_uids,
+            property_index=property_index,
+            int_codes=tuple(code for code, (_, prop_type) in enumerate(properties) if prop_type == PropertyType.INT),
+            value_uids=tuple(uid for uid, _ in values),
+            value_owners=tuple(owner for _, owner in values),
+            value_index=value_index,
+            product_alive=np.ones(len(product_index), dtype=bool),
+            base=FacetSegment.build(rows, len(property_uids)),
+            delta=FacetSegment.build(empty_rows(), len(property_uids)),
+        )
+        self._gaps.clear()
+        state = self._save(state)
+        logger.info(
+            "Facet snapshot rebuilt: %d rows in %.1fs", len(state.base), time.perf_counter() - started
+        )
+        return state
+
+    @staticmethod
+    def _encode(
+        rows: list[tuple],
+        product_index: dict[str, int],
+        property_index: dict[str, int],
+        value_index: dict[str, int]
+    ) -> dict[str, np.ndarray]:
+        """
+        Переводит строки (product_uid, property_uid, value_uid, int_value) в коды. Новые товары получают
+        следующие номера; строки свойств, появившихся после чтения словарей, отбрасываются.
+        """
+        count = len(rows)
+        properties = np.fromiter((property_index.get(row[1], -1) for row in rows), np.int32, count)
+        encoded = {
+            "products": np.fromiter(
+                (product_index.setdefault(row[0], len(product_index)) for row in rows), np.int32, count
+            ),
+            "properties": properties,
+            "values": np.fromiter((value_index.get(row[2], 0) for row in rows), np.int32, count),
+            "int_values": np.fromiter((row[3] or 0 for row in rows), np.int64, count),
+        }
+        known = properties >= 0
+        if not known.all():
+            encoded = {name: array[known] for name, array in encoded.items()}
+        return encoded
+
+    async def _apply_events(self, state: FacetState) -> FacetState:
+        """
+        Применяет события после state.event_id. Id событий в PostgreSQL выдаются до commit, поэтому
+        пропущенные id перечитываются ещё GAP_TIMEOUT секунд: транзакция с меньшим id могла закоммититься позже.
+        """
+        now = time.monotonic()
+        self._gaps = {event_id: deadline for event_id, deadline in self._gaps.items() if deadline > now}
+        condition = CatalogEvent.id > state.event_id
+        if self._gaps:
+            condition = or_(condition, CatalogEvent.id.in_(list(self._gaps)))
+        async with self.session_maker() as session:
+            events = (await session.execute(
+                select(CatalogEvent.id, CatalogEvent.event_type, CatalogEvent.entity_uid, CatalogEvent.payload)
+                .where(condition)
+                .order_by(CatalogEvent.id)
+            )).all()
+        if not events:
+            return state
+
+        seen = {event_id for event_id, *_ in events}
+        last_id = max(state.event_id, max(seen))
+        for event_id in range(state.event_id + 1, last_id):
+            if event_id not in seen:
+                self._gaps[event_id] = now + GAP_TIMEOUT
+        for event_id in seen:
+            self._gaps.pop(event_id, None)
+
+        product_uids = set()
+        for _, event_type, entity_uid, payload in events:
+            if event_type.startswith(REBUILD_EVENT_PREFIXES):
+                return await self._build()
+            if event_type == "products.deleted":
+                product_uids.update(payload.get("uids", []))
+            else:
+                product_uids.add(entity_uid)
+
+        state = await self._apply_products(state, product_uids, last_id)
+        if state is None:
+            return await self._build()
+        if len(state.delta) > self.config.compact_ratio * max(len(state.base), 1):
+            state = self._save(state.compacted())
+        return state
+
+    async def _apply_products(self, state: FacetState, product_uids: set[str], event_id: int) -> Optional[FacetState]:
+        """
+        Заменяет строки товаров актуальными из БД. None - в строках есть неизвестные снимку значения,
+        нужна полная пересборка.
+        """
+        existing, rows = set(), []
+        async with self.session_maker() as session:
+            for chunk in chunked(sorted(product_uids)):
+                existing.update((await session.execute(select(Product.uid).where(Product.uid.in_(chunk)))).scalars())
+                rows.extend((await session.execute(
+                    select(
+                        ProductProperty.product_uid,
+                        ProductProperty.property_uid,
+                        ProductProperty.value_uid,
+                        ProductProperty.int_value,
+                    ).where(ProductProperty.product_uid.in_(chunk))
+                )).tuples())
+        if any(
+            row[1] not in state.property_index or (row[2] is not None and row[2] not in state.value_index)
+            for row in rows
+        ):
+            return None
+
+        product_index = state.product_index
+        ordinals = np.array(
+            [product_index.setdefault(uid, len(product_index)) for uid in product_uids], dtype=np.int32
+        )
+        product_alive = np.zeros(len(product_index), dtype=bool)
+        product_alive[:len(state.product_alive)] = state.product_alive
+        product_alive[ordinals] = [uid in existing for uid in product_uids]
+
+        base = replace(state.base, alive=state.base.alive & ~np.isin(state.base.products, ordinals))
+        delta_rows = state.delta.live_rows()
+        kept = ~np.isin(delta_rows["products"], ordinals)
+        new_rows = self._encode(rows, product_index, state.property_index, state.value_index)
+        delta = FacetSegment.build(
+            {name: np.concatenate([delta_rows[name][kept], new_rows[name]]) for name in ROW_ARRAYS},
+            len(state.property_uids)
+        )
+        return replace(state, event_id=event_id, product_alive=product_alive, base=base, delta=delta)
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from product_catalog.adapters.redis_cache import RedisCache
+from product_catalog.config import MetadataConfig
+from product_catalog.domain.models import Property, PropertyType, PropertyValue
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PropertyInfo:
+    uid: str
+    name: str
+    type: PropertyType
+
+
+@dataclass(frozen=True)
+class PropertyValueInfo:
+    uid: str
+    value: str
+    property_uid: str
+
+
+@dataclass(frozen=True)
+class MetadataSnapshot:
+    """
+    Неизменяемый снимок определений свойств. Кеш подменяет снимок целиком, поэтому запрос,
+    взявший снимок, работает с согласованной версией, даже если параллельно идёт обновление.
+    """
+    version: int = 0
+    properties: dict[str, PropertyInfo] = field(default_factory=dict)
+    values: dict[str, PropertyValueInfo] = field(default_factory=dict)
+    value_owners: dict[str, str] = field(default_factory=dict)
+    list_properties: tuple[str, ...] = ()
+    int_properties: tuple[str, ...] = ()
+
+    @classmethod
+    def build(cls, version: int, properties: Iterable[PropertyInfo], values: Iterable[PropertyValueInfo]):
+        properties = {prop.uid: prop for prop in properties}
+        values = {value.uid: value for value in values}
+        return cls(
+            version=version,
+            properties=properties,
+            values=values,
+            value_owners={uid: value.property_uid for uid, value in values.items()},
+            list_properties=tuple(uid for uid, prop in properties.items() if prop.type == PropertyType.LIST),
+            int_properties=tuple(uid for uid, prop in properties.items() if prop.type == PropertyType.INT),
+        )
+
+    def covers(self, property_uids: Iterable[str], value_uids: Iterable[Optional[str]] = ()) -> bool:
+        return (
+            all(uid in self.properties for uid in property_uids)
+            and all(uid is None or uid in self.values for uid in value_uids)
+        )
+
+
+class PropertyMetadataCache:
+    """
+    In-process кеш свойств и их значений для валидации, фасетов и подписей в ответах без запросов к БД.
+    Загружается при старте, перечитывается после изменения свойств в этом воркере, по сообщению
+    из Redis pub/sub (изменение в другом воркере), периодически и при обращении к неизвестному uid.
+    """
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        redis_cache: Optional[RedisCache],
+        config: MetadataConfig
+    ):
+        self.session_maker = session_maker
+        self.redis_cache = redis_cache
+        self.config = config
+        self.snapshot = MetadataSnapshot()
+        self._lock = asyncio.Lock()
+        self._refreshed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._failing = False
+
+    async def refresh(self) -> MetadataSnapshot:
+        async with self._lock:
+            return await self._load()
+
+    async def _load(self) -> MetadataSnapshot:
+        async with self.session_maker() as session:
+            properties = (await session.execute(select(Property.uid, Property.name, Property.type))).all()
+            values = (await session.execute(
+                select(PropertyValue.uid, PropertyValue.value, PropertyValue.property_uid)
+            )).all()
+        self.snapshot = MetadataSnapshot.build(
+            self.snapshot.version + 1,
+            (PropertyInfo(*row) for row in properties),
+            (PropertyValueInfo(*row) for row in values),
+        )
+        self._refreshed_at = time.monotonic()
+        return self.snapshot
+
+    async def ensure(self, property_uids: Iterable[str], value_uids: Iterable[Optional[str]] = ()) -> MetadataSnapshot:
+        """
+        Возвращает снимок, содержащий переданные uid. Если их нет (свойство создано в другом воркере и
+        сообщение ещё не пришло), снимок перечитывается. Чаще miss_refresh_interval сначала проверяется, есть ли
+        недостающие uid в БД, чтобы запросы с несуществующими uid не превращались в перезагрузку метаданных
+        на каждый запрос, а свойство, созданное сразу после перечитывания, всё равно было найдено.
+        """
+        property_uids, value_uids = list(property_uids), [uid for uid in value_uids if uid is not None]
+        snapshot = self.snapshot
+        if snapshot.covers(property_uids, value_uids):
+            return snapshot
+        if time.monotonic() - self._refreshed_at < self.config.miss_refresh_interval:
+            if not await self._exist(
+                [uid for uid in property_uids if uid not in snapshot.properties],
+                [uid for uid in value_uids if uid not in snapshot.values],
+            ):
+                return snapshot
+        async with self._lock:
+            # параллельные запросы с тем же новым uid перечитывают снимок один раз
+            if self.snapshot.covers(property_uids, value_uids):
+                return self.snapshot
+            return await self._load()
+
+    async def _exist(self, property_uids: list[str], value_uids: list[str]) -> bool:
+        """
+        Есть ли в БД хотя бы одно из свойств или значений.
+        """
+        async with self.session_maker() as session:
+            if property_uids:
+                query = select(Property.uid).where(Property.uid.in_(property_uids)).limit(1)
+                if (await session.execute(query)).first():
+                    return True
+            if value_uids:
+                query = select(PropertyValue.uid).where(PropertyValue.uid.in_(value_uids)).limit(1)
+                if (await session.execute(query)).first():
+                    return True
+        return False
+
+    async def broadcast(self) -> None:
+        """
+        Просит все воркеры перечитать метаданные. Вызывается диспетчером outbox при доставке событий свойств.
+        """
+        if self.redis_cache:
+            await self.redis_cache.publish(self.config.channel, "refresh")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # фоновое перечитывание защищено от отмены, дожидаемся его, чтобы не закрыть пул под открытым запросом
+        async with self._lock:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self.redis_cache and self.redis_cache.client:
+                    await self._listen()
+            except Exception:
+                if not self._failing:
+                    logger.warning("Property metadata channel is unavailable, falling back to periodic refresh")
+                self._failing = True
+            await asyncio.sleep(self.config.refresh_interval)
+            try:
+                await asyncio.shield(self.refresh())
+            except Exception:
+                logger.exception("Property metadata refresh failed")
+
+    async def _listen(self) -> None:
+        async with self.redis_cache.client.pubsub() as pubsub:
+            await pubsub.subscribe(self.config.channel)
+            self._failing = False
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=self.config.refresh_interval
+                )
+                # периодическое перечитывание страхует от пропущенных сообщений (pub/sub не хранит историю)
+                if message is not None or time.monotonic() - self._refreshed_at >= self.config.refresh_interval:
+                    await asyncio.shield(self.refresh())
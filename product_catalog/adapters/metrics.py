@@ -0,0 +1,164 @@
+import os
+import shutil
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Количество SQL-запросов на один HTTP-запрос",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Суммарное время SQL-запросов на один HTTP-запрос",
+    ["route"],
+)
+REQUEST_CACHE_TIME = Histogram(
+    "http_request_cache_seconds",
+    "Суммарное время обращений к Redis на один HTTP-запрос",
+    ["route"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Время выполнения SQL-запроса",
+    ["engine", "operation"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Обращения к Redis",
+    ["operation", "result"],
+)
+CACHE_LATENCY = Histogram(
+    "cache_operation_duration_seconds",
+    "Время обращения к Redis",
+    ["operation"],
+)
+DB_POOL_SIZE = Gauge("db_pool_size", "Размер пула соединений", ["engine"], multiprocess_mode="liveall")
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Занятые соединения пула", ["engine"], multiprocess_mode="liveall"
+)
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Соединения сверх размера пула", ["engine"], multiprocess_mode="liveall")
+LOAD_SHED = Counter(
+    "load_shed_total",
+    "Запросы, отклонённые или обслуженные устаревшим кешем при перегрузке",
+    ["operation", "reason", "result"],
+)
+LIMITER_IN_FLIGHT = Gauge(
+    "limiter_in_flight", "Занятые слоты лимита конкурентности", ["operation"], multiprocess_mode="livesum"
+)
+COALESCED_REQUESTS = Counter(
+    "coalesced_requests_total", "Запросы, получившие результат одновременного такого же запроса", ["operation"]
+)
+
+SQL_OPERATIONS = {"select", "insert", "update", "delete", "pragma", "explain", "with"}
+
+
+class RequestStats:
+    __slots__ = ("db_queries", "db_time", "cache_time")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_time = 0.0
+
+
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def instrument_engine(async_engine: AsyncEngine, name: str) -> None:
+    # время начала хранится в контексте выполнения, а не в соединении: after_cursor_execute не вызывается
+    # для упавшего запроса (в том числе по таймауту), и состояние соединения из пула не должно от этого зависеть
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.metrics_started = time.perf_counter()
+
+    @event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "other"
+        if operation not in SQL_OPERATIONS:
+            operation = "other"
+        DB_QUERY_DURATION.labels(engine=name, operation=operation).observe(elapsed)
+
+        stats = request_stats.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_time += elapsed
+
+
+def observe_cache(operation: str, elapsed: float, result: str = "ok") -> None:
+    CACHE_REQUESTS.labels(operation=operation, result=result).inc()
+    CACHE_LATENCY.labels(operation=operation).observe(elapsed)
+
+    stats = request_stats.get()
+    if stats is not None:
+        stats.cache_time += elapsed
+
+
+def observe_request(method: str, route: str, status: int, elapsed: float, stats: RequestStats) -> None:
+    REQUEST_LATENCY.labels(method=method, route=route, status=str(status)).observe(elapsed)
+    REQUEST_DB_QUERIES.labels(route=route).observe(stats.db_queries)
+    REQUEST_DB_TIME.labels(route=route).observe(stats.db_time)
+    REQUEST_CACHE_TIME.labels(route=route).observe(stats.cache_time)
+
+
+def observe_shed(operation: str, reason: str, result: str) -> None:
+    """
+    reason - "concurrency" (нет свободного слота) или "timeout" (таймаут запроса к БД);
+    result - "rejected" (503) или "stale" (ответ из устаревшей копии кеша).
+    """
+    LOAD_SHED.labels(operation=operation, reason=reason, result=result).inc()
+
+
+def update_pool_metrics(engines: dict[str, AsyncEngine]) -> None:
+    for name, async_engine in engines.items():
+        pool = async_engine.pool
+        if not hasattr(pool, "checkedout"):
+            continue
+        DB_POOL_SIZE.labels(engine=name).set(pool.size())
+        DB_POOL_CHECKED_OUT.labels(engine=name).set(pool.checkedout())
+        DB_POOL_OVERFLOW.labels(engine=name).set(max(pool.overflow(), 0))
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    При нескольких воркерах метрики собираются из PROMETHEUS_MULTIPROC_DIR, иначе - из текущего процесса.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def prepare_multiprocess_dir() -> None:
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not multiproc_dir:
+        return
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def mark_process_dead() -> None:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,98 @@
+"""
+Репозитории для PostgreSQL. Выбираются в product_catalog.di.repository по схеме DatabaseConfig.url;
+SQLite-путь остаётся в product_catalog.adapters.repository без изменений.
+
+Отличия от базовых репозиториев:
+* списки uid передаются одним параметром-массивом (= ANY(:array)) вместо IN с параметром на каждый элемент,
+  поэтому текст запроса не зависит от длины списка и подготовленный asyncpg запрос переиспользуется;
+* фасеты считаются через LATERAL по свойствам, каждое свойство читается диапазоном индекса
+  ix_product_properties_property_value;
+* массовая вставка значений свойств идёт через COPY.
+
+Поиск по названию использует тот же ILIKE, его ускоряет GIN-индекс pg_trgm из миграции.
+"""
+from typing import Any
+
+from sqlalchemy import ColumnElement, Select, Table, any_, bindparam, func, select, true
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from product_catalog.adapters.profiling import counted
+from product_catalog.adapters.repository import CatalogRepository, ProductRepository, PropertyRepository
+from product_catalog.domain.dto import PropertyValueCreate
+from product_catalog.domain.models import ProductProperty, Property, PropertyValue
+
+
+COPY_THRESHOLD = 100  # на нескольких строках COPY дороже обычного INSERT
+
+
+async def copy_rows(connection: AsyncConnection, table: Table, rows: list[dict[str, Any]]) -> None:
+    """
+    Загружает строки через COPY в текущей транзакции соединения. Значения проходят через bind-процессоры
+    типов колонок (Enum, JSON), поэтому формат строк тот же, что и для insert(table).
+    """
+    if not rows:
+        return
+    columns = list(rows[0])
+    processors = [table.c[column].type.bind_processor(connection.dialect) for column in columns]
+    records = [
+        tuple(
+            processor(row[column]) if processor else row[column]
+            for column, processor in zip(columns, processors)
+        )
+        for row in rows
+    ]
+    # asyncpg-адаптер SQLAlchemy открывает транзакцию при первом запросе через него, а COPY идёт мимо адаптера:
+    # без запроса перед ним COPY первой операцией выполнился бы вне транзакции соединения
+    await connection.exec_driver_sql("SELECT 1")
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(table.name, records=records, columns=columns)
+
+
+class PostgresRepositoryMixin:
+    chunk_size = 10000  # ограничение на число параметров не действует, пачки только ограничивают размер запроса
+
+    @staticmethod
+    def in_values(column, values: list) -> ColumnElement[bool]:
+        return column == any_(bindparam(None, list(values), type_=ARRAY(column.type)))
+
+
+class PostgresCatalogRepository(PostgresRepositoryMixin, CatalogRepository):
+    async def _facet_rows(self, base_query: Select) -> list[tuple]:
+        filtered = base_query.cte("filtered_products")
+        facets = (
+            select(
+                ProductProperty.value_uid,
+                func.count(ProductProperty.id).label("count"),
+                func.min(ProductProperty.int_value).label("min_value"),
+                func.max(ProductProperty.int_value).label("max_value"),
+            )
+            .where(ProductProperty.property_uid == Property.uid)
+            .where(ProductProperty.product_uid.in_(select(filtered.c.uid)))
+            .group_by(ProductProperty.value_uid)
+            .lateral("facets")
+        )
+        facet_query = (
+            select(Property.uid, facets.c.value_uid, facets.c.count, facets.c.min_value, facets.c.max_value)
+            .select_from(Property)
+            .join(facets, true())
+        )
+        return counted((await self.db.execute(facet_query)).tuples().all())
+
+
+class PostgresProductRepository(PostgresRepositoryMixin, ProductRepository):
+    pass
+
+
+class PostgresPropertyRepository(PostgresRepositoryMixin, PropertyRepository):
+    async def _insert_values(self, property_uid: str, values: list[PropertyValueCreate]) -> None:
+        if len(values) < COPY_THRESHOLD:
+            await super()._insert_values(property_uid, values)
+            return
+        # свойство может быть ещё не записано (PropertyRepository.add), а COPY проверяет внешний ключ сразу
+        await self.db.flush()
+        await copy_rows(
+            await self.db.connection(),
+            PropertyValue.__table__,
+            [{"uid": value.value_uid, "value": value.value, "property_uid": property_uid} for value in values]
+        )
@@ -0,0 +1,185 @@
+import functools
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from product_catalog.config import get_settings
+
+
+slow_query_logger = logging.getLogger("product_catalog.slow_query")
+
+
+class RequestProfile:
+    """
+    Таймлайн одного запроса: SQL-запросы, обращения к кешу и сериализация, со смещением от начала запроса.
+    """
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.events: list[dict[str, Any]] = []
+        self.totals: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.total_ms: Optional[float] = None
+
+    def add(self, kind: str, started: float, elapsed: float, **details: Any) -> None:
+        self.events.append({
+            "type": kind,
+            "offset_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round(elapsed * 1000, 3),
+            **details,
+        })
+        self.totals[kind] = self.totals.get(kind, 0.0) + elapsed
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def count_rows(self, rows: int) -> None:
+        # результат читается сразу после выполнения в том же методе репозитория: это последний SQL-запрос профиля
+        for event in reversed(self.events):
+            if event["type"] == "sql":
+                event["rows"] = rows
+                return
+
+    def finish(self) -> None:
+        self.total_ms = round((time.perf_counter() - self.started) * 1000, 3)
+
+    def server_timing(self) -> str:
+        parts = [
+            f'{kind};dur={elapsed * 1000:.3f};desc="{self.counts[kind]} calls"'
+            for kind, elapsed in self.totals.items()
+        ]
+        if self.total_ms is not None:
+            parts.append(f"total;dur={self.total_ms:.3f}")
+        return ", ".join(parts)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "total_ms": self.total_ms,
+            "totals_ms": {kind: round(elapsed * 1000, 3) for kind, elapsed in self.totals.items()},
+            "events": self.events,
+        }
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+current_origin: ContextVar[Optional[str]] = ContextVar("current_origin", default=None)
+
+_profiles: OrderedDict[str, RequestProfile] = OrderedDict()
+
+
+def store_profile(profile: RequestProfile) -> None:
+    _profiles[profile.id] = profile
+    while len(_profiles) > get_settings().profiling.history_size:
+        _profiles.popitem(last=False)
+
+
+def get_profile(profile_id: str) -> Optional[RequestProfile]:
+    return _profiles.get(profile_id)
+
+
+Rows = TypeVar("Rows", bound=list)
+
+
+def counted(rows: Rows) -> Rows:
+    """
+    Отмечает в профиле число строк, прочитанных из результата последнего SQL-запроса. Драйвер сообщает его
+    не для всех SELECT (aiosqlite - никогда), поэтому репозитории передают сюда прочитанные строки.
+    """
+    profile = current_profile.get()
+    if profile is not None:
+        profile.count_rows(len(rows))
+    return rows
+
+
+def traced(method):
+    """
+    Помечает SQL-запросы, выполненные внутри метода репозитория, его именем (Класс.метод).
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        token = current_origin.set(f"{type(self).__name__}.{method.__name__}")
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            current_origin.reset(token)
+    return wrapper
+
+
+@contextmanager
+def span(kind: str, **details: Any) -> Iterator[None]:
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(kind, started, time.perf_counter() - started, **details)
+
+
+def record(kind: str, started: float, elapsed: float, **details: Any) -> None:
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add(kind, started, elapsed, **details)
+
+
+def _explain(conn, statement: str, parameters) -> list[str]:
+    """
+    План запроса отдельным выполнением через то же соединение SQLAlchemy: курсор профилируемого запроса
+    не используется. В PostgreSQL ошибка прервала бы транзакцию запроса, поэтому EXPLAIN идёт в SAVEPOINT.
+    """
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    try:
+        with conn.begin_nested() if conn.dialect.name == "postgresql" else nullcontext():
+            result = conn.exec_driver_sql(prefix + statement, parameters, execution_options={"explain": True})
+            return [" ".join(str(column) for column in row) for row in result]
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+
+
+def instrument_engine(async_engine: AsyncEngine) -> None:
+    profiling_config = get_settings().profiling
+
+    # как и в metrics.instrument_engine, время начала хранится в контексте выполнения: упавший запрос
+    # не оставляет состояния в соединении пула
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.profile_started = time.perf_counter()
+
+    @event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "profile_started", None)
+        if started is None or context.execution_options.get("explain"):
+            return
+        elapsed = time.perf_counter() - started
+
+        profile = current_profile.get()
+        if profile is not None:
+            profile.add(
+                "sql", started, elapsed,
+                origin=current_origin.get(),
+                statement=statement,
+                # число строк, сообщённое драйвером; у SELECT его уточняет repository через counted()
+                rows=cursor.rowcount if cursor.rowcount >= 0 else None,
+            )
+
+        threshold = profiling_config.slow_query_ms
+        if threshold is not None and elapsed * 1000 >= threshold and not executemany:
+            plan = ""
+            if profiling_config.explain_slow_queries and statement.lstrip().lower().startswith("select"):
+                plan = "\nQUERY PLAN:\n" + "\n".join(_explain(conn, statement, parameters))
+            slow_query_logger.warning(
+                "Slow query (%.1f ms, origin=%s): %s; parameters=%r%s",
+                elapsed * 1000, current_origin.get(), statement, parameters, plan,
+            )
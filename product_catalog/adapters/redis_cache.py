@@ -1,36 +1,373 @@
 import json
-from typing import Optional, Any
-from redis.asyncio import Redis
-from product_catalog.config import settings
+import logging
+import time
+from typing import Iterable, Optional, Any
+from product_catalog.adapters.metrics import observe_cache
+from product_catalog.adapters.profiling import record
+from product_catalog.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+# теги кеша каталога: множество ключей страниц, зависящих от товара, свойства или названия
+NAME_TAG = "catalog:tag:name"
+
+
+def product_tag(product_uid: str) -> str:
+    return f"catalog:tag:product:{product_uid}"
+
+
+def property_tag(property_uid: str) -> str:
+    return f"catalog:tag:property:{property_uid}"
+
+
+# страницы с фильтрами, поиском или курсором по времени последнего обращения; сбрасывается инвалидацией
+# catalog:* вместе с самими страницами
+FILTERED_KEYS = "catalog:filtered"
+
+
+def page_tags_key(key: str) -> str:
+    # теги страницы, чтобы продлевать их вместе со страницей; в catalog:* - удаляется вместе со страницами
+    return f"{key}:tags"
+
+
+def stale_key(key: str) -> str:
+    # вне пространства catalog:*, чтобы инвалидация не удаляла копию, которая отдаётся при перегрузке
+    return f"stale:{key}"
+
+
+def stats_key(kind: str, window: int) -> str:
+    # счётчики по ключам за окно статистики (requests, misses, bytes), тоже вне catalog:* - переживают инвалидацию
+    return f"cache:stats:{kind}:{window}"
 
 
 class RedisCache:
     def __init__(self):
-        self.ttl = 3600
+        settings = get_settings()
+        self.config = settings.cache
+        self.ttl = self.config.ttl
+        self.stale_ttl = settings.limits.stale_ttl
+        # redis.asyncio импортируется при создании клиента (на старте воркера), а не при импорте приложения
+        from redis.asyncio import Redis
+        from redis.exceptions import ConnectionError, TimeoutError
+
+        # ошибки недоступного Redis: чтение и запись страниц каталога их не пробрасывают, запрос идёт в БД
+        self.unavailable_errors = (ConnectionError, TimeoutError)
+        self.failing = False
         try:
             self.client = Redis(
                 host=settings.redis.host,
                 port=settings.redis.port,
+                socket_connect_timeout=settings.redis.connect_timeout,
                 decode_responses=True
             )
         except Exception:
             self.client = None
 
+    def _unavailable(self, operation: str, started: float) -> None:
+        observe_cache(operation, time.perf_counter() - started, result="unavailable")
+        if not self.failing:
+            logger.warning("Redis is not available, catalog cache is bypassed until it comes back", exc_info=True)
+        self.failing = True
+
+    def _available(self) -> None:
+        if self.failing:
+            logger.warning("Redis is available again, catalog cache is enabled")
+        self.failing = False
+
+    def window(self) -> int:
+        return int(time.time() // self.config.stats_window)
+
     async def get(self, key: str) -> Optional[Any]:
+        """
+        Значение по ключу. Обращение учитывается в статистике ключа тем же запросом к Redis (pipeline);
+        страница, которая стала популярной (hot_requests обращений за окно), получает полный ttl.
+        Недоступный Redis - промах: страница читается из БД.
+        """
         if not self.client:
             return
-        cached_data = await self.client.get(key)
+        started = time.perf_counter()
+        requests_key = stats_key("requests", self.window())
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.zincrby(requests_key, 1, key)
+                pipe.expire(requests_key, 2 * self.config.stats_window)
+                # только для страниц, которые уже есть в FILTERED_KEYS
+                pipe.zadd(FILTERED_KEYS, {key: time.time()}, xx=True)
+                cached_data, requests, *_ = await pipe.execute()
+            if cached_data and requests == self.config.hot_requests and self.config.min_ttl < self.config.ttl:
+                await self.promote(key)
+        except self.unavailable_errors:
+            self._unavailable("get", started)
+            return None
+        self._available()
+        return self._loaded(key, cached_data, started)
+
+    async def promote(self, key: str) -> None:
+        """
+        Продлевает страницу до полного ttl вместе с её тегами: тег, истёкший раньше страницы, не нашёл бы её
+        при инвалидации. Любой тег истекает не позже чем через ttl от текущего момента, поэтому EXPIRE ttl
+        его не укорачивает.
+        """
+        tags = json.loads(await self.client.get(page_tags_key(key)) or "[]")
+        async with self.client.pipeline(transaction=False) as pipe:
+            for name in (key, page_tags_key(key), *tags):
+                pipe.expire(name, self.config.ttl)
+            await pipe.execute()
+
+    @staticmethod
+    def _loaded(key: str, cached_data: Optional[str], started: float) -> Optional[Any]:
+        elapsed = time.perf_counter() - started
+        observe_cache("get", elapsed, result="hit" if cached_data else "miss")
+        record("cache", started, elapsed, operation="get", key=key, hit=bool(cached_data))
         if cached_data:
             return json.loads(cached_data)
         return None
 
-    async def set(self, key: str, value: Any) -> None:
+    async def get_stale(self, key: str) -> Optional[Any]:
+        """
+        Последняя сохранённая версия значения, даже если ключ уже инвалидирован.
+        """
+        if not self.stale_ttl or not self.client:
+            return None
+        started = time.perf_counter()
+        try:
+            # без учёта в статистике ключей: копия читается только при перегрузке
+            cached_data = await self.client.get(stale_key(key))
+        except self.unavailable_errors:
+            self._unavailable("get", started)
+            return None
+        return self._loaded(stale_key(key), cached_data, started)
+
+    async def requests(self, key: str) -> float:
+        """
+        Обращения к ключу за текущее и предыдущее окна статистики.
+        """
+        window = self.window()
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.zscore(stats_key("requests", window), key)
+            pipe.zscore(stats_key("requests", window - 1), key)
+            scores = await pipe.execute()
+        return sum(score or 0 for score in scores)
+
+    def adaptive_ttl(self, requests: float) -> int:
+        """
+        TTL растёт линейно от min_ttl (одно обращение) до ttl (hot_requests обращений и больше): редкие
+        комбинации фильтров быстро освобождают память, популярные страницы не истекают зря.
+        """
+        config = self.config
+        if requests >= config.hot_requests or config.hot_requests <= 1 or config.min_ttl >= config.ttl:
+            return config.ttl
+        share = max(requests - 1, 0) / (config.hot_requests - 1)
+        return int(config.min_ttl + (config.ttl - config.min_ttl) * share)
+
+    async def set(self, key: str, value: Any, tags: Iterable[str] = (), capped: bool = False) -> None:
+        """
+        capped - ключ из неограниченного множества (фильтры, поиск, курсор): таких ключей хранится не больше
+        max_filtered_keys, при превышении удаляются те, к которым дольше всего не обращались.
+        Недоступный Redis - страница не сохраняется.
+        """
         if not self.client:
             return
         serialized_value = json.dumps(value)
-        await self.client.setex(key, self.ttl, serialized_value)
+        started = time.perf_counter()
+        try:
+            ttl = await self._store(key, serialized_value, tags, capped)
+        except self.unavailable_errors:
+            self._unavailable("set", started)
+            return
+        elapsed = time.perf_counter() - started
+        observe_cache("set", elapsed)
+        record("cache", started, elapsed, operation="set", key=key, bytes=len(serialized_value), ttl=ttl)
+
+    async def _store(self, key: str, serialized_value: str, tags: Iterable[str], capped: bool) -> int:
+        requests = await self.requests(key)
+        ttl = self.adaptive_ttl(requests)
+        window = self.window()
+        capped = capped and self.config.max_filtered_keys > 0
+        tags = sorted(set(tags))
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.setex(key, ttl, serialized_value)
+            pipe.setex(page_tags_key(key), ttl, json.dumps(tags))
+            if self.stale_ttl:
+                pipe.setex(stale_key(key), self.stale_ttl, serialized_value)
+            for tag in tags:
+                pipe.sadd(tag, key)
+                pipe.expire(tag, self.ttl)
+            pipe.zincrby(stats_key("misses", window), 1, key)
+            pipe.zadd(stats_key("bytes", window), {key: len(serialized_value)})
+            pipe.expire(stats_key("misses", window), 2 * self.config.stats_window)
+            pipe.expire(stats_key("bytes", window), 2 * self.config.stats_window)
+            if capped:
+                pipe.zadd(FILTERED_KEYS, {key: time.time()})
+                pipe.zcard(FILTERED_KEYS)
+            results = await pipe.execute()
+        if capped and results[-1] > self.config.max_filtered_keys:
+            await self.evict(results[-1] - self.config.max_filtered_keys)
+        return ttl
+
+    async def evict(self, count: int) -> int:
+        """
+        Удаляет count страниц из FILTERED_KEYS, к которым дольше всего не обращались. Истёкшие страницы
+        остаются в FILTERED_KEYS до вытеснения и, не получая обращений, вытесняются первыми.
+        """
+        started = time.perf_counter()
+        keys = [key for key, _ in await self.client.zpopmin(FILTERED_KEYS, count)]
+        evicted = 0
+        if keys:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.unlink(*keys)
+                pipe.unlink(*map(page_tags_key, keys))
+                evicted, _ = await pipe.execute()
+        observe_cache("evict", time.perf_counter() - started)
+        return evicted
+
+    async def key_stats(self, limit: int = 20) -> Optional[dict[str, Any]]:
+        """
+        Ключи с наибольшей долей попаданий и наибольшего размера за текущее и предыдущее окна статистики.
+        Попадания - обращения минус промахи (записи после промаха), поэтому оценка приблизительная.
+        Недоступный Redis - None.
+        """
+        if not self.client:
+            return None
+        started = time.perf_counter()
+        try:
+            stats = await self._key_stats(limit)
+        except self.unavailable_errors:
+            self._unavailable("key_stats", started)
+            return None
+        self._available()
+        return stats
+
+    async def _key_stats(self, limit: int) -> dict[str, Any]:
+        window = self.window()
+        windows = (window, window - 1)
+        async with self.client.pipeline(transaction=False) as pipe:
+            for kind, aggregate in (("requests", "SUM"), ("bytes", "MAX")):
+                pipe.zunionstore(
+                    stats_key(f"top_{kind}", window), [stats_key(kind, w) for w in windows], aggregate=aggregate
+                )
+                pipe.expire(stats_key(f"top_{kind}", window), 60)
+            # кандидаты по доле попаданий - самые запрашиваемые ключи с запасом: у редкого ключа доля
+            # не показательна (первое обращение всегда промах)
+            pipe.zrevrange(stats_key("top_requests", window), 0, 2 * limit - 1)
+            pipe.zrevrange(stats_key("top_bytes", window), 0, limit - 1)
+            pipe.zcard(FILTERED_KEYS)
+            *_, by_requests, by_bytes, filtered_keys = await pipe.execute()
+
+        keys = list(dict.fromkeys(by_requests + by_bytes))
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                for kind in ("requests", "misses", "bytes"):
+                    for w in windows:
+                        pipe.zscore(stats_key(kind, w), key)
+                pipe.ttl(key)
+            results = await pipe.execute()
+
+        entries = {}
+        for index, key in enumerate(keys):
+            requests, previous_requests, misses, previous_misses, size, previous_size, ttl = (
+                results[index * 7:(index + 1) * 7]
+            )
+            requests = (requests or 0) + (previous_requests or 0)
+            hits = max(requests - (misses or 0) - (previous_misses or 0), 0)
+            entries[key] = {
+                "key": key,
+                "requests": int(requests),
+                "hits": int(hits),
+                "hit_ratio": round(hits / requests, 3) if requests else 0.0,
+                "bytes": int(max(size or 0, previous_size or 0)),
+                "ttl": ttl if ttl >= 0 else None,  # None - страница уже истекла или удалена
+            }
+        return {
+            "window_seconds": self.config.stats_window,
+            "filtered_keys": filtered_keys,
+            "max_filtered_keys": self.config.max_filtered_keys,
+            "by_hits": sorted(
+                (entries[key] for key in by_requests), key=lambda entry: (-entry["hit_ratio"], -entry["hits"])
+            )[:limit],
+            "by_bytes": [entries[key] for key in by_bytes],
+        }
 
     async def delete(self, key: str) -> None:
         if not self.client:
             return
+        started = time.perf_counter()
         await self.client.delete(key)
+        elapsed = time.perf_counter() - started
+        observe_cache("delete", elapsed)
+        record("cache", started, elapsed, operation="delete", key=key)
+
+    async def delete_pattern(self, pattern: str, chunk_size: int = 500) -> int:
+        """
+        Удаляет ключи по шаблону через SCAN + UNLINK пачками, не блокируя Redis, в отличие от KEYS.
+        """
+        if not self.client:
+            return 0
+        started = time.perf_counter()
+        deleted = 0
+        chunk = []
+        async for key in self.client.scan_iter(match=pattern, count=chunk_size):
+            chunk.append(key)
+            if len(chunk) >= chunk_size:
+                deleted += await self.client.unlink(*chunk)
+                chunk = []
+        if chunk:
+            deleted += await self.client.unlink(*chunk)
+        elapsed = time.perf_counter() - started
+        observe_cache("delete_pattern", elapsed)
+        record("cache", started, elapsed, operation="delete_pattern", key=pattern, deleted=deleted)
+        return deleted
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Удаляет ключи, помеченные любым из тегов, вместе с самими тегами.
+        """
+        tags = list(set(tags))
+        if not self.client or not tags:
+            return 0
+        started = time.perf_counter()
+        keys = await self.client.sunion(tags)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.unlink(*keys, *tags)
+            if keys:
+                pipe.unlink(*map(page_tags_key, keys))
+                # удалённые страницы не должны занимать места в ограничении max_filtered_keys
+                pipe.zrem(FILTERED_KEYS, *keys)
+            deleted, *_ = await pipe.execute()
+        elapsed = time.perf_counter() - started
+        observe_cache("invalidate_tags", elapsed)
+        record("cache", started, elapsed, operation="invalidate_tags", key=",".join(tags), deleted=deleted)
+        return deleted
+
+    async def publish_events(self, stream: str, events: list[dict[str, str]], maxlen: int) -> None:
+        if not self.client or not events:
+            return
+        started = time.perf_counter()
+        async with self.client.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.xadd(stream, event, maxlen=maxlen, approximate=True)
+            await pipe.execute()
+        observe_cache("publish_events", time.perf_counter() - started)
+
+    async def publish(self, channel: str, message: str) -> None:
+        if not self.client:
+            return
+        await self.client.publish(channel, message)
+
+    async def ping(self) -> bool:
+        if not self.client:
+            return False
+        try:
+            available = await self.client.ping()
+        except Exception:
+            available = False
+        # предупреждение о недоступности уже выводится проверкой при старте
+        self.failing = not available
+        return available
+
+    async def close(self) -> None:
+        if not self.client:
+            return
+        await self.client.aclose()
@@ -1,169 +1,296 @@
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, delete
-from sqlalchemy.orm import joinedload
-from typing import Any, Optional
-
-from product_catalog.domain.dto import ProductCreate, PropertyCreate
-from product_catalog.domain.models import Product, ProductProperty, Property, PropertyType, PropertyValue
+import uuid
+from datetime import timedelta
 
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import ColumnElement, ColumnOperators, Select, and_, select, func, delete, update, or_, tuple_
+from sqlalchemy.orm import aliased, joinedload
+from typing import Any, Callable, Optional
+
+from product_catalog.adapters.metadata import PropertyMetadataCache
+from product_catalog.adapters.profiling import counted, traced
+from product_catalog.domain.dto import (
+    ProductCreate, ProductPropertyCreate, ProductUpdate, PropertyCreate, PropertyValueCreate
+)
+from product_catalog.domain.exceptions import NotFoundError, VersionConflictError
+from product_catalog.domain.sorting import SortKey, parse_sort
+from product_catalog.domain.models import (
+    CatalogEvent, Product, ProductProperty, Property, PropertyType, PropertyValue, utc_now
+)
+
+
+DELETE_CHUNK_SIZE = 500
+
+
+def apply_product_filters(
+    query: Select,
+    name: Optional[str] = None,
+    property_filters: Optional[dict[str, list[str] | dict[str, int]]] = None,
+    in_values: Callable[[Any, list], ColumnElement[bool]] = ColumnOperators.in_
+) -> Select:
+    if name:
+        query = query.where(Product.name.ilike(f"%{name}%"))
+
+    if property_filters:
+        for prop_uid, values in property_filters.items():
+            subquery = (
+                select(ProductProperty.product_uid)
+                .where(ProductProperty.property_uid == prop_uid)
+            )
+            if isinstance(values, list):
+                subquery = subquery.where(in_values(ProductProperty.value_uid, values))
+            elif isinstance(values, dict):
+                # диапазон без известных границ выбрал бы все товары со свойством
+                if not values or values.keys() - {"from", "to"}:
+                    raise ValueError(f"Invalid range filter for property {prop_uid}")
+                if "from" in values:
+                    subquery = subquery.where(ProductProperty.int_value >= values["from"])
+                if "to" in values:
+                    subquery = subquery.where(ProductProperty.int_value <= values["to"])
+            query = query.where(Product.uid.in_(subquery))
+    return query
+
+
+SortColumn = tuple[ColumnElement, bool, bool]  # выражение, по убыванию, может быть NULL
+
+
+def keyset_condition(columns: list[SortColumn], values: list[Any]) -> ColumnElement[bool]:
+    """
+    Условие "строка после курсора" для составного ключа: (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+    с учётом направления каждого ключа. NULL (товар без значения свойства) идёт после любых значений,
+    поэтому после NULL в курсоре подходят только строки с тем же NULL.
+    """
+    directions = {descending for _, descending, _ in columns}
+    if len(directions) == 1 and not any(nullable for _, _, nullable in columns):
+        # сравнение кортежей (k1, k2) > (v1, v2) планировщик выполняет диапазоном по составному индексу
+        row, cursor_row = tuple_(*(column for column, _, _ in columns)), tuple_(*values)
+        return row < cursor_row if directions.pop() else row > cursor_row
+
+    branches, equal = [], []
+    for (column, descending, nullable), value in zip(columns, values):
+        if value is None:
+            equal.append(column.is_(None))
+            continue
+        after = column < value if descending else column > value
+        if nullable:
+            after = or_(after, column.is_(None))
+        branches.append(and_(*equal, after))
+        equal.append(column == value)
+    return or_(*branches)
+
+
+def check_cursor_values(columns: list[SortColumn], values: list[Any]) -> None:
+    """
+    Значения курсора попадают в параметры запроса, поэтому их тип должен совпадать с типом столбца сортировки:
+    курсор по числовому свойству со строкой в PostgreSQL иначе дал бы ошибку драйвера вместо 400.
+    """
+    for (column, _, nullable), value in zip(columns, values):
+        if value is None and nullable:
+            continue
+        if type(value) is not column.type.python_type:
+            raise ValueError("Invalid cursor")
+
+
+def chunked(items: list[str], size: int = DELETE_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class BaseRepository:
+    """
+    Приёмы, зависящие от диалекта БД. SQLite ограничивает число параметров запроса, поэтому
+    списки uid передаются в IN пачками по chunk_size; PostgreSQL-репозитории переопределяют оба метода.
+    """
+    chunk_size = DELETE_CHUNK_SIZE
 
-class CatalogRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @staticmethod
+    def in_values(column, values: list) -> ColumnElement[bool]:
+        return column.in_(values)
+
+    def chunked(self, items: list[str]):
+        return chunked(items, self.chunk_size)
+
+
+def product_load_options(metadata: Optional[PropertyMetadataCache]) -> list:
+    # с кешем метаданных названия свойств и значений берутся из него, и JOIN к properties/property_values не нужен
+    if metadata:
+        return [joinedload(Product.properties)]
+    return [
+        joinedload(Product.properties).joinedload(ProductProperty.property),
+        joinedload(Product.properties).joinedload(ProductProperty.value),
+    ]
+
+
+class CatalogRepository(BaseRepository):
+    def __init__(self, db: AsyncSession, metadata: Optional[PropertyMetadataCache] = None):
+        super().__init__(db)
+        self.metadata = metadata
+
+    @traced
     async def get_all(
         self,
         page: int = 1,
         page_size: int = 10,
         name: Optional[str] = None,
         sort: Optional[str] = "uid",
-        property_filters: Optional[dict[str, list[str] | dict[str, int]]] = None
-    ) -> tuple[list[Product], int]:
-        query = (
-            select(Product)
-            .options(joinedload(Product.properties).joinedload(ProductProperty.property))
-            .options(joinedload(Product.properties).joinedload(ProductProperty.value))
-        )
-
-        if name:
-            query = query.where(Product.name.ilike(f"%{name}%"))
-
-        if property_filters:
-            for prop_uid, values in property_filters.items():
-                subquery = (
-                    select(ProductProperty.product_uid)
-                    .where(ProductProperty.property_uid == prop_uid)
-                )
-                if isinstance(values, list):
-                    subquery = subquery.where(ProductProperty.value_uid.in_(values))
-                elif isinstance(values, dict):
-                    if "from" in values:
-                        subquery = subquery.where(ProductProperty.int_value >= values["from"])
-                    if "to" in values:
-                        subquery = subquery.where(ProductProperty.int_value <= values["to"])
-                query = query.where(Product.uid.in_(subquery))
-
-        if sort == "name":
-            query = query.order_by(Product.name.asc())
-        else:
-            query = query.order_by(Product.uid.asc())
+        property_filters: Optional[dict[str, list[str] | dict[str, int]]] = None,
+        after: Optional[list[Any]] = None
+    ) -> tuple[list[Product], int, Optional[list[Any]]]:
+        """
+        Страница товаров, общее количество и значения ключей сортировки последнего товара, если дальше
+        есть ещё товары. after - такие значения с предыдущей страницы (keyset-пагинация): следующая страница
+        читается условием по ключам вместо OFFSET, и её стоимость не растёт с номером страницы.
+        """
+        query = select(Product).options(*product_load_options(self.metadata))
+
+        query = apply_product_filters(query, name, property_filters, self.in_values)
 
         count_query = select(func.count()).select_from(query.subquery())
-        total_count = (await self.db.execute(count_query)).scalar()
-
-        offset = (page - 1) * page_size
-        query = query.offset(offset).limit(page_size)
-
-        result = await self.db.execute(query)
-        products = result.unique().scalars().all()
-
-        return products, total_count
+        [total_count] = counted((await self.db.execute(count_query)).scalars().all())
 
+        query, columns = await self._apply_sort(query, parse_sort(sort))
+        if after is not None:
+            check_cursor_values(columns, after)
+            query = query.where(keyset_condition(columns, after))
+        else:
+            query = query.offset((page - 1) * page_size)
+        query = query.add_columns(*(column for column, _, _ in columns)).limit(page_size + 1)
+
+        rows = counted((await self.db.execute(query)).unique().all())
+        products = [row[0] for row in rows[:page_size]]
+        next_values = list(rows[page_size - 1][1:]) if len(rows) > page_size else None
+
+        return products, total_count, next_values
+
+    async def _apply_sort(self, query: Select, keys: tuple[SortKey, ...]) -> tuple[Select, list[SortColumn]]:
+        """
+        Добавляет ORDER BY по ключам. Значение свойства присоединяется LEFT JOIN по индексу
+        (product_uid, property_uid); товары без значения идут последними при любом направлении.
+        """
+        property_uids = [key.property_uid for key in keys if key.property_uid]
+        types = await self._property_types(property_uids) if property_uids else {}
+
+        columns: list[SortColumn] = []
+        for key in keys:
+            if key.field == "uid":
+                columns.append((Product.uid, key.descending, False))
+            elif key.field == "name":
+                columns.append((Product.name, key.descending, False))
+            elif key.property_uid not in types:
+                raise ValueError(f"Property '{key.property_uid}' not found")
+            else:
+                sort_property = aliased(ProductProperty)
+                query = query.outerjoin(sort_property, and_(
+                    sort_property.product_uid == Product.uid,
+                    sort_property.property_uid == key.property_uid
+                ))
+                if types[key.property_uid] == PropertyType.INT:
+                    column = sort_property.int_value
+                else:
+                    sort_value = aliased(PropertyValue)
+                    query = query.outerjoin(sort_value, sort_value.uid == sort_property.value_uid)
+                    column = sort_value.value
+                columns.append((column, key.descending, True))
+
+        for column, descending, nullable in columns:
+            order = column.desc() if descending else column.asc()
+            query = query.order_by(order.nulls_last() if nullable else order)
+        return query, columns
+
+    async def _property_types(self, property_uids: list[str]) -> dict[str, PropertyType]:
+        if self.metadata:
+            snapshot = await self.metadata.ensure(property_uids)
+            return {uid: snapshot.properties[uid].type for uid in property_uids if uid in snapshot.properties}
+        result = await self.db.execute(select(Property.uid, Property.type).where(Property.uid.in_(property_uids)))
+        return dict(counted(result.tuples().all()))
+
+    @traced
     async def get_filter_stats(
         self,
         name: Optional[str] = None,
         property_filters: Optional[dict[str, list[str] | dict[str, int]]] = None
     ) -> dict[str, Any]:
 
-        base_query = select(Product.uid)
-        if name:
-            base_query = base_query.where(Product.name.ilike(f"%{name}%"))
-
-        if property_filters:
-            for prop_uid, filter_data in property_filters.items():
-                subquery = (
-                    select(ProductProperty.product_uid)
-                    .where(ProductProperty.property_uid == prop_uid)
-                )
-                if isinstance(filter_data, list):
-                    subquery = subquery.where(ProductProperty.value_uid.in_(filter_data))
-                elif isinstance(filter_data, dict):
-                    if "from" in filter_data:
-                        subquery = subquery.where(ProductProperty.int_value >= filter_data["from"])
-                    if "to" in filter_data:
-                        subquery = subquery.where(ProductProperty.int_value <= filter_data["to"])
-                base_query = base_query.where(Product.uid.in_(subquery))
+        base_query = apply_product_filters(select(Product.uid), name, property_filters, self.in_values)
 
         count_query = select(func.count()).select_from(base_query.subquery())
-        total_count = (await self.db.execute(count_query)).scalar()
+        [total_count] = counted((await self.db.execute(count_query)).scalars().all())
 
         stats = {"count": total_count}
 
-        prop_query = select(Property).where(Property.type == PropertyType.LIST)
-        list_properties = (await self.db.execute(prop_query)).scalars().all()
-        for prop in list_properties:
-            value_counts = {}
-            value_query = (
-                select(ProductProperty.value_uid, func.count(ProductProperty.id))
-                .join(Product, ProductProperty.product_uid == Product.uid)
-                .where(ProductProperty.property_uid == prop.uid)
-                .where(Product.uid.in_(base_query.subquery()))
-                .group_by(ProductProperty.value_uid)
-            )
-            result = await self.db.execute(value_query)
-            for value_uid, count in result:
-                if value_uid:
-                    value_counts[value_uid] = count
-            if value_counts:
-                stats[prop.uid] = value_counts
-
-        int_prop_query = select(Property).where(Property.type == PropertyType.INT)
-        int_properties = (await self.db.execute(int_prop_query)).scalars().all()
-        for prop in int_properties:
-            int_stats = {}
-            min_max_query = (
-                select(func.min(ProductProperty.int_value), func.max(ProductProperty.int_value))
-                .join(Product, ProductProperty.product_uid == Product.uid)
-                .where(ProductProperty.property_uid == prop.uid)
-                .where(Product.uid.in_(base_query.subquery()))
-            )
-            result = await self.db.execute(min_max_query)
-            min_val, max_val = result.one()
-            if min_val is not None and max_val is not None:
-                int_stats["min_value"] = min_val
-                int_stats["max_value"] = max_val
-                stats[prop.uid] = int_stats
+        if self.metadata:
+            snapshot = self.metadata.snapshot
+            list_properties, int_properties = snapshot.list_properties, snapshot.int_properties
+        else:
+            result = await self.db.execute(select(Property.uid, Property.type))
+            types = dict(counted(result.tuples().all()))
+            list_properties = [uid for uid, prop_type in types.items() if prop_type == PropertyType.LIST]
+            int_properties = [uid for uid, prop_type in types.items() if prop_type == PropertyType.INT]
+
+        value_counts: dict[str, dict[str, int]] = {}
+        int_ranges: dict[str, tuple[int, int]] = {}
+        for prop_uid, value_uid, count, min_val, max_val in await self._facet_rows(base_query):
+            if value_uid:
+                value_counts.setdefault(prop_uid, {})[value_uid] = count
+            elif min_val is not None and max_val is not None:
+                int_ranges[prop_uid] = (min_val, max_val)
+
+        for prop_uid in list_properties:
+            if prop_uid in value_counts:
+                stats[prop_uid] = value_counts[prop_uid]
+        for prop_uid in int_properties:
+            if prop_uid in int_ranges:
+                min_val, max_val = int_ranges[prop_uid]
+                stats[prop_uid] = {"min_value": min_val, "max_value": max_val}
 
         return stats
 
+    async def _facet_rows(self, base_query: Select) -> list[tuple]:
+        """
+        Строки (property_uid, value_uid, count, min, max) за один проход по product_properties вместо запроса
+        на каждое свойство: у списочных свойств группы по value_uid дают количество товаров,
+        у числовых value_uid пустой и группа даёт min/max.
+        """
+        facet_query = (
+            select(
+                ProductProperty.property_uid,
+                ProductProperty.value_uid,
+                func.count(ProductProperty.id),
+                func.min(ProductProperty.int_value),
+                func.max(ProductProperty.int_value),
+            )
+            .where(ProductProperty.product_uid.in_(base_query))
+            .group_by(ProductProperty.property_uid, ProductProperty.value_uid)
+        )
+        return counted((await self.db.execute(facet_query)).tuples().all())
 
-class ProductRepository:
-    def __init__(self, db: AsyncSession):
-        self.db = db
 
+class ProductRepository(BaseRepository):
+    def __init__(self, db: AsyncSession, metadata: Optional[PropertyMetadataCache] = None):
+        super().__init__(db)
+        self.metadata = metadata
+
+    @traced
     async def get(self, product_uid: str) -> Product:
         result = await self.db.execute(
             select(Product)
-            .options(joinedload(Product.properties).joinedload(ProductProperty.property))
-            .options(joinedload(Product.properties).joinedload(ProductProperty.value))
+            .options(*product_load_options(self.metadata))
             .where(Product.uid == product_uid)
         )
-        product = result.scalars().first()
-        if not product:
+        products = counted(result.unique().scalars().all())
+        if not products:
             raise ValueError(f"Product with UID '{product_uid}' not found")
-        return product
+        return products[0]
 
+    @traced
     async def add(self, product_data: ProductCreate) -> Product:
         existing_product = await self.db.get(Product, product_data.uid)
         if existing_product:
             raise ValueError(f"Product with UID '{product_data.uid}' already exists")
 
-        for prop in product_data.properties:
-            prop_exists = await self.db.get(Property, prop.uid)
-            if not prop_exists:
-                raise ValueError(f"Property with UID '{prop.uid}' does not exist")
-
-            if prop_exists.type == PropertyType.LIST:
-                if prop.value_uid is None:
-                    raise ValueError(f"List-type property '{prop.uid}' requires a value_uid")
-                value_exists = await self.db.get(PropertyValue, prop.value_uid)
-                if not value_exists or value_exists.property_uid != prop.uid:
-                    raise ValueError(f"Value UID '{prop.value_uid}' does not exist for property {prop.uid}")
-            elif prop_exists.type == PropertyType.INT:
-                if prop.value is None:
-                    raise ValueError(f"Int-type property '{prop.uid}' requires a value")
-                if prop.value_uid is not None:
-                    raise ValueError(f"Int-type property '{prop.uid}' should not have a value_uid")
+        await self._validate_properties(product_data.properties)
 
         product = Product(uid=product_data.uid, name=product_data.name)
         self.db.add(product)
@@ -177,12 +304,16 @@ class ProductRepository:
             )
             self.db.add(product_prop)
 
+        OutboxRepository(self.db).add(
+            "product.created",
+            product_data.uid,
+            {"properties": [prop.uid for prop in product_data.properties]}
+        )
         await self.db.commit()
 
         result = await self.db.execute(
             select(Product)
-            .options(joinedload(Product.properties).joinedload(ProductProperty.property))
-            .options(joinedload(Product.properties).joinedload(ProductProperty.value))
+            .options(*product_load_options(self.metadata))
             .where(Product.uid == product_data.uid)
         )
         product = result.scalars().first()
@@ -190,20 +321,192 @@ class ProductRepository:
             raise ValueError(f"Product '{product_data.uid}' not found after commit")
         return product
 
+    @traced
+    async def update(self, product_uid: str, product_data: ProductUpdate) -> Product:
+        """
+        Частичное обновление товара: свойства из properties добавляются или заменяются, из remove_properties
+        удаляются, остальные не затрагиваются. Выполняются только запросы для реально изменившихся строк;
+        версия товара проверяется условным UPDATE, поэтому конкурентное изменение не будет потеряно.
+        """
+        product = await self.db.get(Product, product_uid)
+        if not product:
+            raise NotFoundError(f"Product with UID '{product_uid}' not found")
+        if product.version != product_data.version:
+            raise VersionConflictError(product_uid, product_data.version, product.version)
+
+        upserts = {prop.uid: prop for prop in product_data.properties or []}
+        if len(upserts) != len(product_data.properties or []):
+            raise ValueError("Property UIDs must be unique")
+        removals = set(product_data.remove_properties or [])
+        if removals & upserts.keys():
+            raise ValueError(f"Properties {sorted(removals & upserts.keys())} are both updated and removed")
+        await self._validate_properties(list(upserts.values()))
+
+        result = await self.db.execute(select(ProductProperty).where(ProductProperty.product_uid == product_uid))
+        current = {row.property_uid: row for row in result.scalars()}
+        missing = removals - current.keys()
+        if missing:
+            raise ValueError(f"Product '{product_uid}' has no properties {sorted(missing)}")
+
+        inserts, updates = [], []
+        for prop_uid, prop in upserts.items():
+            row = current.get(prop_uid)
+            if row is None:
+                inserts.append(prop)
+            elif (row.value_uid, row.int_value) != (prop.value_uid, prop.value):
+                updates.append((row, prop))
+        name_changed = product_data.name is not None and product_data.name != product.name
+        if not inserts and not updates and not removals and not name_changed:
+            return await self._reload(product_uid)
+
+        values = {"version": Product.version + 1}
+        if name_changed:
+            values["name"] = product_data.name
+        result = await self.db.execute(
+            update(Product)
+            .where(Product.uid == product_uid, Product.version == product_data.version)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            await self.db.rollback()
+            actual = (await self.db.execute(select(Product.version).where(Product.uid == product_uid))).scalar()
+            if actual is None:
+                raise NotFoundError(f"Product with UID '{product_uid}' not found")
+            raise VersionConflictError(product_uid, product_data.version, actual)
+
+        for row, prop in updates:
+            row.value_uid = prop.value_uid
+            row.int_value = prop.value
+        self.db.add_all(
+            ProductProperty(
+                product_uid=product_uid,
+                property_uid=prop.uid,
+                value_uid=prop.value_uid,
+                int_value=prop.value
+            )
+            for prop in inserts
+        )
+        if removals:
+            await self.db.execute(
+                delete(ProductProperty)
+                .where(ProductProperty.product_uid == product_uid)
+                .where(self.in_values(ProductProperty.property_uid, list(removals)))
+            )
+
+        changed_properties = sorted({prop.uid for prop in inserts} | {prop.uid for _, prop in updates} | removals)
+        OutboxRepository(self.db).add(
+            "product.updated",
+            product_uid,
+            {"properties": changed_properties, "name_changed": name_changed, "version": product_data.version + 1}
+        )
+        await self.db.commit()
+        return await self._reload(product_uid)
+
+    async def _reload(self, product_uid: str) -> Product:
+        result = await self.db.execute(
+            select(Product)
+            .options(*product_load_options(self.metadata))
+            .where(Product.uid == product_uid)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
+    async def _validate_properties(self, properties: list[ProductPropertyCreate]) -> None:
+        """
+        Проверяет свойства и значения двумя IN-запросами вместо запроса на каждое свойство. Проверка идёт в
+        транзакции записи, а не по кешу метаданных: снимок воркера может ещё не знать о свойстве, созданном
+        в другом воркере (ложный 400), или ещё содержать удалённое (запись упала бы на внешнем ключе).
+        """
+        known_properties = {}
+        for uids_chunk in self.chunked(list({prop.uid for prop in properties})):
+            result = await self.db.execute(select(Property).where(self.in_values(Property.uid, uids_chunk)))
+            known_properties.update((prop.uid, prop) for prop in result.scalars())
+        value_owners = {}
+        for uids_chunk in self.chunked(list({prop.value_uid for prop in properties if prop.value_uid is not None})):
+            result = await self.db.execute(
+                select(PropertyValue.uid, PropertyValue.property_uid)
+                .where(self.in_values(PropertyValue.uid, uids_chunk))
+            )
+            value_owners.update(result.tuples().all())
+        self._check_properties(properties, known_properties, value_owners)
+
+    @staticmethod
+    def _check_properties(
+        properties: list[ProductPropertyCreate],
+        known_properties: dict[str, Any],
+        value_owners: dict[str, str]
+    ) -> None:
+        for prop in properties:
+            prop_exists = known_properties.get(prop.uid)
+            if not prop_exists:
+                raise ValueError(f"Property with UID '{prop.uid}' does not exist")
+
+            if prop_exists.type == PropertyType.LIST:
+                if prop.value_uid is None:
+                    raise ValueError(f"List-type property '{prop.uid}' requires a value_uid")
+                if value_owners.get(prop.value_uid) != prop.uid:
+                    raise ValueError(f"Value UID '{prop.value_uid}' does not exist for property {prop.uid}")
+            elif prop_exists.type == PropertyType.INT:
+                if prop.value is None:
+                    raise ValueError(f"Int-type property '{prop.uid}' requires a value")
+                if prop.value_uid is not None:
+                    raise ValueError(f"Int-type property '{prop.uid}' should not have a value_uid")
+
+    @traced
     async def delete(self, product_uid: str) -> None:
         product = await self.db.get(Product, product_uid)
         if not product:
             raise ValueError(f"Product with UID '{product_uid}' not found")
 
-        await self.db.execute(delete(Product).where(Product.uid == product_uid))
+        await self._delete([product_uid])
+        OutboxRepository(self.db).add("product.deleted", product_uid)
         await self.db.commit()
 
+    @traced
+    async def delete_many(
+        self,
+        uids: Optional[list[str]] = None,
+        name: Optional[str] = None,
+        property_filters: Optional[dict[str, list[str] | dict[str, int]]] = None
+    ) -> list[str]:
+        """
+        Удаляет товары по списку uid и/или фильтрам каталога одной транзакцией с одним событием.
+        """
+        if not uids and not name and not property_filters:
+            raise ValueError("Bulk delete requires uids, name or property_filters")
+
+        query = apply_product_filters(select(Product.uid), name, property_filters, self.in_values)
+        matched = []
+        if uids:
+            for uids_chunk in self.chunked(list(dict.fromkeys(uids))):
+                result = await self.db.execute(query.where(self.in_values(Product.uid, uids_chunk)))
+                matched.extend(result.scalars().all())
+        else:
+            matched = list((await self.db.execute(query)).scalars().all())
 
-class PropertyRepository:
+        if not matched:
+            return []
+
+        await self._delete(matched)
+        OutboxRepository(self.db).add("products.deleted", matched[0], {"uids": matched})
+        await self.db.commit()
+        return matched
+
+    async def _delete(self, product_uids: list[str]) -> None:
+        for uids_chunk in self.chunked(product_uids):
+            await self.db.execute(
+                delete(ProductProperty).where(self.in_values(ProductProperty.product_uid, uids_chunk))
+            )
+            await self.db.execute(delete(Product).where(self.in_values(Product.uid, uids_chunk)))
+
+
+class PropertyRepository(BaseRepository):
     def __init__(self, db: AsyncSession):
-        self.db = db
+        super().__init__(db)
         self.property_types = [member.value for member in PropertyType]
 
+    @traced
     async def add(self, property_data: PropertyCreate) -> Property:
         if property_data.type not in self.property_types:
             raise ValueError(f"Invalid property type: '{property_data.type}'. Must be 'list' or 'int'")
@@ -212,10 +515,10 @@ class PropertyRepository:
         if existing_prop:
             raise ValueError(f"Property with UID {property_data.uid} already exists")
 
-        if property_data.type == PropertyType.LIST:
+        if property_data.type == PropertyType.LIST.value:
             if not property_data.values or len(property_data.values) == 0:
                 raise ValueError("List-type property requires at least one value")
-        elif property_data.type == PropertyType.INT and property_data.values:
+        elif property_data.type == PropertyType.INT.value and property_data.values:
             raise ValueError("Int-type property should not have values")
 
         property = Property(
@@ -225,18 +528,10 @@ class PropertyRepository:
         )
         self.db.add(property)
 
-        if property_data.type == PropertyType.LIST:
-            for value_data in property_data.values:
-                existing_value = await self.db.get(PropertyValue, value_data.value_uid)
-                if existing_value:
-                    raise ValueError(f"Value UID '{value_data.value_uid}' already exists")
-                value = PropertyValue(
-                    uid=value_data.value_uid,
-                    value=value_data.value,
-                    property_uid=property_data.uid
-                )
-                self.db.add(value)
+        if property_data.type == PropertyType.LIST.value:
+            await self._add_values(property_data.uid, property_data.values)
 
+        OutboxRepository(self.db).add("property.created", property_data.uid, {"type": property_data.type})
         await self.db.commit()
 
         result = await self.db.execute(
@@ -245,9 +540,150 @@ class PropertyRepository:
         property = result.scalars().first()
         return property
 
+    @traced
     async def delete(self, property_uid: str) -> None:
         property = await self.db.get(Property, property_uid)
         if not property:
             raise ValueError(f"Property with UID '{property_uid}' not found")
-        await self.db.execute(delete(Property).where(Property.uid == property_uid))
-        await self.db.commit()
\ No newline at end of file
+        await self._delete([property_uid])
+        OutboxRepository(self.db).add("property.deleted", property_uid)
+        await self.db.commit()
+
+    @traced
+    async def delete_many(self, property_uids: list[str]) -> list[str]:
+        if not property_uids:
+            raise ValueError("Bulk delete requires at least one property UID")
+        property_uids = list(dict.fromkeys(property_uids))
+        existing = []
+        for uids_chunk in self.chunked(property_uids):
+            result = await self.db.execute(select(Property.uid).where(self.in_values(Property.uid, uids_chunk)))
+            existing.extend(result.scalars())
+        missing = set(property_uids) - set(existing)
+        if missing:
+            raise ValueError(f"Properties with UIDs {sorted(missing)} not found")
+
+        await self._delete(property_uids)
+        OutboxRepository(self.db).add("properties.deleted", property_uids[0], {"uids": property_uids})
+        await self.db.commit()
+        return property_uids
+
+    @traced
+    async def add_values(self, property_uid: str, values: list[PropertyValueCreate]) -> Property:
+        property = await self.db.get(Property, property_uid)
+        if not property:
+            raise ValueError(f"Property with UID '{property_uid}' not found")
+        if property.type != PropertyType.LIST:
+            raise ValueError(f"Values can only be added to list-type property, '{property_uid}' is '{property.type.value}'")
+        if not values:
+            raise ValueError("At least one value is required")
+
+        await self._add_values(property_uid, values)
+        OutboxRepository(self.db).add(
+            "property.values_added", property_uid, {"values": [value.value_uid for value in values]}
+        )
+        await self.db.commit()
+
+        result = await self.db.execute(
+            select(Property)
+            .options(joinedload(Property.values))
+            .where(Property.uid == property_uid)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
+    async def _add_values(self, property_uid: str, values: list[PropertyValueCreate]) -> None:
+        value_uids = [value.value_uid for value in values]
+        if len(set(value_uids)) != len(value_uids):
+            raise ValueError("Value UIDs must be unique")
+
+        existing = []
+        for uids_chunk in self.chunked(value_uids):
+            result = await self.db.execute(
+                select(PropertyValue.uid).where(self.in_values(PropertyValue.uid, uids_chunk))
+            )
+            existing.extend(result.scalars())
+        if existing:
+            raise ValueError(f"Value UID '{existing[0]}' already exists")
+
+        await self._insert_values(property_uid, values)
+
+    async def _insert_values(self, property_uid: str, values: list[PropertyValueCreate]) -> None:
+        self.db.add_all(
+            PropertyValue(uid=value.value_uid, value=value.value, property_uid=property_uid)
+            for value in values
+        )
+
+    async def _delete(self, property_uids: list[str]) -> None:
+        for uids_chunk in self.chunked(property_uids):
+            await self.db.execute(
+                delete(ProductProperty).where(self.in_values(ProductProperty.property_uid, uids_chunk))
+            )
+            await self.db.execute(delete(PropertyValue).where(self.in_values(PropertyValue.property_uid, uids_chunk)))
+            await self.db.execute(delete(Property).where(self.in_values(Property.uid, uids_chunk)))
+
+
+class OutboxRepository:
+    """
+    События изменения каталога. add() не делает commit: событие сохраняется в транзакции вызывающего репозитория.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def add(self, event_type: str, entity_uid: str, payload: Optional[dict[str, Any]] = None) -> None:
+        self.db.add(CatalogEvent(event_type=event_type, entity_uid=entity_uid, payload=payload or {}))
+
+    @traced
+    async def claim_pending(self, worker_id: str, limit: int, lease_seconds: int) -> list[CatalogEvent]:
+        """
+        Захватывает пачку неотправленных событий. Захват - один UPDATE, поэтому несколько воркеров
+        не получат одни и те же события; события упавшего воркера освобождаются по истечении lease_seconds.
+        """
+        now = utc_now()
+        claim = f"{worker_id}:{uuid.uuid4().hex}"
+        pending = (
+            select(CatalogEvent.id)
+            .where(CatalogEvent.dispatched_at.is_(None))
+            .where(or_(
+                CatalogEvent.claimed_at.is_(None),
+                CatalogEvent.claimed_at < now - timedelta(seconds=lease_seconds)
+            ))
+            .order_by(CatalogEvent.id)
+            .limit(limit)
+        )
+        if self.db.get_bind().dialect.name == "postgresql":
+            # в SQLite запись и так идёт одним писателем, а в PostgreSQL параллельные UPDATE
+            # выбрали бы одни и те же строки подзапроса
+            pending = pending.with_for_update(skip_locked=True)
+        await self.db.execute(
+            update(CatalogEvent)
+            .where(CatalogEvent.id.in_(pending))
+            .values(claimed_by=claim, claimed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+        result = await self.db.execute(
+            select(CatalogEvent)
+            .where(CatalogEvent.claimed_by == claim)
+            .where(CatalogEvent.dispatched_at.is_(None))
+            .order_by(CatalogEvent.id)
+        )
+        return list(result.scalars().all())
+
+    @traced
+    async def mark_dispatched(self, event_ids: list[int]) -> None:
+        await self.db.execute(
+            update(CatalogEvent)
+            .where(CatalogEvent.id.in_(event_ids))
+            .values(dispatched_at=utc_now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    @traced
+    async def prune(self, retention_seconds: int) -> None:
+        await self.db.execute(
+            delete(CatalogEvent)
+            .where(CatalogEvent.dispatched_at < utc_now() - timedelta(seconds=retention_seconds))
+        )
+        await self.db.commit()
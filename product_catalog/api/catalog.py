@@ -1,40 +1,16 @@
 from typing import Optional, Annotated
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
 from product_catalog.domain.dto import CatalogResponse, FilterStatsResponse
 from product_catalog.di.services import get_catalog_service
+from product_catalog.domain.projection import parse_fields, shape_catalog_page
+from product_catalog.domain.query import CatalogQuery
 from product_catalog.service_layer.services import CatalogService
 
 
 router = APIRouter(prefix="/catalog", tags=["catalog"])
 
 
-def parse_property_filters(query_params: dict) -> dict:
-    """
-    Парсит query параметры в виде property_uid1=uid1&property_uid1=uid2&property_uid2=uid1&property_uid2=uid2
-    """
-    property_filters = {}
-    for key, value in query_params.items():
-        if key.startswith("property_"):
-            prop_uid = key[len("property_"):]
-            if prop_uid.endswith("_from") or prop_uid.endswith("_to"):  # числовой формат
-                prop_uid_base = prop_uid.rsplit("_", 1)[0]
-                if prop_uid_base not in property_filters:
-                    property_filters[prop_uid_base] = {}
-                if prop_uid.endswith("_from"):
-                    property_filters[prop_uid_base]["from"] = int(value)
-                elif prop_uid.endswith("_to"):
-                    property_filters[prop_uid_base]["to"] = int(value)
-            else:  # формат в виде списка
-                if isinstance(value, str):
-                    if prop_uid not in property_filters:
-                        property_filters[prop_uid] = [value]
-                    else:
-                        property_filters[prop_uid].append(value)
-                elif isinstance(value, list):
-                    property_filters[prop_uid] = value
-    return property_filters
-
-
 @router.get(path="/", response_model=CatalogResponse)
 async def get_catalog(
     request: Request,
@@ -42,16 +18,36 @@ async def get_catalog(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     name: Optional[str] = None,
-    sort: Optional[str] = Query(None, enum=["name", "uid"]),
+    sort: Optional[str] = Query(
+        None, description="name, uid или property_<uid> с :asc/:desc, несколько ключей через запятую"
+    ),
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущего ответа"),
+    fields: Optional[str] = Query(None, description="поля товара через запятую: uid, name, version, properties"),
+    compact: bool = Query(
+        False, description="названия свойств и значений один раз на страницу в словаре properties"
+    ),
 ):
-    property_filters = parse_property_filters(dict(request.query_params))
-    return await catalog_service.get_catalog(
-        page=page,
-        page_size=page_size,
-        name=name,
-        sort=sort,
-        property_filters=property_filters
-    )
+    """
+    Фильтры по свойствам: property_<uid>=<value_uid> (повтор параметра - любое из значений),
+    property_<uid>_from и property_<uid>_to для числовых свойств.
+    Схема ответа описывает полную форму; fields и compact её сокращают (см. domain.projection).
+    """
+    try:
+        product_fields = parse_fields(fields)
+        query = CatalogQuery.from_params(
+            request.query_params.multi_items(),
+            page=page,
+            page_size=page_size,
+            name=name,
+            sort=sort,
+            cursor=cursor
+        )
+        catalog_page = await catalog_service.get_catalog(query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # страница уже в форме CatalogResponse: без повторной валидации и сериализации через response_model
+    return JSONResponse(shape_catalog_page(catalog_page, product_fields, compact))
+
 
 @router.get(path="/filter/", response_model=FilterStatsResponse)
 async def get_filter_stats(
@@ -59,8 +55,8 @@ async def get_filter_stats(
     catalog_service: Annotated[CatalogService, Depends(get_catalog_service)],
     name: Optional[str] = None,
 ):
-    property_filters = parse_property_filters(dict(request.query_params))
-    return await catalog_service.get_filter_stats(
-        name=name,
-        property_filters=property_filters
-    )
\ No newline at end of file
+    try:
+        query = CatalogQuery.from_params(request.query_params.multi_items(), name=name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await catalog_service.get_filter_stats(query)
\ No newline at end of file
@@ -0,0 +1,34 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from product_catalog.adapters.profiling import get_profile
+from product_catalog.adapters.redis_cache import RedisCache
+from product_catalog.di.redis_cache import get_redis_cache
+
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get(path="/profiles/{profile_id}", include_in_schema=False)
+async def get_request_profile(profile_id: str):
+    profile = get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return profile.as_dict()
+
+
+@router.get(path="/cache", include_in_schema=False)
+async def get_cache_stats(
+    redis_cache: Annotated[Optional[RedisCache], Depends(get_redis_cache)],
+    limit: int = Query(20, ge=1, le=500),
+):
+    """
+    Самые полезные (по доле попаданий) и самые тяжёлые (по размеру) страницы кеша каталога.
+    """
+    if redis_cache is None:
+        raise HTTPException(status_code=404, detail="Cache is disabled")
+    stats = await redis_cache.key_stats(limit)
+    if stats is None:
+        raise HTTPException(status_code=503, detail="Cache is unavailable")
+    return stats
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Response
+
+from product_catalog.adapters.metrics import render_metrics, update_pool_metrics
+from product_catalog.di.database import get_engine, get_read_engine
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get(path="/metrics", include_in_schema=False)
+async def get_metrics():
+    update_pool_metrics({"write": await get_engine(), "read": await get_read_engine()})
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
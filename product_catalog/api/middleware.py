@@ -0,0 +1,188 @@
+import gzip
+import random
+import time
+from typing import Callable, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from product_catalog.adapters.metrics import RequestStats, observe_request, request_stats
+from product_catalog.adapters.profiling import RequestProfile, current_profile, span, store_profile
+from product_catalog.config import CompressionConfig, get_settings
+
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+class MetricsMiddleware:
+    """
+    Замеряет время запроса и собирает статистику SQL/Redis за запрос в разрезе шаблона маршрута.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_stats.reset(token)
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            observe_request(scope["method"], route_path, status_code, elapsed, stats)
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос, если передан заголовок profiling.header или запрос попал в выборку sample_rate.
+    Сводка возвращается в Server-Timing, полный таймлайн - по X-Profile-Id через /debug/profiles/{id}.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.config = get_settings().profiling
+        self.header = self.config.header.lower().encode()
+
+    def should_profile(self, scope: Scope) -> bool:
+        if any(name == self.header for name, _ in scope["headers"]):
+            return True
+        return self.config.sample_rate > 0 and random.random() < self.config.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = current_profile.set(profile)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.finish()
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", profile.server_timing())
+                headers.append("X-Profile-Id", profile.id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            if profile.total_ms is None:
+                profile.finish()
+            store_profile(profile)
+
+
+def available_encoders(config: CompressionConfig) -> dict[str, Callable[[bytes], bytes]]:
+    """
+    Кодировки из config.encodings в порядке предпочтения; br и zstd - только если установлены brotli и zstandard.
+    """
+    encoders = {"gzip": lambda body: gzip.compress(body, compresslevel=config.gzip_level, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        encoders["br"] = lambda body: brotli.compress(body, quality=config.brotli_quality)
+    try:
+        import zstandard
+    except ImportError:
+        pass
+    else:
+        encoders["zstd"] = zstandard.ZstdCompressor(level=config.zstd_level).compress
+    return {name: encoders[name] for name in config.encodings if name in encoders}
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    weights = {}
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name] = quality
+    return weights
+
+
+class CompressionMiddleware:
+    """
+    Сжимает ответы от compression.minimum_size байт кодировкой с наибольшим q из Accept-Encoding, при равном q -
+    первой из compression.encodings. Сжимается только тело, отправленное одним сообщением (JSONResponse и Response);
+    потоковые ответы передаются как есть.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.config = get_settings().compression
+        self.encoders = available_encoders(self.config)
+
+    def choose_encoding(self, scope: Scope) -> Optional[str]:
+        accept_encoding = next((value for name, value in scope["headers"] if name == b"accept-encoding"), None)
+        if not accept_encoding:
+            return None
+        weights = parse_accept_encoding(accept_encoding.decode("latin-1"))
+        chosen, chosen_quality = None, 0.0
+        for encoding in self.encoders:
+            quality = weights.get(encoding, weights.get("*", 0.0))
+            if quality > chosen_quality:
+                chosen, chosen_quality = encoding, quality
+        return chosen
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = self.choose_encoding(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # заголовки отправляются вместе с первой частью тела, когда известно, сжимать ли ответ
+                start_message = message
+                return
+            if start_message is None:
+                await send(message)
+                return
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            if (
+                message.get("more_body")
+                or len(body) < self.config.minimum_size
+                or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send(start)
+                await send(message)
+                return
+            with span("compress", encoding=encoding, bytes=len(body)):
+                body = self.encoders[encoding](body)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,7 +1,8 @@
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
-from product_catalog.domain.dto import ProductCreate, ProductResponse
-from product_catalog.di.services import get_product_service
+from product_catalog.domain.dto import BulkDeleteResponse, ProductBulkDelete, ProductCreate, ProductResponse, ProductUpdate
+from product_catalog.domain.exceptions import NotFoundError, VersionConflictError
+from product_catalog.di.services import get_product_service, get_read_product_service
 from product_catalog.service_layer.services import  ProductService
 
 
@@ -11,7 +12,7 @@ router = APIRouter(prefix="/product", tags=["product"])
 @router.get(path="/{product_uid}", response_model=ProductResponse, status_code=200)
 async def get_product(
     product_uid: str,
-    product_service: Annotated[ProductService, Depends(get_product_service)]
+    product_service: Annotated[ProductService, Depends(get_read_product_service)]
 ):
     try:
         return await product_service.get_product(product_uid)
@@ -30,6 +31,26 @@ async def create_product(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.patch(path="/{product_uid}", response_model=ProductResponse, status_code=200)
+async def update_product(
+    product_uid: str,
+    product_data: ProductUpdate,
+    product_service: Annotated[ProductService, Depends(get_product_service)]
+):
+    """
+    Частичное обновление товара. version - версия товара из последнего ответа; при несовпадении
+    (товар изменён другим запросом) возвращается 409 и нужно перечитать товар.
+    """
+    try:
+        return await product_service.update_product(product_uid, product_data)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except VersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.delete(path="/{product_uid}", status_code=204)
 async def delete_product(
     product_uid: str,
@@ -39,4 +60,19 @@ async def delete_product(
         await product_service.delete_product(product_uid)
         return None
     except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post(path="/bulk-delete", response_model=BulkDeleteResponse, status_code=200)
+async def delete_products(
+    bulk_delete: ProductBulkDelete,
+    product_service: Annotated[ProductService, Depends(get_product_service)]
+):
+    """
+    Удаляет товары по списку uids и/или по фильтрам каталога (name, property_filters в формате
+    {"uid1": ["value_uid1", "value_uid2"], "uid3": {"from": 10, "to": 15}}).
+    """
+    try:
+        return await product_service.delete_products(bulk_delete)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
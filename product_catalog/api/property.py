@@ -1,6 +1,6 @@
-from typing import Annotated
+from typing import Annotated, List
 from fastapi import APIRouter, Depends, HTTPException
-from product_catalog.domain.dto import PropertyCreate
+from product_catalog.domain.dto import BulkDeleteResponse, PropertyBulkDelete, PropertyCreate, PropertyValueCreate
 from product_catalog.di.services import get_property_service
 from product_catalog.service_layer.services import PropertyService
 
@@ -28,4 +28,27 @@ async def delete_property(
         await property_service.delete_property(property_uid)
         return None
     except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post(path="/{property_uid}/values", status_code=201)
+async def add_property_values(
+    property_uid: str,
+    values: List[PropertyValueCreate],
+    property_service: Annotated[PropertyService, Depends(get_property_service)]
+):
+    try:
+        return await property_service.add_property_values(property_uid, values)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post(path="/bulk-delete", response_model=BulkDeleteResponse, status_code=200)
+async def delete_properties(
+    bulk_delete: PropertyBulkDelete,
+    property_service: Annotated[PropertyService, Depends(get_property_service)]
+):
+    try:
+        return await property_service.delete_properties(bulk_delete)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -1,5 +1,7 @@
 from product_catalog.api.catalog import router as catalog_router
+from product_catalog.api.debug import router as debug_router
+from product_catalog.api.metrics import router as metrics_router
 from product_catalog.api.product import router as product_router
 from product_catalog.api.property import router as property_router
 
-routers = (catalog_router, product_router, property_router)
\ No newline at end of file
+routers = (catalog_router, product_router, property_router, metrics_router, debug_router)
\ No newline at end of file
@@ -1,24 +1,140 @@
+import os
+from functools import lru_cache
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 
 
 
+class SQLiteConfig(BaseModel):
+    journal_mode: str = "wal"
+    synchronous: str = "normal"
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size: int = -64000  # отрицательное значение - размер в KiB
+    busy_timeout: int = 5000  # мс
+
+
 class DatabaseConfig(BaseSettings):
     url: str
+    read_url: Optional[str] = None
     echo: bool = False
+    read_pool_size: int = 5
+    statement_timeout: Optional[float] = 5.0  # секунды на запрос через соединения чтения; None - без ограничения
+    sqlite: SQLiteConfig = SQLiteConfig()
+
+    @property
+    def dialect(self) -> str:
+        # "sqlite+aiosqlite:///..." -> "sqlite", "postgresql+asyncpg://..." -> "postgresql"
+        return self.url.split(":", 1)[0].split("+", 1)[0]
 
 
 class RedisConfig(BaseSettings):
+    enabled: bool = True  # false - без кеша, событий и сообщений Redis (бенчмарки пути до БД, тесты)
     host: str = "localhost"
     port: int = 6379
+    connect_timeout: float = 1.0  # секунды; недоступный Redis не задерживает запросы каталога дольше
+
+
+class CacheConfig(BaseModel):
+    ttl: int = 3600  # TTL часто запрашиваемых страниц каталога, секунды
+    min_ttl: int = 60  # TTL страниц, которые запрашивали один раз
+    hot_requests: int = 20  # обращений за окно статистики, начиная с которых страница получает полный ttl
+    stats_window: int = 600  # секунды окна счётчиков обращений; учитываются текущее и предыдущее окна
+    # страниц с фильтрами, поиском по названию или курсором в кеше одновременно; 0 - без ограничения
+    max_filtered_keys: int = 10000
+
+
+class ServerConfig(BaseModel):
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    backlog: int = 2048
+    graceful_timeout: int = 30  # секунды на завершение текущих запросов при остановке
+    keep_alive_timeout: int = 5
+    # схема OpenAPI, собранная при сборке образа (python -m product_catalog.entrypoints.openapi);
+    # если файла нет, FastAPI строит схему при первом запросе /openapi.json
+    openapi_path: Optional[str] = "openapi.json"
+
+
+class CompressionConfig(BaseModel):
+    enabled: bool = True
+    minimum_size: int = 1024  # байты; ответы меньше не сжимаются - выигрыш меньше затрат
+    encodings: list[str] = ["zstd", "br", "gzip"]  # порядок предпочтения при равном q в Accept-Encoding
+    gzip_level: int = 5
+    brotli_quality: int = 4
+    zstd_level: int = 3
+
+
+class ProfilingConfig(BaseModel):
+    enabled: bool = False
+    header: str = "X-Profile"  # запрос с этим заголовком профилируется всегда
+    sample_rate: float = 0.0  # доля остальных запросов, которые профилируются случайно
+    history_size: int = 100  # сколько последних профилей хранить для /debug/profiles/{id}
+    slow_query_ms: Optional[float] = None
+    explain_slow_queries: bool = True
+
+
+class OutboxConfig(BaseModel):
+    poll_interval: float = 1.0  # секунды между опросами outbox, если нет локальных уведомлений
+    batch_size: int = 500
+    lease_seconds: int = 30
+    retention_seconds: int = 24 * 3600
+    stream: str = "catalog_events"
+    stream_maxlen: int = 100000
+
+
+class MetadataConfig(BaseModel):
+    refresh_interval: float = 30.0  # периодическое перечитывание на случай пропущенного сообщения
+    miss_refresh_interval: float = 1.0  # чаще - при обращении к неизвестному uid, только если он есть в БД
+    channel: str = "catalog_metadata"
+
+
+class FacetsConfig(BaseModel):
+    enabled: bool = False  # требует numpy
+    path: str = "facets"  # каталог с поколениями снимка, общий для воркеров одного хоста
+    refresh_interval: float = 5.0  # секунды между применениями новых событий outbox
+    rebuild_interval: float = 3600.0  # полная пересборка на случай пропущенных событий
+    compact_ratio: float = 0.1  # пересборка, когда дельта превышает эту долю основного снимка
+
+
+class LimitsConfig(BaseModel):
+    # одновременных обращений к БД на воркер по операциям CatalogService; операции без лимита не ограничены
+    concurrency: dict[str, int] = {"catalog": 32, "filter_stats": 8}
+    queue_timeout: float = 0.05  # секунды ожидания свободного слота, после чего запрос получает 503
+    retry_after: int = 1  # значение заголовка Retry-After в ответе 503
+    stale_ttl: int = 0  # секунды хранения копии страницы каталога для ответа при перегрузке; 0 - не хранить
 
 
 class Settings(BaseSettings):
     database: DatabaseConfig
     redis: RedisConfig
+    cache: CacheConfig = CacheConfig()
+    server: ServerConfig = ServerConfig()
+    compression: CompressionConfig = CompressionConfig()
+    profiling: ProfilingConfig = ProfilingConfig()
+    outbox: OutboxConfig = OutboxConfig()
+    metadata: MetadataConfig = MetadataConfig()
+    facets: FacetsConfig = FacetsConfig()
+    limits: LimitsConfig = LimitsConfig()
 
     class Config:
         env_file = ".env"
         env_nested_delimiter = "__"
         extra = 'forbid'
 
-settings = Settings()
\ No newline at end of file
+
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Настройки читаются из окружения и .env при первом обращении, а не при импорте модуля: импорт приложения
+    не требует .env, а бенчмарки и скрипты успевают выставить переменные окружения до чтения.
+    """
+    return Settings()
+
+
+def __getattr__(name: str) -> Any:
+    # from product_catalog.config import settings (миграции alembic) читает настройки в момент импорта
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,20 +1,141 @@
+import sqlite3
+import time
+from functools import lru_cache
+
 from fastapi import Depends
 from typing import Annotated, AsyncIterable
 
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
     create_async_engine, AsyncEngine,
     AsyncSession, async_sessionmaker
 )
 
-from product_catalog.config import settings
+from product_catalog.adapters import metrics, profiling
+from product_catalog.config import DatabaseConfig, get_settings
+from product_catalog.domain.exceptions import StatementTimeoutError
+
+
+def _is_file_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def _apply_sqlite_pragmas(async_engine: AsyncEngine, config: DatabaseConfig, read_only: bool) -> None:
+    sqlite_config = config.sqlite
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {int(sqlite_config.busy_timeout)}")
+        cursor.execute(f"PRAGMA journal_mode = {sqlite_config.journal_mode}")
+        cursor.execute(f"PRAGMA synchronous = {sqlite_config.synchronous}")
+        cursor.execute(f"PRAGMA mmap_size = {int(sqlite_config.mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size = {int(sqlite_config.cache_size)}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+
+
+SQLITE_PROGRESS_STEPS = 10000  # инструкций VM SQLite между проверками таймаута
+
+
+def _is_statement_timeout(error: BaseException) -> bool:
+    if isinstance(error, sqlite3.OperationalError):
+        return str(error) == "interrupted"
+    # asyncpg: query_canceled по statement_timeout
+    return getattr(error, "sqlstate", None) == "57014"
+
+
+def _apply_statement_timeout(async_engine: AsyncEngine, timeout: float) -> None:
+    """
+    Запрос дольше timeout прерывается и превращается в StatementTimeoutError (503). В PostgreSQL таймаут
+    задаётся statement_timeout соединения, в SQLite запрос прерывает progress handler, который проверяет
+    срок, выставленный перед выполнением запроса.
+    """
+    if async_engine.dialect.name == "sqlite":
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def set_progress_handler(dbapi_connection, connection_record):
+            deadline = connection_record.info["statement_deadline"] = [None]
+
+            def interrupt_expired() -> int:
+                return int(deadline[0] is not None and time.monotonic() > deadline[0])
+
+            dbapi_connection.await_(
+                dbapi_connection.driver_connection.set_progress_handler(interrupt_expired, SQLITE_PROGRESS_STEPS)
+            )
+
+        @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+        def set_deadline(conn, cursor, statement, parameters, context, executemany):
+            conn.info["statement_deadline"][0] = time.monotonic() + timeout
+
+        @event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+        def clear_deadline(conn, cursor, statement, parameters, context, executemany):
+            conn.info["statement_deadline"][0] = None
+
+    @event.listens_for(async_engine.sync_engine, "handle_error")
+    def convert_timeout(context):
+        if context.connection is not None and "statement_deadline" in context.connection.info:
+            context.connection.info["statement_deadline"][0] = None
+        if _is_statement_timeout(context.original_exception):
+            raise StatementTimeoutError(
+                f"Query exceeded {timeout}s statement timeout", get_settings().limits.retry_after
+            ) from context.original_exception
+
+
+def create_engine_from_config(config: DatabaseConfig, read_only: bool = False) -> AsyncEngine:
+    """
+    Создаёт движок БД. Для SQLite запись идёт через единственное соединение (один писатель),
+    а чтение - через отдельный пул read-only соединений, которые в режиме WAL не ждут commit() писателя.
+    Для PostgreSQL пул записи стандартный, а соединения чтения открываются в режиме read only.
+    """
+    url = config.read_url if read_only and config.read_url else config.url
+    engine_kwargs = {}
+    if _is_file_sqlite(url):
+        if read_only:
+            engine_kwargs.update(pool_size=config.read_pool_size, max_overflow=0)
+        else:
+            engine_kwargs.update(pool_size=1, max_overflow=0)
+
+    elif make_url(url).get_backend_name() == "postgresql":
+        if read_only:
+            server_settings = {"default_transaction_read_only": "on"}
+            if config.statement_timeout:
+                server_settings["statement_timeout"] = str(int(config.statement_timeout * 1000))
+            engine_kwargs.update(pool_size=config.read_pool_size, connect_args={"server_settings": server_settings})
+
+    async_engine = create_async_engine(url, echo=config.echo, **engine_kwargs)
+    if async_engine.dialect.name == "sqlite":
+        _apply_sqlite_pragmas(async_engine, config, read_only)
+    # таймаут только для чтения: запись (миграции, массовые вставки) может законно идти дольше
+    if read_only and config.statement_timeout:
+        _apply_statement_timeout(async_engine, config.statement_timeout)
+    return async_engine
+
+
+@lru_cache
+def _get_engine(read_only: bool = False) -> AsyncEngine:
+    async_engine = create_engine_from_config(get_settings().database, read_only=read_only)
+    metrics.instrument_engine(async_engine, name="read" if read_only else "write")
+    profiling.instrument_engine(async_engine)
+    return async_engine
+
+
+async def dispose_engines() -> None:
+    if _get_engine.cache_info().currsize:
+        await _get_engine().dispose()
+        await _get_engine(read_only=True).dispose()
+    _get_engine.cache_clear()
 
 
 async def get_engine() -> AsyncEngine:
-    return create_async_engine(
-        settings.database.url,
-        echo=settings.database.echo,
-    )
+    return _get_engine()
+
+
+async def get_read_engine() -> AsyncEngine:
+    return _get_engine(read_only=True)
 
 
 async def get_session_maker(
@@ -26,6 +147,15 @@ async def get_session_maker(
     )
 
 
+async def get_read_session_maker(
+    async_engine: Annotated[AsyncEngine, Depends(get_read_engine)]
+) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        async_engine,
+        class_=AsyncSession,
+    )
+
+
 async def get_db_session(
     session_maker: Annotated[async_sessionmaker[AsyncSession], Depends(get_session_maker)]
 ) -> AsyncIterable[AsyncSession]:
@@ -36,4 +166,14 @@ async def get_db_session(
         await session.rollback()
         raise e
     finally:
-        await session.close()
\ No newline at end of file
+        await session.close()
+
+
+async def get_read_db_session(
+    session_maker: Annotated[async_sessionmaker[AsyncSession], Depends(get_read_session_maker)]
+) -> AsyncIterable[AsyncSession]:
+    session = session_maker()
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -0,0 +1,19 @@
+from functools import lru_cache
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from product_catalog.config import get_settings
+from product_catalog.di.database import _get_engine
+from product_catalog.di.metadata import get_property_metadata
+from product_catalog.di.redis_cache import get_redis_cache
+from product_catalog.service_layer.dispatcher import OutboxDispatcher
+
+
+@lru_cache
+def get_outbox_dispatcher() -> OutboxDispatcher:
+    return OutboxDispatcher(
+        session_maker=async_sessionmaker(_get_engine(), class_=AsyncSession),
+        redis_cache=get_redis_cache(),
+        config=get_settings().outbox,
+        metadata=get_property_metadata(),
+    )
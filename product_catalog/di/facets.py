@@ -0,0 +1,24 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from product_catalog.config import get_settings
+from product_catalog.di.database import _get_engine
+
+if TYPE_CHECKING:
+    from product_catalog.adapters.facets import FacetSnapshot
+
+
+@lru_cache
+def get_facet_snapshot() -> Optional["FacetSnapshot"]:
+    config = get_settings().facets
+    if not config.enabled:
+        return None
+    # numpy нужен только при включённом снимке
+    from product_catalog.adapters.facets import FacetSnapshot
+
+    return FacetSnapshot(
+        session_maker=async_sessionmaker(_get_engine(read_only=True), class_=AsyncSession),
+        config=config,
+    )
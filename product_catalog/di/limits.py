@@ -0,0 +1,14 @@
+from functools import lru_cache
+
+from product_catalog.config import get_settings
+from product_catalog.service_layer.limits import ConcurrencyLimiter, SingleFlight
+
+
+@lru_cache
+def get_concurrency_limiter() -> ConcurrencyLimiter:
+    return ConcurrencyLimiter(get_settings().limits)
+
+
+@lru_cache
+def get_single_flight() -> SingleFlight:
+    return SingleFlight()
@@ -0,0 +1,17 @@
+from functools import lru_cache
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from product_catalog.adapters.metadata import PropertyMetadataCache
+from product_catalog.config import get_settings
+from product_catalog.di.database import _get_engine
+from product_catalog.di.redis_cache import get_redis_cache
+
+
+@lru_cache
+def get_property_metadata() -> PropertyMetadataCache:
+    return PropertyMetadataCache(
+        session_maker=async_sessionmaker(_get_engine(read_only=True), class_=AsyncSession),
+        redis_cache=get_redis_cache(),
+        config=get_settings().metadata,
+    )
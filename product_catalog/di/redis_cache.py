@@ -1,9 +1,14 @@
+from functools import lru_cache
 from typing import Optional
 
 from product_catalog.adapters.redis_cache import RedisCache
+from product_catalog.config import get_settings
 
 
+@lru_cache
 def get_redis_cache() -> Optional[RedisCache]:
+    if not get_settings().redis.enabled:
+        return None
     instance = RedisCache()
     if instance.client:
         return instance
@@ -3,17 +3,51 @@ from typing import Annotated
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
 
+from product_catalog.adapters.metadata import PropertyMetadataCache
 from product_catalog.adapters.repository import CatalogRepository, ProductRepository, PropertyRepository
-from product_catalog.di.database import get_db_session
+from product_catalog.config import get_settings
+from product_catalog.di.database import get_db_session, get_read_db_session
+from product_catalog.di.metadata import get_property_metadata
 
 
-def get_catalog_repository(db: Annotated[AsyncSession, Depends(get_db_session)]) -> CatalogRepository:
-    return CatalogRepository(db=db)
+def is_postgres() -> bool:
+    # адаптеры PostgreSQL (и диалект sqlalchemy.dialects.postgresql) импортируются только при работе с ним
+    return get_settings().database.dialect == "postgresql"
 
 
-def get_product_repository(db: Annotated[AsyncSession, Depends(get_db_session)]) -> ProductRepository:
-    return ProductRepository(db=db)
+def get_catalog_repository(
+    db: Annotated[AsyncSession, Depends(get_read_db_session)],
+    metadata: Annotated[PropertyMetadataCache, Depends(get_property_metadata)]
+) -> CatalogRepository:
+    repository_class = CatalogRepository
+    if is_postgres():
+        from product_catalog.adapters.postgres import PostgresCatalogRepository as repository_class
+    return repository_class(db=db, metadata=metadata)
+
+
+def get_product_repository(
+    db: Annotated[AsyncSession, Depends(get_db_session)],
+    metadata: Annotated[PropertyMetadataCache, Depends(get_property_metadata)]
+) -> ProductRepository:
+    repository_class = ProductRepository
+    if is_postgres():
+        from product_catalog.adapters.postgres import PostgresProductRepository as repository_class
+    return repository_class(db=db, metadata=metadata)
+
+
+def get_read_product_repository(
+    db: Annotated[AsyncSession, Depends(get_read_db_session)],
+    metadata: Annotated[PropertyMetadataCache, Depends(get_property_metadata)]
+) -> ProductRepository:
+    # чтение товара не ждёт единственное соединение записи
+    repository_class = ProductRepository
+    if is_postgres():
+        from product_catalog.adapters.postgres import PostgresProductRepository as repository_class
+    return repository_class(db=db, metadata=metadata)
 
 
 def get_property_repository(db: Annotated[AsyncSession, Depends(get_db_session)]) -> PropertyRepository:
-    return PropertyRepository(db=db)
\ No newline at end of file
+    repository_class = PropertyRepository
+    if is_postgres():
+        from product_catalog.adapters.postgres import PostgresPropertyRepository as repository_class
+    return repository_class(db=db)
\ No newline at end of file
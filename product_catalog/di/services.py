@@ -1,31 +1,60 @@
-from typing import Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Optional
 
 from fastapi import Depends
 
+from product_catalog.adapters.metadata import PropertyMetadataCache
 from product_catalog.adapters.repository import CatalogRepository, ProductRepository, PropertyRepository
 from product_catalog.adapters.redis_cache import RedisCache
 from product_catalog.service_layer.services import CatalogService, ProductService, PropertyService
 
-from product_catalog.di.repository import get_catalog_repository, get_product_repository, get_property_repository
+from product_catalog.di.repository import (
+    get_catalog_repository, get_product_repository, get_property_repository, get_read_product_repository
+)
 from product_catalog.di.redis_cache import get_redis_cache
+from product_catalog.di.dispatcher import get_outbox_dispatcher
+from product_catalog.di.metadata import get_property_metadata
+from product_catalog.di.facets import get_facet_snapshot
+from product_catalog.di.limits import get_concurrency_limiter, get_single_flight
+from product_catalog.service_layer.dispatcher import OutboxDispatcher
+from product_catalog.service_layer.limits import ConcurrencyLimiter, SingleFlight
+
+if TYPE_CHECKING:
+    from product_catalog.adapters.facets import FacetSnapshot
 
 
 def get_catalog_service(
     repo: Annotated[CatalogRepository, Depends(get_catalog_repository)],
-    redis_cache: Annotated[Optional[RedisCache], Depends(get_redis_cache)]
+    redis_cache: Annotated[Optional[RedisCache], Depends(get_redis_cache)],
+    metadata: Annotated[PropertyMetadataCache, Depends(get_property_metadata)],
+    facets: Annotated[Optional["FacetSnapshot"], Depends(get_facet_snapshot)],
+    limiter: Annotated[ConcurrencyLimiter, Depends(get_concurrency_limiter)],
+    single_flight: Annotated[SingleFlight, Depends(get_single_flight)]
 ) -> CatalogService:
-    return CatalogService(repo=repo, redis_cache=redis_cache)
+    return CatalogService(
+        repo=repo, redis_cache=redis_cache, metadata=metadata, facets=facets, limiter=limiter,
+        single_flight=single_flight
+    )
 
 
 def get_product_service(
     repo: Annotated[ProductRepository, Depends(get_product_repository)],
-    redis_cache: Annotated[Optional[RedisCache], Depends(get_redis_cache)]
+    dispatcher: Annotated[OutboxDispatcher, Depends(get_outbox_dispatcher)],
+    metadata: Annotated[PropertyMetadataCache, Depends(get_property_metadata)]
+) -> ProductService:
+    return ProductService(repo=repo, dispatcher=dispatcher, metadata=metadata)
+
+
+def get_read_product_service(
+    repo: Annotated[ProductRepository, Depends(get_read_product_repository)],
+    metadata: Annotated[PropertyMetadataCache, Depends(get_property_metadata)]
 ) -> ProductService:
-    return ProductService(repo=repo, redis_cache=redis_cache)
+    # только для чтения: без диспетчера outbox
+    return ProductService(repo=repo, dispatcher=None, metadata=metadata)
 
 
 def get_property_service(
     repo: Annotated[PropertyRepository, Depends(get_property_repository)],
-    redis_cache: Annotated[Optional[RedisCache], Depends(get_redis_cache)]
+    dispatcher: Annotated[OutboxDispatcher, Depends(get_outbox_dispatcher)],
+    metadata: Annotated[PropertyMetadataCache, Depends(get_property_metadata)]
 ) -> PropertyService:
-    return PropertyService(repo=repo, redis_cache=redis_cache)
\ No newline at end of file
+    return PropertyService(repo=repo, dispatcher=dispatcher, metadata=metadata)
\ No newline at end of file
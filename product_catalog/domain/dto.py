@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Any, Optional, List
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional, List, Union
 
 
 class ProductPropertyResponse(BaseModel):
@@ -14,6 +14,7 @@ class ProductPropertyResponse(BaseModel):
 class ProductResponse(BaseModel):
     uid: str
     name: str
+    version: int = 1
     properties: List[ProductPropertyResponse]
     class Config:
         from_attributes = True
@@ -27,6 +28,7 @@ class IntPropertyStats(BaseModel):
 class CatalogResponse(BaseModel):
     products: List[ProductResponse]
     count: int
+    next_cursor: Optional[str] = None
 
 
 class FilterStatsResponse(BaseModel):
@@ -47,6 +49,13 @@ class ProductCreate(BaseModel):
     properties: List[ProductPropertyCreate]
 
 
+class ProductUpdate(BaseModel):
+    version: int
+    name: Optional[str] = None
+    properties: Optional[List[ProductPropertyCreate]] = None
+    remove_properties: Optional[List[str]] = None
+
+
 class PropertyValueCreate(BaseModel):
     value_uid: str
     value: str
@@ -56,4 +65,19 @@ class PropertyCreate(BaseModel):
     uid: str
     name: str
     type: str
-    values: Optional[List[PropertyValueCreate]] = None
\ No newline at end of file
+    values: Optional[List[PropertyValueCreate]] = None
+
+
+class ProductBulkDelete(BaseModel):
+    uids: Optional[List[str]] = None
+    name: Optional[str] = None
+    # форма фильтров проверяется domain.query.parse_filter_mapping (400), а не приведением типов pydantic
+    property_filters: Optional[Dict[str, Union[List[Any], Dict[str, Any]]]] = None
+
+
+class PropertyBulkDelete(BaseModel):
+    uids: List[str] = Field(min_length=1)
+
+
+class BulkDeleteResponse(BaseModel):
+    deleted: int
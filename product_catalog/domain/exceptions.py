@@ -0,0 +1,26 @@
+class NotFoundError(ValueError):
+    pass
+
+
+class VersionConflictError(ValueError):
+    """
+    Версия товара в запросе не совпадает с текущей: товар изменён другим запросом.
+    """
+    def __init__(self, uid: str, expected: int, actual: int):
+        super().__init__(f"Product '{uid}' has version {actual}, expected {expected}")
+        self.uid = uid
+        self.expected = expected
+        self.actual = actual
+
+
+class OverloadedError(Exception):
+    """
+    Запрос отклонён, чтобы не растить очередь: все слоты операции заняты или запрос к БД превысил таймаут.
+    """
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class StatementTimeoutError(OverloadedError):
+    pass
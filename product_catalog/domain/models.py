@@ -1,4 +1,6 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Enum
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, ForeignKey, Enum, DateTime, JSON
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import relationship, DeclarativeBase
 import enum
@@ -53,5 +55,28 @@ class Product(Base):
 
     uid = Column(String, primary_key=True)
     name = Column(String, nullable=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    properties = relationship("ProductProperty", back_populates="product", cascade="all, delete-orphan")
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class CatalogEvent(Base):
+    """
+    Запись outbox: событие изменения каталога, сохраняемое в одной транзакции с самим изменением.
+    """
+    __tablename__ = "catalog_events"
+    # id не переиспользуются после удаления старых событий: снимок фасетов читает события с id больше применённого
+    __table_args__ = {"sqlite_autoincrement": True}
 
-    properties = relationship("ProductProperty", back_populates="product", cascade="all, delete-orphan")
\ No newline at end of file
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_type = Column(String, nullable=False)
+    entity_uid = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    created_at = Column(DateTime, nullable=False, default=utc_now)
+    claimed_by = Column(String, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    dispatched_at = Column(DateTime, nullable=True, index=True)
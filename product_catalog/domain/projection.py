@@ -0,0 +1,65 @@
+"""
+Форма ответа GET /catalog/.
+
+fields=uid,name оставляет у товаров только перечисленные поля. В компактном виде (compact=true) названия
+свойств и значений передаются один раз на страницу в словаре properties: {uid: {"name": .., "values":
+{value_uid: value}}}, а у товара остаются uid свойства и value_uid (или value для числовых свойств).
+Форма применяется к готовой странице после кеша, поэтому на ключ кеша не влияет.
+"""
+from typing import Any, Optional
+
+
+PRODUCT_FIELDS = ("uid", "name", "version", "properties")
+
+
+def parse_fields(fields: Optional[str]) -> tuple[str, ...]:
+    """
+    Поля товара из параметра fields через запятую в порядке PRODUCT_FIELDS; ValueError - пустой список или
+    неизвестное поле.
+    """
+    if fields is None:
+        return PRODUCT_FIELDS
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    if not names:
+        raise ValueError("Parameter fields is empty")
+    if unknown := names - set(PRODUCT_FIELDS):
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(field for field in PRODUCT_FIELDS if field in names)
+
+
+def compact_properties(
+    properties: list[dict[str, Any]], dictionary: dict[str, dict[str, Any]]
+) -> list[dict[str, Any]]:
+    compacted = []
+    for item in properties:
+        entry = dictionary.get(item["uid"])
+        if entry is None:
+            entry = dictionary[item["uid"]] = {"name": item["name"], "values": {}}
+        if item["value_uid"] is None:
+            compacted.append({"uid": item["uid"], "value": item["value"]})
+        else:
+            entry["values"][item["value_uid"]] = item["value"]
+            compacted.append({"uid": item["uid"], "value_uid": item["value_uid"]})
+    return compacted
+
+
+def shape_catalog_page(
+    page: dict[str, Any], fields: tuple[str, ...] = PRODUCT_FIELDS, compact: bool = False
+) -> dict[str, Any]:
+    """
+    page - страница в форме CatalogResponse. Без fields и compact возвращается как есть.
+    """
+    if fields == PRODUCT_FIELDS and not compact:
+        return page
+    compact = compact and "properties" in fields
+    dictionary: dict[str, dict[str, Any]] = {}
+    products = []
+    for product in page["products"]:
+        item = {field: product[field] for field in fields}
+        if compact:
+            item["properties"] = compact_properties(item["properties"], dictionary)
+        products.append(item)
+    shaped = {**page, "products": products}
+    if compact:
+        shaped["properties"] = dictionary
+    return shaped
@@ -0,0 +1,151 @@
+"""
+Параметры запроса каталога в нормализованном виде.
+
+Фильтры по свойствам передаются как property_<uid>=<value_uid> (несколько значений - повтором параметра) и
+property_<uid>_from / property_<uid>_to для числовых свойств. CatalogQuery разбирает их один раз из списка пар
+(key, value) и хранит в каноническом порядке: фильтры по uid свойства, значения отсортированы и без повторов.
+Поэтому запросы, отличающиеся только порядком параметров, дают один и тот же объект (и ключ кеша), а сам объект
+неизменяемый и хешируемый.
+"""
+import json
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Iterable, Mapping, Optional
+
+from product_catalog.domain.sorting import SortKey, format_sort, parse_sort
+
+
+PROPERTY_PARAM = re.compile(r"property_(.+?)(?:_(from|to))?")
+RANGE_BOUNDS = frozenset({"from", "to"})
+
+PropertyFilters = dict[str, list[str] | dict[str, int]]
+
+
+@dataclass(frozen=True)
+class PropertyFilter:
+    property_uid: str
+    values: tuple[str, ...] = ()  # значения списочного свойства, товар подходит при любом из них
+    from_value: Optional[int] = None
+    to_value: Optional[int] = None
+
+
+def parse_property_filters(params: Iterable[tuple[str, str]]) -> tuple[PropertyFilter, ...]:
+    """
+    Фильтры из пар (key, value) query-строки, например request.query_params.multi_items().
+    Остальные параметры пропускаются; ValueError - нечисловая граница диапазона, повтор границы или
+    списочный и числовой фильтр по одному свойству.
+    """
+    values: dict[str, set[str]] = {}
+    bounds: dict[str, dict[str, int]] = {}
+    for key, value in params:
+        match = PROPERTY_PARAM.fullmatch(key)
+        if match is None:
+            continue
+        property_uid, bound = match.groups()
+        if bound is None:
+            values.setdefault(property_uid, set()).add(value)
+            continue
+        try:
+            number = int(value)
+        except ValueError:
+            raise ValueError(f"Invalid integer value '{value}' for {key}")
+        property_bounds = bounds.setdefault(property_uid, {})
+        if bound in property_bounds:
+            raise ValueError(f"Repeated parameter {key}")
+        property_bounds[bound] = number
+
+    if mixed := values.keys() & bounds.keys():
+        raise ValueError(f"Property {min(mixed)} is filtered both by values and by range")
+    filters = [PropertyFilter(uid, values=tuple(sorted(uid_values))) for uid, uid_values in values.items()]
+    filters.extend(
+        PropertyFilter(uid, from_value=uid_bounds.get("from"), to_value=uid_bounds.get("to"))
+        for uid, uid_bounds in bounds.items()
+    )
+    return tuple(sorted(filters, key=lambda item: item.property_uid))
+
+
+def parse_filter_mapping(filters: Mapping[str, Any]) -> tuple[PropertyFilter, ...]:
+    """
+    Фильтры в формате тела запроса и CatalogQuery.property_filters: {uid: [value_uid, ...]} или
+    {uid: {"from": .., "to": ..}}. В отличие от query-строки, где граница задаётся именем параметра, здесь форму
+    нельзя угадать, поэтому ValueError - пустой список значений, значение не строка, диапазон без границ,
+    неизвестный ключ диапазона или нечисловая граница.
+    """
+    parsed = []
+    for property_uid, condition in filters.items():
+        if isinstance(condition, list):
+            if not condition or not all(isinstance(value, str) for value in condition):
+                raise ValueError(f"Filter by property {property_uid} must be a non-empty list of value UIDs")
+            parsed.append(PropertyFilter(property_uid, values=tuple(sorted(set(condition)))))
+            continue
+        if not isinstance(condition, dict) or not condition:
+            raise ValueError(f"Filter by property {property_uid} must be a list of value UIDs or a range")
+        if unknown := condition.keys() - RANGE_BOUNDS:
+            raise ValueError(f"Unknown range bounds {sorted(unknown)} for property {property_uid}, use from and to")
+        for bound, value in condition.items():
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"Invalid integer value '{value}' for {property_uid}.{bound}")
+        parsed.append(PropertyFilter(property_uid, from_value=condition.get("from"), to_value=condition.get("to")))
+    return tuple(sorted(parsed, key=lambda item: item.property_uid))
+
+
+@dataclass(frozen=True)
+class CatalogQuery:
+    page: int = 1
+    page_size: int = 10
+    name: Optional[str] = None
+    sort: tuple[SortKey, ...] = (SortKey("uid"),)
+    filters: tuple[PropertyFilter, ...] = ()
+    cursor: Optional[str] = None
+
+    @classmethod
+    def from_params(
+        cls,
+        params: Iterable[tuple[str, str]],
+        page: int = 1,
+        page_size: int = 10,
+        name: Optional[str] = None,
+        sort: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> "CatalogQuery":
+        """
+        page, page_size, name, sort и cursor уже проверены FastAPI, из params берутся только фильтры по свойствам.
+        С курсором page не используется и не различает запросы (ни в ключе кеша, ни при объединении запросов).
+        """
+        return cls(
+            page=1 if cursor else page,
+            page_size=page_size,
+            name=name or None,
+            sort=parse_sort(sort),
+            filters=parse_property_filters(params),
+            cursor=cursor or None,
+        )
+
+    @cached_property
+    def property_filters(self) -> PropertyFilters:
+        """
+        Фильтры в формате репозиториев и снимка фасетов: {uid: [value_uid, ...]} или {uid: {"from": .., "to": ..}}.
+        """
+        property_filters: PropertyFilters = {}
+        for item in self.filters:
+            if item.values:
+                property_filters[item.property_uid] = list(item.values)
+                continue
+            bounds = property_filters[item.property_uid] = {}
+            if item.from_value is not None:
+                bounds["from"] = item.from_value
+            if item.to_value is not None:
+                bounds["to"] = item.to_value
+        return property_filters
+
+    @cached_property
+    def cache_key(self) -> str:
+        """
+        JSON канонического представления запроса: строки в нём экранированы, поэтому разные запросы не получают
+        один ключ (например, одно значение "v1,v2" и два значения v1 и v2 одного свойства).
+        """
+        filters = [[item.property_uid, item.values, item.from_value, item.to_value] for item in self.filters]
+        page = None if self.cursor else self.page
+        parts = [page, self.page_size, self.name, format_sort(self.sort), self.cursor, filters]
+        return "catalog:" + json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,85 @@
+"""
+Сортировка каталога и курсоры keyset-пагинации.
+
+sort - список ключей через запятую: name, uid или property_<uid>, у каждого необязательный суффикс :asc/:desc,
+например "property_price:desc,name". uid всегда добавляется последним ключом, поэтому порядок строгий и курсор
+(значения ключей последнего товара страницы) однозначно указывает, откуда продолжать.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+PROPERTY_PREFIX = "property_"
+MAX_SORT_KEYS = 3
+
+
+@dataclass(frozen=True)
+class SortKey:
+    field: str  # "name", "uid" или "property"
+    descending: bool = False
+    property_uid: Optional[str] = None
+
+    def __str__(self) -> str:
+        name = f"{PROPERTY_PREFIX}{self.property_uid}" if self.property_uid else self.field
+        return f"{name}:{'desc' if self.descending else 'asc'}"
+
+
+def parse_sort(sort: Optional[str]) -> tuple[SortKey, ...]:
+    keys = []
+    for part in (sort or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, direction = part.partition(":")
+        if direction not in ("", "asc", "desc"):
+            raise ValueError(f"Invalid sort direction '{direction}', expected asc or desc")
+        descending = direction == "desc"
+        if name in ("name", "uid"):
+            key = SortKey(name, descending)
+        elif name.startswith(PROPERTY_PREFIX) and len(name) > len(PROPERTY_PREFIX):
+            key = SortKey("property", descending, name[len(PROPERTY_PREFIX):])
+        else:
+            raise ValueError(f"Invalid sort key '{name}', expected name, uid or property_<uid>")
+        if any((existing.field, existing.property_uid) == (key.field, key.property_uid) for existing in keys):
+            raise ValueError(f"Duplicate sort key '{name}'")
+        keys.append(key)
+    if len(keys) > MAX_SORT_KEYS:
+        raise ValueError(f"At most {MAX_SORT_KEYS} sort keys are allowed")
+    if not any(key.field == "uid" for key in keys):
+        keys.append(SortKey("uid"))
+    return tuple(keys)
+
+
+def format_sort(keys: tuple[SortKey, ...]) -> str:
+    return ",".join(str(key) for key in keys)
+
+
+def encode_cursor(keys: tuple[SortKey, ...], values: list[Any]) -> str:
+    payload = json.dumps([format_sort(keys), values], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(keys: tuple[SortKey, ...], cursor: str) -> list[Any]:
+    """
+    Значения ключей из курсора. Курсор действителен только для той же сортировки, с которой он получен.
+    """
+    try:
+        sort, values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if sort != format_sort(keys) or not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError("Cursor does not match the requested sort")
+    if not all(is_cursor_value(key, value) for key, value in zip(keys, values)):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def is_cursor_value(key: SortKey, value: Any) -> bool:
+    # значения попадают в параметры SQL-запроса: name и uid - строки, значение свойства - число (числовое),
+    # строка (списочное) или None (у товара нет значения)
+    if key.field != "property":
+        return isinstance(value, str)
+    return value is None or isinstance(value, str) or (isinstance(value, int) and not isinstance(value, bool))
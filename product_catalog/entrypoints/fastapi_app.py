@@ -1,10 +1,99 @@
-from fastapi import FastAPI
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Any, AsyncIterator, Optional, get_args, get_origin
 
+from fastapi import FastAPI, Request
+from fastapi.dependencies.utils import get_flat_dependant
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from pydantic.fields import FieldInfo
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from product_catalog.adapters.metrics import mark_process_dead
+from product_catalog.api.middleware import CompressionMiddleware, MetricsMiddleware, ProfilingMiddleware
 from product_catalog.api.routers import routers
+from product_catalog.config import get_settings
+from product_catalog.domain.exceptions import OverloadedError
+from product_catalog.di.database import get_engine, get_read_engine, dispose_engines
+from product_catalog.di.dispatcher import get_outbox_dispatcher
+from product_catalog.di.facets import get_facet_snapshot
+from product_catalog.di.limits import get_concurrency_limiter, get_single_flight
+from product_catalog.di.metadata import get_property_metadata
+from product_catalog.di.redis_cache import get_redis_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up_engine(engine: AsyncEngine, connections: int = 1) -> None:
+    """
+    Открывает соединения пула заранее, чтобы первые запросы не платили за connect и PRAGMA.
+    """
+    async def touch() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(touch() for _ in range(connections)))
+
+
+async def on_startup() -> None:
+    await warm_up_engine(await get_engine())
+    await warm_up_engine(await get_read_engine(), connections=get_settings().database.read_pool_size)
+
+    redis_cache = get_redis_cache()
+    if redis_cache and not await redis_cache.ping():
+        logger.warning("Redis is not available, catalog cache is bypassed until it comes back")
+
+    metadata = get_property_metadata()
+    await metadata.refresh()
+    metadata.start()
+
+    # первая сборка снимка фасетов идёт в фоне, до её окончания статистика считается в БД
+    facets = get_facet_snapshot()
+    if facets:
+        facets.start()
+
+    get_outbox_dispatcher().start()
+
+
+async def on_shutdown() -> None:
+    await get_outbox_dispatcher().stop()
+    get_outbox_dispatcher.cache_clear()
+    await get_property_metadata().stop()
+    get_property_metadata.cache_clear()
+    facets = get_facet_snapshot()
+    if facets:
+        await facets.stop()
+    get_facet_snapshot.cache_clear()
+    get_concurrency_limiter.cache_clear()
+    get_single_flight.cache_clear()
+
+    redis_cache = get_redis_cache()
+    if redis_cache:
+        await redis_cache.close()
+    get_redis_cache.cache_clear()
+    await dispose_engines()
+    mark_process_dead()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await on_startup()
+    yield
+    await on_shutdown()
 
 
 def get_fastapi_app() -> FastAPI:
-    return FastAPI()
+    return FastAPI(lifespan=lifespan)
 
 
 def add_routers(app: FastAPI) -> None:
@@ -12,8 +101,127 @@ def add_routers(app: FastAPI) -> None:
         app.include_router(router)
 
 
+def add_exception_handlers(app: FastAPI) -> None:
+    @app.exception_handler(OverloadedError)
+    async def overloaded(request: Request, exc: OverloadedError) -> JSONResponse:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(exc.retry_after)}
+        )
+
+
+def add_middlewares(app: FastAPI) -> None:
+    # добавленный первым - внутренний: время сжатия входит в метрики и профиль запроса
+    if get_settings().compression.enabled:
+        app.add_middleware(CompressionMiddleware)
+    if get_settings().profiling.enabled:
+        app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+
+OPENAPI_SIGNATURE_KEY = "x-route-signature"
+
+
+def openapi_signature(app: FastAPI) -> str:
+    """
+    Хеш канонического описания всего, из чего FastAPI строит схему OpenAPI: метод, путь, обработчик (модуль и
+    qualname), статус и описание маршрута, параметры из графа зависимостей FastAPI (где, имя, тип, обязательность,
+    значение по умолчанию, ограничения) и поля моделей запросов и ответов со вложенными моделями и перечислениями.
+    Описание состоит только из имён и JSON-значений, без repr объектов, и считается без построения самой схемы.
+    """
+    described: dict[str, Any] = {}
+
+    def describe_type(annotation: Any) -> Any:
+        if isinstance(annotation, type) and issubclass(annotation, (BaseModel, Enum)):
+            name = f"{annotation.__module__}.{annotation.__qualname__}"
+            if name not in described:
+                described[name] = None  # модель может ссылаться на себя
+                if issubclass(annotation, Enum):
+                    described[name] = [jsonable_encoder(member.value) for member in annotation]
+                else:
+                    described[name] = {
+                        "doc": annotation.__doc__,
+                        "fields": {field: describe_field(info) for field, info in annotation.model_fields.items()},
+                    }
+            return name
+        args = get_args(annotation)
+        if args:
+            # Optional[X], list[X], Literal["a"]: исходный тип и аргументы
+            return [describe_type(get_origin(annotation)), [describe_type(arg) for arg in args]]
+        if isinstance(annotation, type) or callable(annotation):
+            return f"{getattr(annotation, '__module__', '')}.{getattr(annotation, '__qualname__', annotation)}"
+        return jsonable_encoder(annotation)
+
+    def describe_constraint(constraint: Any) -> Any:
+        if dataclasses.is_dataclass(constraint):
+            return [type(constraint).__name__, jsonable_encoder(dataclasses.asdict(constraint))]
+        return type(constraint).__name__
+
+    def describe_field(info: FieldInfo) -> dict[str, Any]:
+        required = info.is_required()
+        return {
+            "type": describe_type(info.annotation),
+            "required": required,
+            "default": None if required else jsonable_encoder(info.get_default(call_default_factory=True)),
+            "alias": info.alias,
+            "description": info.description,
+            "constraints": [describe_constraint(constraint) for constraint in info.metadata],
+        }
+
+    routes = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or not route.include_in_schema:
+            continue
+        dependant = get_flat_dependant(route.dependant)
+        parameters = {
+            location: sorted(
+                [param.name, param.alias, describe_field(param.field_info)] for param in getattr(dependant, location)
+            )
+            for location in ("path_params", "query_params", "header_params", "cookie_params", "body_params")
+        }
+        routes.append({
+            "methods": sorted(route.methods),
+            "path": route.path,
+            "endpoint": f"{route.endpoint.__module__}.{route.endpoint.__qualname__}",
+            "name": route.name,
+            "status_code": route.status_code,
+            "summary": route.summary,
+            "description": route.description,
+            "tags": jsonable_encoder(route.tags),
+            "responses": sorted(str(status) for status in route.responses),
+            "response_model": describe_type(route.response_model),
+            "parameters": parameters,
+        })
+    routes.sort(key=lambda item: (item["path"], item["methods"]))
+    payload = {
+        "app": [app.title, app.version, app.description],
+        "routes": routes,
+        "models": described,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def load_openapi_schema(app: FastAPI, path: Optional[str]) -> None:
+    """
+    Подставляет заранее собранную схему OpenAPI, чтобы воркер не строил её на первом запросе /openapi.json.
+    Схема, собранная из другой версии кода (другой openapi_signature), игнорируется.
+    """
+    if not path or not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        schema = json.load(f)
+    if schema.pop(OPENAPI_SIGNATURE_KEY, None) == openapi_signature(app):
+        app.openapi_schema = schema
+    else:
+        logger.warning("OpenAPI schema %s does not match application routes, ignoring it", path)
+
+
 def get_app() -> FastAPI:
     fastapi_app = get_fastapi_app()
     add_routers(fastapi_app)
+    add_exception_handlers(fastapi_app)
+    add_middlewares(fastapi_app)
+    load_openapi_schema(fastapi_app, get_settings().server.openapi_path)
     return fastapi_app
 
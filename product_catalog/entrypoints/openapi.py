@@ -0,0 +1,25 @@
+import json
+import sys
+
+from product_catalog.config import get_settings
+from product_catalog.entrypoints.fastapi_app import OPENAPI_SIGNATURE_KEY, get_app, openapi_signature
+
+
+def main() -> None:
+    """
+    Собирает схему OpenAPI при сборке образа: python -m product_catalog.entrypoints.openapi [path].
+    По умолчанию файл пишется в server.openapi_path, откуда его читает get_app.
+    """
+    path = sys.argv[1] if len(sys.argv) > 1 else get_settings().server.openapi_path
+    app = get_app()
+    # схема всегда строится заново, даже если рядом лежит файл от прошлой сборки
+    app.openapi_schema = None
+    # по подписи воркер проверяет, что схема собрана из той же версии маршрутов и моделей
+    schema = {**app.openapi(), OPENAPI_SIGNATURE_KEY: openapi_signature(app)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(schema, f, ensure_ascii=False)
+    print(f"OpenAPI schema written to {path}")
+
+
+if __name__ == "__main__":
+    main()
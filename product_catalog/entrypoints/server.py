@@ -0,0 +1,32 @@
+import uvicorn
+
+from product_catalog.adapters.metrics import prepare_multiprocess_dir
+from product_catalog.config import get_settings
+
+
+def main() -> None:
+    """
+    Production-запуск: несколько воркеров без reload. uvicorn сам выбирает uvloop и httptools,
+    если они установлены (loop="auto", http="auto"). По SIGTERM воркеры перестают принимать соединения
+    и ждут завершения текущих запросов не дольше graceful_timeout, после чего выполняется shutdown lifespan.
+    """
+    server_config = get_settings().server
+    prepare_multiprocess_dir()
+    uvicorn.run(
+        "product_catalog.entrypoints.fastapi_app:get_app",
+        factory=True,
+        host=server_config.host,
+        port=server_config.port,
+        workers=server_config.workers,
+        backlog=server_config.backlog,
+        timeout_keep_alive=server_config.keep_alive_timeout,
+        timeout_graceful_shutdown=server_config.graceful_timeout,
+        loop="auto",
+        http="auto",
+        lifespan="on",
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
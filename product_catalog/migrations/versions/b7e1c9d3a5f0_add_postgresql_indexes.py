@@ -0,0 +1,50 @@
+"""Add PostgreSQL search and facet indexes
+
+Revision ID: b7e1c9d3a5f0
+Revises: 8d2f6b4a9c1e
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e1c9d3a5f0'
+down_revision: Union[str, None] = '8d2f6b4a9c1e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # индексы нужны только PostgreSQL-репозиториям, схема SQLite не меняется
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_products_name_trgm', 'products', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_product_properties_property_value', 'product_properties',
+        ['property_uid', 'value_uid', 'product_uid'], unique=False
+    )
+    op.create_index(
+        'ix_product_properties_property_int', 'product_properties',
+        ['property_uid', 'int_value', 'product_uid'], unique=False
+    )
+    op.create_index('ix_product_properties_product_uid', 'product_properties', ['product_uid'], unique=False)
+    op.create_index('ix_property_values_property_uid', 'property_values', ['property_uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_property_values_property_uid', table_name='property_values')
+    op.drop_index('ix_product_properties_product_uid', table_name='product_properties')
+    op.drop_index('ix_product_properties_property_int', table_name='product_properties')
+    op.drop_index('ix_product_properties_property_value', table_name='product_properties')
+    op.drop_index('ix_products_name_trgm', table_name='products')
@@ -0,0 +1,33 @@
+"""Add catalog sort indexes
+
+Revision ID: c3f9a2e7b4d1
+Revises: b7e1c9d3a5f0
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9a2e7b4d1'
+down_revision: Union[str, None] = 'b7e1c9d3a5f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # значение свойства для сортировки присоединяется по (product_uid, property_uid), int_value читается из индекса
+    op.create_index(
+        'ix_product_properties_product_property', 'product_properties',
+        ['product_uid', 'property_uid', 'int_value'], unique=False
+    )
+    op.create_index('ix_products_name_uid', 'products', ['name', 'uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_name_uid', table_name='products')
+    op.drop_index('ix_product_properties_product_property', table_name='product_properties')
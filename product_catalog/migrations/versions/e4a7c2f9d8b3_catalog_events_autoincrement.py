@@ -0,0 +1,37 @@
+"""Use AUTOINCREMENT for catalog events in SQLite
+
+Revision ID: e4a7c2f9d8b3
+Revises: c3f9a2e7b4d1
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c2f9d8b3'
+down_revision: Union[str, None] = 'c3f9a2e7b4d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # без AUTOINCREMENT SQLite выдаёт id = max(id) + 1, и после очистки outbox (prune) новые события получали бы
+    # уже выданные id, которые снимок фасетов считает применёнными; в PostgreSQL id берётся из последовательности
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table(
+        'catalog_events', recreate='always', table_kwargs={'sqlite_autoincrement': True}
+    ):
+        pass
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('catalog_events', recreate='always'):
+        pass
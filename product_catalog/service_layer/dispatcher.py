@@ -0,0 +1,136 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from product_catalog.adapters.metadata import PropertyMetadataCache
+from product_catalog.adapters.redis_cache import NAME_TAG, RedisCache, product_tag, property_tag
+from product_catalog.adapters.repository import OutboxRepository
+from product_catalog.config import OutboxConfig
+from product_catalog.domain.models import CatalogEvent
+
+
+logger = logging.getLogger(__name__)
+
+TARGETED_EVENTS = {"product.updated"}
+PROPERTY_EVENT_PREFIXES = ("property.", "properties.")
+
+
+class OutboxDispatcher:
+    """
+    Фоновая доставка событий из outbox: одна инвалидация кеша каталога на пачку событий
+    и публикация событий в Redis stream для внешних потребителей (индексаторы, прогрев кеша).
+    Запись в API возвращается сразу после commit, не дожидаясь Redis.
+    """
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        redis_cache: Optional[RedisCache],
+        config: OutboxConfig,
+        metadata: Optional[PropertyMetadataCache] = None
+    ):
+        self.session_maker = session_maker
+        self.redis_cache = redis_cache
+        self.config = config
+        self.metadata = metadata
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._failing = False
+        self._stopping = False
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает цикл после текущей итерации, заодно доставляя события, записанные перед остановкой.
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        iteration = 0
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.config.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                while await self.dispatch_once() == self.config.batch_size:
+                    pass
+                iteration += 1
+                if iteration % 600 == 0:
+                    async with self.session_maker() as session:
+                        await OutboxRepository(session).prune(self.config.retention_seconds)
+                self._failing = False
+            except Exception:
+                if not self._failing:
+                    logger.exception("Outbox dispatch failed, events will be retried")
+                self._failing = True
+            if self._stopping:
+                return
+
+    async def dispatch_once(self) -> int:
+        # соединение записи одно на процесс, поэтому не держим его, пока идут обращения к Redis
+        async with self.session_maker() as session:
+            events = await OutboxRepository(session).claim_pending(
+                self.worker_id, self.config.batch_size, self.config.lease_seconds
+            )
+        if not events:
+            return 0
+
+        if self.redis_cache:
+            await self.invalidate(events)
+            if self.metadata and any(event.event_type.startswith(PROPERTY_EVENT_PREFIXES) for event in events):
+                await self.metadata.broadcast()
+            await self.redis_cache.publish_events(
+                self.config.stream,
+                [self.serialize(event) for event in events],
+                maxlen=self.config.stream_maxlen
+            )
+
+        async with self.session_maker() as session:
+            await OutboxRepository(session).mark_dispatched([event.id for event in events])
+        return len(events)
+
+    async def invalidate(self, events: list[CatalogEvent]) -> None:
+        """
+        Изменение существующего товара затрагивает только страницы, на которых он есть, и страницы с фильтрами
+        по изменённым свойствам (или по названию), поэтому удаляются ключи по тегам. Создание и удаление
+        меняют состав любой страницы, и для них кеш каталога сбрасывается целиком.
+        """
+        if any(event.event_type not in TARGETED_EVENTS for event in events):
+            await self.redis_cache.delete_pattern("catalog:*")
+            return
+
+        tags = set()
+        for event in events:
+            tags.add(product_tag(event.entity_uid))
+            tags.update(property_tag(prop_uid) for prop_uid in event.payload.get("properties", []))
+            if event.payload.get("name_changed"):
+                tags.add(NAME_TAG)
+        await self.redis_cache.invalidate_tags(tags)
+
+    @staticmethod
+    def serialize(event: CatalogEvent) -> dict[str, str]:
+        return {
+            "id": str(event.id),
+            "type": event.event_type,
+            "uid": event.entity_uid,
+            "payload": json.dumps(event.payload),
+            "created_at": event.created_at.isoformat(),
+        }
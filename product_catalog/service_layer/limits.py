@@ -0,0 +1,80 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Hashable, TypeVar
+
+from product_catalog.adapters.metrics import COALESCED_REQUESTS, LIMITER_IN_FLIGHT
+from product_catalog.config import LimitsConfig
+from product_catalog.domain.exceptions import OverloadedError, StatementTimeoutError
+
+
+T = TypeVar("T")
+
+
+def shed_reason(error: OverloadedError) -> str:
+    return "timeout" if isinstance(error, StatementTimeoutError) else "concurrency"
+
+
+class ConcurrencyLimiter:
+    """
+    Семафоры на операции сервисов. Запрос ждёт свободный слот не дольше queue_timeout и затем получает
+    OverloadedError (503): при всплеске нагрузки лишние запросы отклоняются сразу, а не копятся в очереди
+    к пулу соединений, и задержка принятых запросов остаётся прежней.
+    """
+    def __init__(self, config: LimitsConfig):
+        self.config = config
+        self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in config.concurrency.items()}
+
+    @asynccontextmanager
+    async def slot(self, operation: str) -> AsyncIterator[None]:
+        semaphore = self._semaphores.get(operation)
+        if semaphore is None:
+            yield
+            return
+        try:
+            async with asyncio.timeout(self.config.queue_timeout):
+                await semaphore.acquire()
+        except TimeoutError:
+            raise OverloadedError(f"Too many concurrent '{operation}' requests", self.config.retry_after)
+        LIMITER_IN_FLIGHT.labels(operation=operation).inc()
+        try:
+            yield
+        finally:
+            LIMITER_IN_FLIGHT.labels(operation=operation).dec()
+            semaphore.release()
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых запросов в воркере: пока выполняется запрос с ключом key, такие же
+    запросы не идут в БД и не занимают слоты ConcurrencyLimiter, а ждут его результат (или его исключение).
+    Если ведущий запрос отменён (клиент отключился), ожидающие выполняют запрос сами.
+    """
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, operation: str, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        key = (operation, key)
+        while (future := self._calls.get(key)) is not None:
+            COALESCED_REQUESTS.labels(operation=operation).inc()
+            try:
+                # shield: отмена ожидающего запроса не отменяет результат для остальных
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await call()
+        except Exception as e:
+            future.set_exception(e)
+            # исключение получат ожидающие, если они есть; без них asyncio не должен логировать его как потерянное
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._calls[key]
+        future.set_result(result)
+        return result
@@ -1,72 +1,154 @@
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, Optional
+
+from product_catalog.adapters.metadata import PropertyMetadataCache
+from product_catalog.adapters.metrics import observe_shed
+from product_catalog.adapters.profiling import span
 from product_catalog.adapters.repository import CatalogRepository, ProductRepository, PropertyRepository
-from product_catalog.adapters.redis_cache import RedisCache
-from product_catalog.domain.dto import *
-from product_catalog.domain.models import PropertyType
+from product_catalog.adapters.redis_cache import NAME_TAG, RedisCache, product_tag, property_tag
+from product_catalog.service_layer.dispatcher import OutboxDispatcher
+from product_catalog.service_layer.limits import ConcurrencyLimiter, SingleFlight, shed_reason
+from product_catalog.domain.dto import (
+    BulkDeleteResponse, CatalogResponse, FilterStatsResponse, ProductBulkDelete, ProductCreate, ProductPropertyResponse,
+    ProductResponse, ProductUpdate, PropertyBulkDelete, PropertyCreate, PropertyValueCreate
+)
+from product_catalog.domain.exceptions import OverloadedError
+from product_catalog.domain.models import Product, Property, PropertyType
+from product_catalog.domain.query import CatalogQuery, parse_filter_mapping
+from product_catalog.domain.sorting import decode_cursor, encode_cursor, format_sort
+
+if TYPE_CHECKING:
+    from product_catalog.adapters.facets import FacetSnapshot
+
+
+async def build_product_responses(products: list[Product], metadata: PropertyMetadataCache) -> list[ProductResponse]:
+    """
+    Подписи свойств и значений берутся из кеша метаданных, а не из JOIN к properties/property_values.
+    """
+    snapshot = await metadata.ensure(
+        {prop.property_uid for product in products for prop in product.properties},
+        {prop.value_uid for product in products for prop in product.properties},
+    )
+    with span("serialize"):
+        responses = []
+        for product in products:
+            properties = []
+            for prop in product.properties:
+                property_info = snapshot.properties.get(prop.property_uid)
+                if property_info is None:
+                    continue
+                value_info = snapshot.values.get(prop.value_uid) if prop.value_uid else None
+                properties.append(ProductPropertyResponse(
+                    uid=property_info.uid,
+                    name=property_info.name,
+                    value_uid=prop.value_uid,
+                    value=value_info.value if value_info else prop.int_value
+                ))
+            responses.append(ProductResponse(
+                uid=product.uid,
+                name=product.name,
+                version=product.version,
+                properties=properties
+            ))
+    return responses
 
 
 class CatalogService:
-    def __init__(self, repo: CatalogRepository, redis_cache: Optional[RedisCache]):
+    def __init__(
+        self,
+        repo: CatalogRepository,
+        redis_cache: Optional[RedisCache],
+        metadata: PropertyMetadataCache,
+        facets: Optional["FacetSnapshot"] = None,
+        limiter: Optional[ConcurrencyLimiter] = None,
+        single_flight: Optional[SingleFlight] = None
+    ):
         self.repo = repo
         self.redis_cache = redis_cache
+        self.metadata = metadata
+        self.facets = facets
+        self.limiter = limiter
+        self.single_flight = single_flight
+
+    def slot(self, operation: str):
+        return self.limiter.slot(operation) if self.limiter else nullcontext()
+
+    async def get_catalog(self, query: CatalogQuery) -> dict[str, Any]:
+        """
+        query.cursor - next_cursor из предыдущего ответа: страница читается после последнего товара предыдущей
+        (keyset-пагинация), page при этом не используется.
+        Страница возвращается словарём в форме CatalogResponse: страница из кеша отдаётся без повторной валидации.
+        Одновременные промахи кеша по одному запросу читают страницу из БД один раз (single_flight).
+        """
+        after = decode_cursor(query.sort, query.cursor) if query.cursor else None
 
-    async def get_catalog(
-        self,
-        page: int,
-        page_size: int = 10,
-        name: Optional[str] = None,
-        sort: Optional[str] = "uid",
-        property_filters: Optional[dict[str, list[str] | dict[str, int]]] = None
-    ) -> CatalogResponse:
         cache_key = None
         if self.redis_cache:
-            cache_key = f"catalog:page={page}:size={page_size}:name={name}:sort={sort}"
-            if property_filters:
-                filter_str = ":".join(
-                    f"{k}={','.join(v) if isinstance(v, list) else f'from={v.get('from', '')},to={v.get('to', '')}'}" for
-                    k, v in sorted(property_filters.items()))
-                cache_key += f":filters={filter_str}"
-
+            cache_key = query.cache_key
             cached_result = await self.redis_cache.get(cache_key)
             if cached_result:
-                return CatalogResponse(**cached_result)
-
-        products, total_count = await self.repo.get_all(
-            page=page,
-            page_size=page_size,
-            name=name,
-            sort=sort,
-            property_filters=property_filters
-        )
+                return cached_result
 
-        product_responses = [
-            ProductResponse(
-                uid=product.uid,
-                name=product.name,
-                properties=[
-                    ProductPropertyResponse(
-                        uid=prop.property.uid,
-                        name=prop.property.name,
-                        value_uid=prop.value_uid,
-                        value=prop.value.value if prop.value else prop.int_value
-                    )
-                    for prop in product.properties
-                ]
-            )
-            for product in products
-        ]
-
-        response = CatalogResponse(products=product_responses, count=total_count)
+        if self.single_flight:
+            return await self.single_flight.run("catalog", query, lambda: self._load_catalog(query, after, cache_key))
+        return await self._load_catalog(query, after, cache_key)
+
+    async def _load_catalog(
+        self, query: CatalogQuery, after: Optional[list[Any]], cache_key: Optional[str]
+    ) -> dict[str, Any]:
+        try:
+            async with self.slot("catalog"):
+                products, total_count, next_values = await self.repo.get_all(
+                    page=query.page,
+                    page_size=query.page_size,
+                    name=query.name,
+                    sort=format_sort(query.sort),
+                    property_filters=query.property_filters,
+                    after=after
+                )
+        except OverloadedError as e:
+            # при перегрузке лучше отдать страницу, устаревшую на несколько секунд, чем 503
+            stale = await self.redis_cache.get_stale(cache_key) if self.redis_cache else None
+            if stale:
+                observe_shed("catalog", shed_reason(e), "stale")
+                return stale
+            observe_shed("catalog", shed_reason(e), "rejected")
+            raise
+
+        product_responses = await build_product_responses(products, self.metadata)
+        with span("serialize"):
+            page = CatalogResponse(
+                products=product_responses,
+                count=total_count,
+                next_cursor=encode_cursor(query.sort, next_values) if next_values is not None else None
+            ).model_dump()
         if self.redis_cache:
-            await self.redis_cache.set(cache_key, response.model_dump())
+            tags = [product_tag(product.uid) for product in products]
+            tags.extend(property_tag(item.property_uid) for item in query.filters)
+            tags.extend(property_tag(key.property_uid) for key in query.sort if key.property_uid)
+            if query.name or any(key.field == "name" for key in query.sort):
+                tags.append(NAME_TAG)
+            # комбинаций фильтров, поисковых строк и курсоров неограниченно много, их число в кеше ограничено
+            capped = bool(query.filters or query.name or query.cursor)
+            await self.redis_cache.set(cache_key, page, tags=tags, capped=capped)
 
-        return response
+        return page
 
-    async def get_filter_stats(
-        self,
-        name: Optional[str] = None,
-        property_filters: Optional[dict[str, list[str] | dict[str, int]]] = None
-    ) -> FilterStatsResponse:
-        stats = await self.repo.get_filter_stats(name=name, property_filters=property_filters)
+    async def get_filter_stats(self, query: CatalogQuery) -> FilterStatsResponse:
+        """
+        Используются только name и фильтры query, страница и сортировка на статистику не влияют.
+        """
+        stats = None
+        try:
+            async with self.slot("filter_stats"):
+                # колоночный снимок не хранит названий товаров, фильтр по названию считается в БД
+                if self.facets and not query.name:
+                    stats = await self.facets.get_filter_stats(query.property_filters)
+                if stats is None:
+                    stats = await self.repo.get_filter_stats(name=query.name, property_filters=query.property_filters)
+        except OverloadedError as e:
+            observe_shed("filter_stats", shed_reason(e), "rejected")
+            raise
 
         prefixed_stats = {"count": stats["count"]}
         for key, value in stats.items():
@@ -77,71 +159,97 @@ class CatalogService:
 
 
 class ProductService:
-    def __init__(self, repo: ProductRepository, redis_cache: Optional[RedisCache]):
+    def __init__(
+        self,
+        repo: ProductRepository,
+        dispatcher: Optional[OutboxDispatcher],
+        metadata: PropertyMetadataCache
+    ):
         self.repo = repo
-        self.redis_cache = redis_cache
+        self.dispatcher = dispatcher
+        self.metadata = metadata
+
+    def notify_dispatcher(self) -> None:
+        """
+        Инвалидация кеша и публикация событий выполняются диспетчером outbox в фоне.
+        """
+        if self.dispatcher:
+            self.dispatcher.notify()
 
     async def get_product(self, product_uid: str) -> ProductResponse:
         product = await self.repo.get(product_uid)
-        product_response = ProductResponse(
-            uid=product.uid,
-            name=product.name,
-            properties=[
-                ProductPropertyResponse(
-                    uid=prop.property.uid,
-                    name=prop.property.name,
-                    value_uid=prop.value_uid,
-                    value=prop.value.value if prop.value else prop.int_value
-                )
-                for prop in product.properties
-            ]
-        )
+        [product_response] = await build_product_responses([product], self.metadata)
         return product_response
 
     async def create_product(self, product_data: ProductCreate) -> ProductResponse:
         product = await self.repo.add(product_data)
-        if self.redis_cache:
-            cache_keys = await self.redis_cache.client.keys("catalog:*")
-            for key in cache_keys:
-                await self.redis_cache.delete(key)
-
-        product_response = ProductResponse(
-            uid=product.uid,
-            name=product.name,
-            properties=[
-                ProductPropertyResponse(
-                    uid=prop.property.uid,
-                    name=prop.property.name,
-                    value_uid=prop.value_uid,
-                    value=prop.value.value if prop.value else prop.int_value
-                )
-                for prop in product.properties
-            ]
-        )
+        self.notify_dispatcher()
+
+        [product_response] = await build_product_responses([product], self.metadata)
+        return product_response
+
+    async def update_product(self, product_uid: str, product_data: ProductUpdate) -> ProductResponse:
+        product = await self.repo.update(product_uid, product_data)
+        self.notify_dispatcher()
+
+        [product_response] = await build_product_responses([product], self.metadata)
         return product_response
 
     async def delete_product(self, product_uid: str) -> None:
         await self.repo.delete(product_uid)
+        self.notify_dispatcher()
 
-        if self.redis_cache:
-            cache_keys = await self.redis_cache.client.keys("catalog:*")
-            for key in cache_keys:
-                await self.redis_cache.delete(key)
+    async def delete_products(self, bulk_delete: ProductBulkDelete) -> BulkDeleteResponse:
+        """
+        Фильтры разбираются так же строго, как в GET /catalog/: ошибка в фильтре не должна расширять удаление
+        до всех товаров со свойством.
+        """
+        query = CatalogQuery(
+            name=bulk_delete.name or None,
+            filters=parse_filter_mapping(bulk_delete.property_filters or {})
+        )
+        deleted = await self.repo.delete_many(
+            uids=bulk_delete.uids,
+            name=query.name,
+            property_filters=query.property_filters
+        )
+        if deleted:
+            self.notify_dispatcher()
+        return BulkDeleteResponse(deleted=len(deleted))
 
 
 class PropertyService:
-    def __init__(self, repo: PropertyRepository, redis_cache: Optional[RedisCache]):
+    def __init__(
+        self,
+        repo: PropertyRepository,
+        dispatcher: Optional[OutboxDispatcher],
+        metadata: PropertyMetadataCache
+    ):
         self.repo = repo
-        self.redis_cache = redis_cache
+        self.dispatcher = dispatcher
+        self.metadata = metadata
+
+    async def property_changed(self) -> None:
+        """
+        Кеш метаданных этого воркера перечитывается сразу, остальные воркеры перечитают его
+        по сообщению, которое диспетчер outbox отправит при доставке события.
+        """
+        await self.metadata.refresh()
+        if self.dispatcher:
+            self.dispatcher.notify()
 
     async def create_property(self, property_data: PropertyCreate) -> dict[str, Any]:
         property = await self.repo.add(property_data)
+        await self.property_changed()
+        return self.property_response(property)
 
-        if self.redis_cache:
-            cache_keys = await self.redis_cache.client.keys("catalog:*")
-            for key in cache_keys:
-                await self.redis_cache.delete(key)
+    async def add_property_values(self, property_uid: str, values: list[PropertyValueCreate]) -> dict[str, Any]:
+        property = await self.repo.add_values(property_uid, values)
+        await self.property_changed()
+        return self.property_response(property)
 
+    @staticmethod
+    def property_response(property: Property) -> dict[str, Any]:
         response = {
             "uid": property.uid,
             "name": property.name,
@@ -156,8 +264,9 @@ class PropertyService:
 
     async def delete_property(self, property_uid: str) -> None:
         await self.repo.delete(property_uid)
+        await self.property_changed()
 
-        if self.redis_cache:
-            cache_keys = await self.redis_cache.client.keys("catalog:*")
-            for key in cache_keys:
-                await self.redis_cache.delete(key)
+    async def delete_properties(self, bulk_delete: PropertyBulkDelete) -> BulkDeleteResponse:
+        deleted = await self.repo.delete_many(bulk_delete.uids)
+        await self.property_changed()
+        return BulkDeleteResponse(deleted=len(deleted))
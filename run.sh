@@ -28,5 +28,10 @@ echo "Seeding database..."
 python -m product_catalog.utils.seed_database
 echo "Database seeded with test data"
 
-echo "Starting FastAPI server..."
-uvicorn product_catalog.entrypoints.fastapi_app:get_app --host 0.0.0.0 --port 8000 --reload
\ No newline at end of file
+if [ "$1" == "--prod" ]; then
+    echo "Starting FastAPI server (production, workers from SERVER__WORKERS)..."
+    python -m product_catalog.entrypoints.server
+else
+    echo "Starting FastAPI server..."
+    uvicorn product_catalog.entrypoints.fastapi_app:get_app --factory --host 0.0.0.0 --port 8000 --reload
+fi
\ No newline at end of file
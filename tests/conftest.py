@@ -0,0 +1,91 @@
+"""
+Общие фикстуры. Тесты не требуют внешних сервисов: Redis отключается (REDIS__ENABLED=false), база - временный
+SQLite со схемой из миграций alembic. Тесты с фикстурой database_url дополнительно выполняются на PostgreSQL,
+если TEST_POSTGRES_URL указывает на одноразовую базу (она очищается перед каждым тестом), например
+TEST_POSTGRES_URL=postgresql+asyncpg://postgres@localhost/catalog_test.
+"""
+import asyncio
+import os
+
+import httpx
+import pytest
+from alembic import command
+from alembic.config import Config
+
+from product_catalog.config import get_settings
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def settings_env(monkeypatch):
+    monkeypatch.setenv("REDIS__ENABLED", "false")
+    monkeypatch.setenv("SERVER__OPENAPI_PATH", "")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+def migrate(url: str, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE__URL", url)
+    get_settings.cache_clear()
+    # Config без файла: env.py не перенастраивает логирование через fileConfig
+    config = Config()
+    config.set_main_option("script_location", os.path.join(ROOT_DIR, "product_catalog", "migrations"))
+    command.upgrade(config, "head")
+
+
+async def reset_postgres(url: str) -> None:
+    import asyncpg
+
+    connection = await asyncpg.connect(url.replace("postgresql+asyncpg://", "postgresql://"), timeout=5)
+    try:
+        await connection.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+    finally:
+        await connection.close()
+
+
+@pytest.fixture
+def sqlite_url(tmp_path, monkeypatch) -> str:
+    url = f"sqlite+aiosqlite:///{tmp_path / 'catalog.db'}"
+    migrate(url, monkeypatch)
+    return url
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def database_url(request, tmp_path, monkeypatch) -> str:
+    if request.param == "sqlite":
+        return request.getfixturevalue("sqlite_url")
+    if not POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    try:
+        asyncio.run(reset_postgres(POSTGRES_URL))
+    except (OSError, asyncio.TimeoutError) as e:
+        pytest.skip(f"PostgreSQL is not available: {e}")
+    migrate(POSTGRES_URL, monkeypatch)
+    return POSTGRES_URL
+
+
+@pytest.fixture
+async def engine(database_url):
+    from product_catalog.di.database import dispose_engines, get_engine
+
+    yield await get_engine()
+    await dispose_engines()
+
+
+@pytest.fixture
+async def client(sqlite_url):
+    from product_catalog.entrypoints.fastapi_app import get_app
+
+    app = get_app()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
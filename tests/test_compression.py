@@ -0,0 +1,73 @@
+import importlib.util
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+# модули, без которых кодировка недоступна и middleware выбирает следующую
+ENCODING_MODULES = {"br": "brotli", "zstd": "zstandard"}
+
+
+async def create_catalog(client, products: int = 30) -> None:
+    await client.post("/properties/", json={"uid": "weight", "name": "Вес", "type": "int"})
+    for index in range(products):
+        response = await client.post("/product/", json={
+            "uid": f"p{index:02d}", "name": f"Товар {index}", "properties": [{"uid": "weight", "value": index}]
+        })
+        assert response.status_code == 201
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", "gzip"),
+    ("br", "br"),
+    ("zstd", "zstd"),
+    ("gzip, br, zstd", "zstd"),
+    ("gzip, br", "br"),
+    ("*", "zstd"),
+    ("gzip;q=1.0, zstd;q=0.5", "gzip"),
+    ("zstd;q=0, gzip", "gzip"),
+    ("GZIP", "gzip"),
+    ("identity", None),
+    ("deflate", None),
+])
+async def test_encoding_is_negotiated(client, accept_encoding, expected):
+    if importlib.util.find_spec(ENCODING_MODULES.get(expected, "gzip")) is None:
+        pytest.skip(f"{expected} support is not installed")
+    await create_catalog(client)
+    plain = await client.get("/catalog/", params={"page_size": 30}, headers={"Accept-Encoding": "identity"})
+    assert len(plain.content) >= 1024
+
+    response = await client.get("/catalog/", params={"page_size": 30}, headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding") == expected
+    # httpx распаковывает тело: ответ тот же, а по сети передано меньше
+    assert response.json() == plain.json()
+    if expected:
+        assert int(response.headers["Content-Length"]) < len(plain.content)
+        assert response.headers["Vary"] == "Accept-Encoding"
+    else:
+        assert "Vary" not in response.headers
+
+
+async def test_small_responses_are_not_compressed(client):
+    await create_catalog(client, products=1)
+    response = await client.get("/catalog/", headers={"Accept-Encoding": "gzip"})
+    assert len(response.content) < 1024
+    assert "Content-Encoding" not in response.headers
+    assert "Vary" not in response.headers
+
+
+@pytest.fixture
+def minimum_size_env(monkeypatch):
+    monkeypatch.setenv("COMPRESSION__MINIMUM_SIZE", "10")
+    monkeypatch.setenv("COMPRESSION__ENCODINGS", '["gzip"]')
+
+
+async def test_minimum_size_and_encodings_are_configurable(minimum_size_env, client):
+    await create_catalog(client, products=1)
+    response = await client.get("/catalog/", headers={"Accept-Encoding": "zstd, gzip;q=0.5"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    # кодировки не из COMPRESSION__ENCODINGS не используются, даже если клиент их предпочитает
+    response = await client.get("/catalog/", headers={"Accept-Encoding": "zstd, br"})
+    assert "Content-Encoding" not in response.headers
@@ -0,0 +1,208 @@
+"""
+Колоночный снимок фасетов - вторая реализация get_filter_stats. Тесты проводят через снимок события создания,
+PATCH и массового удаления товаров и сравнивают его ответ с CatalogRepository.get_filter_stats на тех же данных:
+после инкрементального применения событий, после уплотнения в новое поколение и после загрузки поколения с диска.
+"""
+import os
+import random
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from product_catalog.adapters.repository import CatalogRepository, ProductRepository, PropertyRepository
+from product_catalog.config import FacetsConfig
+from product_catalog.domain.dto import (
+    ProductCreate, ProductPropertyCreate, ProductUpdate, PropertyCreate, PropertyValueCreate
+)
+from product_catalog.domain.models import Product, PropertyType
+
+pytest.importorskip("numpy")
+from product_catalog.adapters.facets import FacetSnapshot  # noqa: E402
+
+
+pytestmark = pytest.mark.anyio
+
+FILTERS = [
+    {},
+    {"color": ["color0"]},
+    {"color": ["color1", "color2"], "size": ["size0"]},
+    {"weight": {"from": 30}},
+    {"weight": {"from": 20, "to": 60}, "color": ["color3"]},
+    {"size": ["missing"]},
+    {"missing": ["color0"]},
+]
+
+
+def random_properties(rng: random.Random) -> list[ProductPropertyCreate]:
+    properties = []
+    for property_uid in rng.sample(["color", "size", "weight"], rng.randint(0, 3)):
+        if property_uid == "weight":
+            properties.append(ProductPropertyCreate(uid="weight", value=rng.randint(0, 100)))
+        else:
+            properties.append(ProductPropertyCreate(uid=property_uid, value_uid=f"{property_uid}{rng.randrange(4)}"))
+    return properties
+
+
+async def create_properties(engine) -> None:
+    async with AsyncSession(engine) as session:
+        repository = PropertyRepository(session)
+        for property_uid in ("color", "size"):
+            await repository.add(PropertyCreate(
+                uid=property_uid,
+                name=property_uid,
+                type=PropertyType.LIST,
+                values=[PropertyValueCreate(value_uid=f"{property_uid}{i}", value=str(i)) for i in range(4)],
+            ))
+        await repository.add(PropertyCreate(uid="weight", name="weight", type=PropertyType.INT))
+
+
+async def create_products(engine, rng: random.Random, uids: list[str]) -> None:
+    async with AsyncSession(engine) as session:
+        repository = ProductRepository(session)
+        for uid in uids:
+            await repository.add(ProductCreate(uid=uid, name=uid, properties=random_properties(rng)))
+
+
+async def change_products(engine, rng: random.Random) -> None:
+    """
+    Изменения, которые снимок применяет по событиям: PATCH (замена, добавление и удаление свойств),
+    массовое удаление, удаление одного товара и создание новых.
+    """
+    async with AsyncSession(engine) as session:
+        repository = ProductRepository(session)
+        for uid in ("p000", "p003", "p007"):
+            await repository.update(uid, ProductUpdate(version=1, properties=random_properties(rng)))
+        product = await repository.get("p010")
+        await repository.update("p010", ProductUpdate(
+            version=product.version, remove_properties=[prop.property_uid for prop in product.properties]
+        ))
+        await repository.delete_many(uids=["p001", "p002", "p020", "missing"])
+        await repository.delete_many(property_filters={"weight": {"from": 95}})
+        await repository.delete("p005")
+    await create_products(engine, rng, [f"n{i:03d}" for i in range(5)])
+
+
+async def assert_matches_database(engine, snapshot: FacetSnapshot) -> None:
+    async with AsyncSession(engine) as session:
+        repository = CatalogRepository(session)
+        for property_filters in FILTERS:
+            expected = await repository.get_filter_stats(property_filters=property_filters)
+            assert await snapshot.get_filter_stats(property_filters) == expected, property_filters
+
+
+@pytest.fixture
+async def catalog(engine) -> random.Random:
+    rng = random.Random(0)
+    await create_properties(engine)
+    await create_products(engine, rng, [f"p{i:03d}" for i in range(40)])
+    return rng
+
+
+def make_snapshot(engine, path: str, compact_ratio: float) -> FacetSnapshot:
+    config = FacetsConfig(enabled=True, path=path, compact_ratio=compact_ratio)
+    return FacetSnapshot(async_sessionmaker(engine, class_=AsyncSession), config)
+
+
+async def test_snapshot_matches_database_after_build(engine, catalog, tmp_path):
+    snapshot = make_snapshot(engine, str(tmp_path), compact_ratio=100)
+    assert await snapshot.get_filter_stats({}) is None
+    await snapshot.refresh()
+    await assert_matches_database(engine, snapshot)
+
+
+async def test_events_are_applied_incrementally(engine, catalog, tmp_path):
+    snapshot = make_snapshot(engine, str(tmp_path), compact_ratio=100)
+    await snapshot.refresh()
+    base = snapshot.state.base
+
+    await change_products(engine, catalog)
+    await snapshot.refresh()
+    # без пересборки: основной снимок тот же, изменённые товары - в дельте
+    assert snapshot.state.base.products is base.products
+    assert len(snapshot.state.delta) > 0
+    assert not snapshot.state.base.alive.all()
+    await assert_matches_database(engine, snapshot)
+
+    # повторное изменение товаров, строки которых уже в дельте: старые строки дельты заменяются
+    async with AsyncSession(engine) as session:
+        repository = ProductRepository(session)
+        changed = (await session.execute(
+            select(Product.uid).where(Product.uid.in_(["p000", "p003", "p007", "n000", "n001"]))
+        )).scalars().all()
+        assert len(changed) >= 2
+        for uid in changed:
+            product = await repository.get(uid)
+            await repository.update(uid, ProductUpdate(
+                version=product.version,
+                properties=[ProductPropertyCreate(uid="color", value_uid="color3")],
+                remove_properties=[prop.property_uid for prop in product.properties if prop.property_uid != "color"],
+            ))
+        await repository.delete_many(uids=["n002"])
+    await snapshot.refresh()
+    await assert_matches_database(engine, snapshot)
+
+    # уплотнение в памяти не меняет результат
+    snapshot.state = snapshot.state.compacted()
+    await snapshot.refresh()
+    await assert_matches_database(engine, snapshot)
+
+
+async def test_compaction_and_reload(engine, catalog, tmp_path):
+    snapshot = make_snapshot(engine, str(tmp_path), compact_ratio=0)
+    await snapshot.refresh()
+    first_generation = snapshot.state.event_id
+
+    await change_products(engine, catalog)
+    await snapshot.refresh()
+    # дельта превысила порог: живые строки слиты в новое поколение на диске
+    assert snapshot.state.event_id > first_generation
+    assert len(snapshot.state.delta) == 0
+    assert snapshot.state.base.alive.all()
+    assert f"{snapshot.state.event_id:012d}" in os.listdir(tmp_path)
+    await assert_matches_database(engine, snapshot)
+
+    # другой воркер загружает последнее поколение с диска, без пересборки из БД
+    reloaded = make_snapshot(engine, str(tmp_path), compact_ratio=0)
+    await reloaded.refresh()
+    assert reloaded.state.event_id == snapshot.state.event_id
+    assert reloaded.state.built_at == snapshot.state.built_at
+    await assert_matches_database(engine, reloaded)
+
+    # изменения после загрузки применяются поверх загруженного поколения
+    await create_products(engine, catalog, ["late"])
+    async with AsyncSession(engine) as session:
+        await ProductRepository(session).delete_many(uids=["p030", "p031"])
+    await reloaded.refresh()
+    await assert_matches_database(engine, reloaded)
+
+
+async def test_property_change_rebuilds_snapshot(engine, catalog, tmp_path):
+    snapshot = make_snapshot(engine, str(tmp_path), compact_ratio=100)
+    await snapshot.refresh()
+
+    async with AsyncSession(engine) as session:
+        await PropertyRepository(session).add_values("size", [PropertyValueCreate(value_uid="size9", value="9")])
+        await ProductRepository(session).update(
+            "p004", ProductUpdate(version=1, properties=[ProductPropertyCreate(uid="size", value_uid="size9")])
+        )
+    await snapshot.refresh()
+    assert "size9" in snapshot.state.value_index
+    assert len(snapshot.state.delta) == 0
+    await assert_matches_database(engine, snapshot)
+    assert (await snapshot.get_filter_stats({"size": ["size9"]}))["count"] == 1
+
+
+async def test_bulk_delete_by_filter_matches_snapshot_mask(engine, catalog, tmp_path):
+    # тот же фильтр выбирает в снимке те же товары, которые удаляет bulk delete
+    snapshot = make_snapshot(engine, str(tmp_path), compact_ratio=100)
+    await snapshot.refresh()
+    property_filters = {"color": ["color0", "color1"], "weight": {"to": 50}}
+    expected = (await snapshot.get_filter_stats(property_filters))["count"]
+
+    async with AsyncSession(engine) as session:
+        deleted = await ProductRepository(session).delete_many(property_filters=property_filters)
+    assert len(deleted) == expected
+    await snapshot.refresh()
+    assert (await snapshot.get_filter_stats(property_filters))["count"] == 0
+    await assert_matches_database(engine, snapshot)
@@ -0,0 +1,235 @@
+import asyncio
+from typing import Any, Optional
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from product_catalog.adapters.metadata import PropertyMetadataCache
+from product_catalog.adapters.repository import CatalogRepository
+from product_catalog.config import DatabaseConfig, LimitsConfig, MetadataConfig
+from product_catalog.di.database import create_engine_from_config, get_read_engine
+from product_catalog.domain.exceptions import OverloadedError, StatementTimeoutError
+from product_catalog.domain.query import CatalogQuery
+from product_catalog.service_layer.limits import ConcurrencyLimiter, SingleFlight
+from product_catalog.service_layer.services import CatalogService
+
+
+pytestmark = pytest.mark.anyio
+
+# бесконечный рекурсивный CTE: выполняется, пока его не прервёт таймаут
+ENDLESS_QUERY = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+
+
+async def test_limiter_rejects_when_slots_are_busy():
+    limiter = ConcurrencyLimiter(LimitsConfig(concurrency={"catalog": 1}, queue_timeout=0.01, retry_after=7))
+    async with limiter.slot("catalog"):
+        with pytest.raises(OverloadedError) as error:
+            async with limiter.slot("catalog"):
+                pass
+        assert error.value.retry_after == 7
+        # операции без лимита не ограничены
+        async with limiter.slot("other"):
+            pass
+    # слот освобождён
+    async with limiter.slot("catalog"):
+        pass
+
+
+async def test_limiter_waits_for_slot_within_queue_timeout():
+    limiter = ConcurrencyLimiter(LimitsConfig(concurrency={"catalog": 1}, queue_timeout=1))
+    order = []
+
+    async def request(name: str, hold: float) -> None:
+        async with limiter.slot("catalog"):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    await asyncio.gather(request("first", 0.05), request("second", 0))
+    assert order == ["first", "second"]
+
+
+@pytest.fixture
+def saturated_limits(monkeypatch):
+    # слотов нет: любой запрос каталога ждёт queue_timeout и получает 503
+    monkeypatch.setenv("LIMITS__CONCURRENCY", '{"catalog": 0, "filter_stats": 0}')
+    monkeypatch.setenv("LIMITS__QUEUE_TIMEOUT", "0.01")
+    monkeypatch.setenv("LIMITS__RETRY_AFTER", "7")
+
+
+async def test_saturated_endpoint_responds_503_with_retry_after(saturated_limits, client):
+    for path in ("/catalog/", "/catalog/filter/"):
+        response = await client.get(path)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "7"
+        assert "concurrent" in response.json()["detail"]
+    # операции без лимита продолжают работать
+    assert (await client.get("/product/missing")).status_code == 404
+
+
+async def test_statement_timeout_is_converted_and_connection_stays_usable(database_url):
+    engine = create_engine_from_config(DatabaseConfig(url=database_url, statement_timeout=0.2), read_only=True)
+    try:
+        async with engine.connect() as conn:
+            with pytest.raises(StatementTimeoutError) as error:
+                await conn.execute(text(ENDLESS_QUERY))
+            assert error.value.retry_after == LimitsConfig().retry_after
+            await conn.rollback()
+
+            # срок прерванного запроса не переходит на следующие запросы того же соединения
+            await asyncio.sleep(0.3)
+            bounded = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 20000) " \
+                      "SELECT count(*) FROM c"
+            assert (await conn.execute(text(bounded))).scalar() == 20000
+            assert (await conn.execute(text("SELECT 1"))).scalar() == 1
+    finally:
+        await engine.dispose()
+
+
+async def test_write_engine_has_no_statement_timeout(database_url):
+    engine = create_engine_from_config(DatabaseConfig(url=database_url, statement_timeout=0.01))
+    try:
+        async with engine.connect() as conn:
+            bounded = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 300000) " \
+                      "SELECT count(*) FROM c"
+            assert (await conn.execute(text(bounded))).scalar() == 300000
+    finally:
+        await engine.dispose()
+
+
+class StaleCache:
+    """
+    Кеш страниц, в котором свежая версия уже инвалидирована, а копия для перегрузки осталась.
+    """
+    def __init__(self):
+        self.stale: dict[str, Any] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        return None
+
+    async def get_stale(self, key: str) -> Optional[Any]:
+        return self.stale.get(key)
+
+    async def set(self, key: str, value: Any, tags=(), capped: bool = False) -> None:
+        self.stale[key] = value
+
+
+async def test_overloaded_catalog_serves_stale_page(engine):
+    metadata = PropertyMetadataCache(
+        async_sessionmaker(await get_read_engine(), class_=AsyncSession), None, MetadataConfig()
+    )
+    await metadata.refresh()
+    limiter = ConcurrencyLimiter(LimitsConfig(concurrency={"catalog": 1}, queue_timeout=0.01))
+    cache = StaleCache()
+    query = CatalogQuery(page_size=5)
+    async with AsyncSession(await get_read_engine()) as session:
+        service = CatalogService(CatalogRepository(session, metadata), cache, metadata, limiter=limiter)
+        page = await service.get_catalog(query)
+
+        async with limiter.slot("catalog"):
+            # все слоты заняты: отдаётся сохранённая копия страницы вместо 503
+            assert await service.get_catalog(query) == page
+            # для страницы без копии - 503
+            with pytest.raises(OverloadedError):
+                await service.get_catalog(CatalogQuery(page_size=6))
+
+
+async def test_single_flight_runs_concurrent_calls_once():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def load(value: str) -> dict:
+        calls.append(value)
+        await asyncio.sleep(0.02)
+        return {"value": value}
+
+    results = await asyncio.gather(
+        *(single_flight.run("catalog", "a", lambda: load("a")) for _ in range(5)),
+        single_flight.run("catalog", "b", lambda: load("b")),
+        single_flight.run("filter_stats", "a", lambda: load("a")),
+    )
+    assert calls == ["a", "b", "a"]
+    assert results == [{"value": "a"}] * 5 + [{"value": "b"}, {"value": "a"}]
+    # завершённый запрос не кешируется: следующий вызов выполняется снова
+    await single_flight.run("catalog", "a", lambda: load("a"))
+    assert calls == ["a", "b", "a", "a"]
+
+
+async def test_single_flight_shares_errors():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def fail() -> None:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        raise OverloadedError("Too many concurrent 'catalog' requests")
+
+    results = await asyncio.gather(
+        *(single_flight.run("catalog", "a", fail) for _ in range(3)), return_exceptions=True
+    )
+    assert calls == 1
+    assert all(isinstance(result, OverloadedError) for result in results)
+
+
+async def test_single_flight_waiters_run_call_when_leader_is_cancelled():
+    single_flight = SingleFlight()
+    started = asyncio.Event()
+    calls = []
+
+    async def load(name: str) -> str:
+        calls.append(name)
+        started.set()
+        await asyncio.sleep(0.05)
+        return name
+
+    leader = asyncio.create_task(single_flight.run("catalog", "a", lambda: load("leader")))
+    await started.wait()
+    waiter = asyncio.create_task(single_flight.run("catalog", "a", lambda: load("waiter")))
+    await asyncio.sleep(0)
+    leader.cancel()
+    # ожидающий запрос не отменяется вместе с ведущим, а выполняется сам
+    assert await waiter == "waiter"
+    assert calls == ["leader", "waiter"]
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    # отмена ожидающего не затрагивает ведущий запрос
+    started.clear()
+    leader = asyncio.create_task(single_flight.run("catalog", "a", lambda: load("second")))
+    await started.wait()
+    waiter = asyncio.create_task(single_flight.run("catalog", "a", lambda: load("unused")))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    assert await leader == "second"
+    assert waiter.cancelled()
+
+
+async def test_concurrent_catalog_misses_read_database_once(engine, monkeypatch):
+    metadata = PropertyMetadataCache(
+        async_sessionmaker(await get_read_engine(), class_=AsyncSession), None, MetadataConfig()
+    )
+    await metadata.refresh()
+    get_all = CatalogRepository.get_all
+    calls = 0
+
+    async def counting_get_all(self, *args, **kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return await get_all(self, *args, **kwargs)
+
+    monkeypatch.setattr(CatalogRepository, "get_all", counting_get_all)
+    single_flight = SingleFlight()
+
+    async def request(query: CatalogQuery) -> dict:
+        # каждый запрос со своей сессией и сервисом, как в API; общий - только SingleFlight воркера
+        async with AsyncSession(await get_read_engine()) as session:
+            service = CatalogService(
+                CatalogRepository(session, metadata), None, metadata, single_flight=single_flight
+            )
+            return await service.get_catalog(query)
+
+    pages = await asyncio.gather(*(request(CatalogQuery(page_size=5)) for _ in range(4)), request(CatalogQuery()))
+    assert calls == 2
+    assert pages[0] == pages[3]
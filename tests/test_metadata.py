@@ -0,0 +1,88 @@
+"""
+Два экземпляра PropertyMetadataCache над одной БД - два воркера: свойство создаётся или удаляется "в первом",
+второй только что перечитал снимок и не получал сообщения об изменении.
+"""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from product_catalog.adapters.metadata import PropertyMetadataCache
+from product_catalog.adapters.repository import ProductRepository, PropertyRepository
+from product_catalog.config import MetadataConfig
+from product_catalog.di.database import get_read_engine
+from product_catalog.domain.dto import ProductCreate, ProductPropertyCreate, PropertyCreate, PropertyValueCreate
+from product_catalog.domain.models import PropertyType
+from product_catalog.service_layer.services import build_product_responses
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def workers(engine) -> tuple[PropertyMetadataCache, PropertyMetadataCache]:
+    # как в приложении, метаданные читаются через пул чтения: единственное соединение записи занято сессией товара
+    session_maker = async_sessionmaker(await get_read_engine(), class_=AsyncSession)
+    # интервал больше длительности теста: снимок не перечитывается по времени
+    config = MetadataConfig(miss_refresh_interval=60)
+    first, second = (PropertyMetadataCache(session_maker, None, config) for _ in range(2))
+    await first.refresh()
+    await second.refresh()
+    return first, second
+
+
+async def create_color(engine, metadata: PropertyMetadataCache) -> None:
+    async with AsyncSession(engine) as session:
+        await PropertyRepository(session).add(PropertyCreate(
+            uid="color",
+            name="Цвет",
+            type=PropertyType.LIST,
+            values=[PropertyValueCreate(value_uid="red", value="Красный")],
+        ))
+    await metadata.refresh()
+
+
+def red_product(uid: str) -> ProductCreate:
+    return ProductCreate(uid=uid, name="Товар", properties=[ProductPropertyCreate(uid="color", value_uid="red")])
+
+
+async def test_property_created_in_other_worker_is_found(engine, workers):
+    first, second = workers
+    await create_color(engine, first)
+
+    snapshot = await second.ensure(["color"], ["red"])
+    assert snapshot.properties["color"].name == "Цвет"
+    assert snapshot.values["red"].value == "Красный"
+
+
+async def test_unknown_uid_does_not_reload_snapshot(engine, workers):
+    _, second = workers
+    version = second.snapshot.version
+    for _ in range(3):
+        snapshot = await second.ensure(["missing"], ["missing_value"])
+    assert snapshot.version == version
+
+
+async def test_product_written_in_other_worker_keeps_new_property(engine, workers):
+    first, second = workers
+    await create_color(engine, first)
+
+    # запись через второй воркер: проверка свойств не должна давать ложный 400
+    async with AsyncSession(engine) as session:
+        product = await ProductRepository(session, second).add(red_product("p1"))
+        [response] = await build_product_responses([product], second)
+    assert [(prop.uid, prop.name, prop.value) for prop in response.properties] == [("color", "Цвет", "Красный")]
+
+
+async def test_write_with_property_deleted_in_other_worker_is_rejected(engine, workers):
+    first, second = workers
+    await create_color(engine, first)
+    await second.refresh()
+
+    async with AsyncSession(engine) as session:
+        await PropertyRepository(session).delete_many(["color"])
+    await first.refresh()
+
+    # снимок второго воркера ещё содержит свойство, но запись проверяется по БД: ValueError (400), а не ошибка FK
+    assert "color" in second.snapshot.properties
+    async with AsyncSession(engine) as session:
+        with pytest.raises(ValueError, match="color"):
+            await ProductRepository(session, second).add(red_product("p1"))
@@ -0,0 +1,64 @@
+import copy
+
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def scrape(client) -> dict[tuple[str, frozenset], float]:
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    return {
+        (sample.name, frozenset(sample.labels.items())): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+
+
+def labels(**values: str) -> frozenset:
+    return frozenset(values.items())
+
+
+async def test_request_metrics_are_labelled_by_route_template(client):
+    before = await scrape(client)
+    assert (await client.get("/product/missing")).status_code == 404
+    assert (await client.get("/catalog/")).status_code == 200
+    assert (await client.get("/no/such/route")).status_code == 404
+    after = await scrape(client)
+
+    def delta(name: str, sample_labels: frozenset) -> float:
+        return after.get((name, sample_labels), 0.0) - before.get((name, sample_labels), 0.0)
+
+    # шаблон маршрута, а не путь запроса: uid товара не размножает ряды метрик
+    product = labels(method="GET", route="/product/{product_uid}", status="404")
+    assert delta("http_request_duration_seconds_count", product) == 1
+    assert ("http_request_duration_seconds_count", labels(method="GET", route="/product/missing", status="404")) \
+        not in after
+    assert delta("http_request_duration_seconds_count", labels(method="GET", route="unmatched", status="404")) == 1
+
+    catalog = labels(method="GET", route="/catalog/", status="200")
+    assert delta("http_request_duration_seconds_count", catalog) == 1
+    # страница каталога читается из БД: количество и время SQL-запросов учтены в запросе
+    assert delta("http_request_db_queries_count", labels(route="/catalog/")) == 1
+    assert delta("http_request_db_queries_sum", labels(route="/catalog/")) >= 2
+    assert delta("http_request_db_seconds_sum", labels(route="/catalog/")) > 0
+
+    assert after[("db_pool_size", labels(engine="write"))] == 1
+
+
+async def test_failed_statements_leave_no_state_on_connection(engine):
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        connection_info = copy.deepcopy((await conn.get_raw_connection()).info)
+        for _ in range(3):
+            with pytest.raises(DBAPIError):
+                await conn.execute(text("SELECT * FROM no_such_table"))
+            await conn.rollback()
+        await conn.execute(text("SELECT 1"))
+        # без after_cursor_execute для упавших запросов в соединении пула не должно копиться состояние
+        assert dict((await conn.get_raw_connection()).info) == connection_info
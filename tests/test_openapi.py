@@ -0,0 +1,113 @@
+import json
+import os
+import subprocess
+import sys
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI, Query
+from pydantic import create_model
+
+from product_catalog.config import get_settings
+from product_catalog.entrypoints import openapi
+from product_catalog.entrypoints.fastapi_app import OPENAPI_SIGNATURE_KEY, get_app, openapi_signature
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def schema_path(sqlite_url, tmp_path, monkeypatch) -> str:
+    path = str(tmp_path / "openapi.json")
+    monkeypatch.setattr(sys, "argv", ["openapi", path])
+    openapi.main()
+    monkeypatch.setenv("SERVER__OPENAPI_PATH", path)
+    get_settings.cache_clear()
+    return path
+
+
+def test_prebuilt_schema_is_used(schema_path):
+    app = get_app()
+    assert app.openapi_schema is not None
+    assert OPENAPI_SIGNATURE_KEY not in app.openapi_schema
+    prebuilt = app.openapi_schema
+    app.openapi_schema = None
+    assert app.openapi() == prebuilt
+
+
+@pytest.mark.parametrize("signature", [None, "0" * 64])
+def test_schema_from_other_version_is_ignored(schema_path, signature):
+    with open(schema_path, encoding="utf-8") as f:
+        schema = json.load(f)
+    if signature is None:
+        del schema[OPENAPI_SIGNATURE_KEY]
+    else:
+        schema[OPENAPI_SIGNATURE_KEY] = signature
+    schema["info"]["title"] = "stale"
+    with open(schema_path, "w", encoding="utf-8") as f:
+        json.dump(schema, f)
+
+    app = get_app()
+    assert app.openapi_schema is None
+    assert app.openapi()["info"]["title"] != "stale"
+
+
+def build_app(model: type, limit_default: int = 10) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/", response_model=model)
+    async def items(limit: int = Query(limit_default)):
+        pass
+
+    return app
+
+
+def page_model(**item_fields) -> type:
+    # одноимённые модели разных версий кода: отличаются только поля вложенной модели
+    item = create_model("Item", uid=(str, ...), **item_fields)
+    return create_model("Page", items=(list[item], ...))
+
+
+def test_signature_tracks_models_and_parameters_not_only_paths():
+    # набор путей одинаков: прежняя проверка по путям приняла бы устаревшую схему
+    signature = openapi_signature(build_app(page_model()))
+    assert openapi_signature(build_app(page_model())) == signature
+    assert openapi_signature(build_app(page_model(name=(Optional[str], None)))) != signature
+    assert openapi_signature(build_app(page_model(), limit_default=20)) != signature
+
+
+def test_signature_tracks_constraints_and_handlers():
+    signature = openapi_signature(build_app(page_model()))
+    constrained = FastAPI()
+
+    @constrained.get("/items/", response_model=page_model())
+    async def items(limit: int = Query(10, le=100)):
+        pass
+
+    assert openapi_signature(constrained) != signature
+
+    renamed = FastAPI()
+
+    @renamed.get("/items/", response_model=page_model())
+    async def list_items(limit: int = Query(10)):
+        pass
+
+    # другое имя обработчика - другой operationId в схеме
+    assert openapi_signature(renamed) != signature
+
+
+def test_signature_is_stable_across_processes(sqlite_url):
+    code = (
+        "from product_catalog.entrypoints.fastapi_app import get_app, openapi_signature; "
+        "print(openapi_signature(get_app()))"
+    )
+    env = {**os.environ, "REDIS__ENABLED": "false", "SERVER__OPENAPI_PATH": ""}
+    # другой порядок хешей строк в новом процессе не меняет подпись
+    signatures = {
+        subprocess.run(
+            [sys.executable, "-c", code], env={**env, "PYTHONHASHSEED": seed}, cwd=ROOT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        for seed in ("1", "2")
+    }
+    assert signatures == {openapi_signature(get_app())}
@@ -0,0 +1,160 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from product_catalog.adapters.redis_cache import NAME_TAG, product_tag, property_tag
+from product_catalog.adapters.repository import OutboxRepository
+from product_catalog.config import OutboxConfig
+from product_catalog.domain.models import CatalogEvent, utc_now
+from product_catalog.service_layer.dispatcher import OutboxDispatcher
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_events(engine, count: int) -> list[int]:
+    async with AsyncSession(engine) as session:
+        for index in range(count):
+            OutboxRepository(session).add("product.created", f"p{index}")
+        await session.commit()
+        events = await OutboxRepository(session).claim_pending("test", limit=count, lease_seconds=30)
+        return [event.id for event in events]
+
+
+async def test_event_ids_are_not_reused_after_prune(engine):
+    first = await add_events(engine, 3)
+    async with AsyncSession(engine) as session:
+        await OutboxRepository(session).mark_dispatched(first)
+        # все отправленные события старше -1 секунды: удаляются все, включая событие с наибольшим id
+        await OutboxRepository(session).prune(retention_seconds=-1)
+
+    second = await add_events(engine, 2)
+    assert min(second) > max(first)
+
+
+class RecordingCache:
+    """
+    Записывает обращения диспетчера к Redis.
+    """
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls: list[tuple] = []
+        self.published: list[dict[str, str]] = []
+
+    async def delete_pattern(self, pattern: str) -> int:
+        self.calls.append(("delete_pattern", pattern))
+        return 0
+
+    async def invalidate_tags(self, tags) -> int:
+        self.calls.append(("invalidate_tags", set(tags)))
+        return 0
+
+    async def publish_events(self, stream: str, events: list[dict[str, str]], maxlen: int) -> None:
+        if self.fail:
+            raise ConnectionError("Redis is unavailable")
+        self.published.extend(events)
+
+
+async def dispatch(engine, *events: tuple) -> list[tuple]:
+    async with AsyncSession(engine) as session:
+        for event_type, entity_uid, payload in events:
+            OutboxRepository(session).add(event_type, entity_uid, payload)
+        await session.commit()
+    cache = RecordingCache()
+    dispatcher = OutboxDispatcher(async_sessionmaker(engine, class_=AsyncSession), cache, OutboxConfig())
+    assert await dispatcher.dispatch_once() == len(events)
+    assert [event["uid"] for event in cache.published] == [entity_uid for _, entity_uid, _ in events]
+    return cache.calls
+
+
+async def test_product_update_invalidates_by_tags(engine):
+    calls = await dispatch(
+        engine,
+        ("product.updated", "p1", {"properties": ["color"], "name_changed": False, "version": 2}),
+        ("product.updated", "p2", {"properties": ["size", "weight"], "name_changed": True, "version": 5}),
+    )
+    assert calls == [("invalidate_tags", {
+        product_tag("p1"), product_tag("p2"),
+        property_tag("color"), property_tag("size"), property_tag("weight"),
+        NAME_TAG,
+    })]
+
+
+@pytest.mark.parametrize("event_type", ["product.created", "product.deleted", "products.deleted", "property.created"])
+async def test_other_events_clear_whole_catalog_cache(engine, event_type):
+    # в пачке с изменением товара событие, меняющее состав страниц, сбрасывает весь кеш каталога
+    calls = await dispatch(
+        engine,
+        ("product.updated", "p1", {"properties": ["color"], "name_changed": False, "version": 2}),
+        (event_type, "p2", {}),
+    )
+    assert calls == [("delete_pattern", "catalog:*")]
+
+
+def make_dispatcher(engine, cache: RecordingCache, batch_size: int = 500) -> OutboxDispatcher:
+    config = OutboxConfig(batch_size=batch_size, lease_seconds=30)
+    return OutboxDispatcher(async_sessionmaker(engine, class_=AsyncSession), cache, config)
+
+
+async def add_created(engine, uids: list[str]) -> None:
+    async with AsyncSession(engine) as session:
+        for uid in uids:
+            OutboxRepository(session).add("product.created", uid)
+        await session.commit()
+
+
+async def test_events_of_crashed_worker_are_redelivered_after_lease(engine):
+    await add_created(engine, ["p0", "p1", "p2"])
+    crashed = make_dispatcher(engine, RecordingCache(fail=True))
+    with pytest.raises(ConnectionError):
+        await crashed.dispatch_once()
+
+    # пока аренда упавшего воркера не истекла, события не выдаются повторно
+    cache = RecordingCache()
+    dispatcher = make_dispatcher(engine, cache)
+    assert await dispatcher.dispatch_once() == 0
+
+    await add_created(engine, ["p3"])
+    assert await dispatcher.dispatch_once() == 1
+    async with AsyncSession(engine) as session:
+        await session.execute(
+            update(CatalogEvent)
+            .where(CatalogEvent.dispatched_at.is_(None))
+            .values(claimed_at=utc_now() - timedelta(seconds=31))
+        )
+        await session.commit()
+    assert await dispatcher.dispatch_once() == 3
+    assert await dispatcher.dispatch_once() == 0
+    assert [event["uid"] for event in cache.published] == ["p3", "p0", "p1", "p2"]
+
+
+async def test_events_are_delivered_in_order(engine):
+    uids = [f"p{index}" for index in range(7)]
+    await add_created(engine, uids)
+    cache = RecordingCache()
+    dispatcher = make_dispatcher(engine, cache, batch_size=3)
+    assert [await dispatcher.dispatch_once() for _ in range(4)] == [3, 3, 1, 0]
+    assert [event["uid"] for event in cache.published] == uids
+    ids = [int(event["id"]) for event in cache.published]
+    assert ids == sorted(ids)
+
+
+async def test_dispatch_loop_retries_failed_batch(engine):
+    await add_created(engine, ["p0", "p1"])
+    cache = RecordingCache(fail=True)
+    dispatcher = make_dispatcher(engine, cache)
+    dispatcher.config.poll_interval = 0.01
+    dispatcher.config.lease_seconds = 0
+    dispatcher.start()
+    try:
+        await asyncio.sleep(0.05)
+        assert cache.published == []
+        # после восстановления Redis те же события доставляются по истечении аренды, без потерь и дублей
+        cache.fail = False
+        await asyncio.sleep(0.1)
+    finally:
+        await dispatcher.stop()
+    assert [event["uid"] for event in cache.published] == ["p0", "p1"]
@@ -0,0 +1,91 @@
+import anyio
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_products(client) -> None:
+    await client.post("/properties/", json={"uid": "weight", "name": "Вес", "type": "int"})
+    await client.post("/properties/", json={
+        "uid": "color", "name": "Цвет", "type": "list",
+        "values": [{"value_uid": "red", "value": "Красный"}, {"value_uid": "blue", "value": "Синий"}],
+    })
+    for index in range(5):
+        response = await client.post("/product/", json={
+            "uid": f"p{index}",
+            "name": f"Товар {index}",
+            "properties": [
+                {"uid": "weight", "value": index * 50},
+                {"uid": "color", "value_uid": "red" if index % 2 else "blue"},
+            ],
+        })
+        assert response.status_code == 201
+
+
+async def product_count(client) -> int:
+    return (await client.get("/catalog/")).json()["count"]
+
+
+@pytest.mark.parametrize("property_filters", [
+    {"weight": {"gte": 100}},
+    {"weight": {}},
+    {"weight": {"from": 100, "too": 150}},
+    {"weight": {"from": "100"}},
+    {"weight": {"from": True}},
+    {"color": []},
+    {"color": ["red", {"from": 1}]},
+    {"color": {"values": ["red"]}},
+])
+async def test_bulk_delete_with_malformed_filter_deletes_nothing(client, property_filters):
+    await create_products(client)
+    response = await client.post("/product/bulk-delete", json={"property_filters": property_filters})
+    assert response.status_code == 400
+    assert await product_count(client) == 5
+
+
+async def test_bulk_delete_rejects_unknown_range_bound_with_400(client):
+    await create_products(client)
+    response = await client.post("/product/bulk-delete", json={"property_filters": {"weight": {"gte": 100}}})
+    assert response.status_code == 400
+    assert "gte" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("property_filters, remaining", [
+    ({"weight": {"from": 100}}, {"p0", "p1"}),
+    ({"weight": {"from": 50, "to": 100}}, {"p0", "p3", "p4"}),
+    ({"color": ["red"]}, {"p0", "p2", "p4"}),
+    ({"color": ["red"], "weight": {"to": 50}}, {"p0", "p2", "p3", "p4"}),
+])
+async def test_bulk_delete_by_filters(client, property_filters, remaining):
+    await create_products(client)
+    response = await client.post("/product/bulk-delete", json={"property_filters": property_filters})
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 5 - len(remaining)}
+    products = (await client.get("/catalog/", params={"page_size": 100})).json()["products"]
+    assert {product["uid"] for product in products} == remaining
+
+
+async def test_update_with_stale_version_responds_409(client):
+    await create_products(client)
+    response = await client.patch("/product/p1", json={"version": 1, "name": "Новое название"})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+    # повтор с версией из старого ответа не перезаписывает изменение
+    response = await client.patch("/product/p1", json={"version": 1, "name": "Другое название"})
+    assert response.status_code == 409
+    assert "version 2" in response.json()["detail"]
+    assert (await client.get("/product/p1")).json()["name"] == "Новое название"
+
+
+async def test_product_is_read_while_writer_is_busy(client):
+    from product_catalog.di.database import get_engine
+
+    await create_products(client)
+    # единственное соединение записи занято: чтение товара идёт через пул чтения и не ждёт его
+    async with (await get_engine()).connect():
+        with anyio.fail_after(5):
+            response = await client.get("/product/p1")
+    assert response.status_code == 200
+    assert response.json()["name"] == "Товар 1"
@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from product_catalog.adapters.profiling import RequestProfile, current_profile
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def slow_query_env(monkeypatch):
+    # порог читается при создании движка: фикстура должна стоять до engine
+    monkeypatch.setenv("PROFILING__SLOW_QUERY_MS", "0")
+
+
+async def test_slow_query_plan_does_not_disturb_the_statement(slow_query_env, engine, caplog):
+    caplog.set_level(logging.WARNING, logger="product_catalog.slow_query")
+    async with AsyncSession(engine) as session:
+        await session.execute(text("CREATE TABLE profiled (id INTEGER PRIMARY KEY)"))
+        await session.execute(text("INSERT INTO profiled (id) VALUES (1), (2), (3)"))
+        result = await session.execute(text("SELECT id FROM profiled WHERE id >= :id ORDER BY id"), {"id": 2})
+        # EXPLAIN выполняется до того, как приложение прочитало строки запроса
+        assert result.scalars().all() == [2, 3]
+        # транзакция запроса после EXPLAIN остаётся рабочей
+        assert (await session.execute(text("SELECT count(*) FROM profiled"))).scalar() == 3
+
+    slow = [record.getMessage() for record in caplog.records if "FROM profiled" in record.getMessage()]
+    assert any("WHERE id >=" in message and "QUERY PLAN:" in message for message in slow)
+    # план не логируется как отдельный медленный запрос
+    assert not any(message.startswith("Slow query") and ": EXPLAIN" in message for message in slow)
+    assert all("EXPLAIN failed" not in message for message in slow)
+
+
+async def test_profiled_statements_record_rows(engine):
+    profile = RequestProfile("GET", "/test")
+    token = current_profile.set(profile)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE profiled (id INTEGER PRIMARY KEY)"))
+            await conn.execute(text("INSERT INTO profiled (id) VALUES (1), (2), (3)"))
+            await conn.execute(text("DELETE FROM profiled WHERE id > 1"))
+    finally:
+        current_profile.reset(token)
+
+    statements = [entry for entry in profile.events if entry["type"] == "sql"]
+    assert [entry["rows"] for entry in statements[-2:]] == [3, 2]
+
+
+@pytest.fixture
+def profiling_env(monkeypatch):
+    monkeypatch.setenv("PROFILING__ENABLED", "true")
+
+
+async def test_profiled_catalog_selects_record_rows(profiling_env, client):
+    await client.post("/properties/", json={"uid": "weight", "name": "Вес", "type": "int"})
+    for index in range(3):
+        await client.post("/product/", json={
+            "uid": f"p{index}", "name": f"Товар {index}", "properties": [{"uid": "weight", "value": index}]
+        })
+
+    for path, rows in (("/catalog/", [1, 3]), ("/catalog/filter/", [1, 1]), ("/product/p1", [1])):
+        response = await client.get(path, headers={"X-Profile": "1"})
+        assert response.status_code == 200
+        profile = (await client.get(f"/debug/profiles/{response.headers['X-Profile-Id']}")).json()
+        selects = [
+            event for event in profile["events"]
+            if event["type"] == "sql" and event["statement"].lstrip().upper().startswith("SELECT")
+        ]
+        # на SQLite драйвер не сообщает rowcount для SELECT: строки отмечает репозиторий, прочитав результат
+        assert [event["rows"] for event in selects] == rows, path
@@ -0,0 +1,63 @@
+"""
+Форма страницы каталога: fields и compact применяются к готовой странице (domain.projection).
+"""
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_fields_keep_only_requested_product_fields(client):
+    for index in range(3):
+        await client.post("/product/", json={"uid": f"p{index}", "name": f"Товар {index}", "properties": []})
+    full = (await client.get("/catalog/")).json()
+    response = await client.get("/catalog/", params={"fields": "name, uid"})
+    assert response.status_code == 200
+    page = response.json()
+    assert page["count"] == full["count"] == 3
+    assert page["products"] == [{"uid": product["uid"], "name": product["name"]} for product in full["products"]]
+    # без properties compact ничего не меняет
+    assert (await client.get("/catalog/", params={"fields": "uid,name", "compact": "true"})).json() == page
+
+
+@pytest.mark.parametrize("fields", ["", " , ", "uid,price"])
+async def test_invalid_fields_respond_400(client, fields):
+    response = await client.get("/catalog/", params={"fields": fields})
+    assert response.status_code == 400
+
+
+async def test_compact_page_lists_property_names_once(client):
+    await client.post("/properties/", json={"uid": "weight", "name": "Вес", "type": "int"})
+    await client.post("/properties/", json={
+        "uid": "color", "name": "Цвет", "type": "list",
+        "values": [{"value_uid": "red", "value": "Красный"}, {"value_uid": "blue", "value": "Синий"}],
+    })
+    for index, color in enumerate(["red", "blue", "red"]):
+        await client.post("/product/", json={
+            "uid": f"p{index}",
+            "name": f"Товар {index}",
+            "properties": [{"uid": "color", "value_uid": color}, {"uid": "weight", "value": index}],
+        })
+
+    full = (await client.get("/catalog/")).json()
+    page = (await client.get("/catalog/", params={"compact": "true"})).json()
+    assert page["properties"] == {
+        "color": {"name": "Цвет", "values": {"red": "Красный", "blue": "Синий"}},
+        "weight": {"name": "Вес", "values": {}},
+    }
+    for compact_product, product in zip(page["products"], full["products"]):
+        assert {key: compact_product[key] for key in ("uid", "name", "version")} == {
+            key: product[key] for key in ("uid", "name", "version")
+        }
+        # полную форму можно восстановить по словарю страницы
+        restored = [
+            {
+                "uid": prop["uid"],
+                "name": page["properties"][prop["uid"]]["name"],
+                "value_uid": prop.get("value_uid"),
+                "value": page["properties"][prop["uid"]]["values"][prop["value_uid"]]
+                if "value_uid" in prop else prop["value"],
+            }
+            for prop in compact_product["properties"]
+        ]
+        assert restored == product["properties"]
@@ -0,0 +1,22 @@
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_bulk_delete_properties_requires_uids(client):
+    response = await client.post("/properties/bulk-delete", json={"uids": []})
+    assert response.status_code == 422
+
+
+async def test_bulk_delete_properties(client):
+    for uid in ("color", "size"):
+        response = await client.post("/properties/", json={"uid": uid, "name": uid, "type": "int"})
+        assert response.status_code == 201
+
+    response = await client.post("/properties/bulk-delete", json={"uids": ["color", "size", "color"]})
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 2}
+
+    response = await client.post("/properties/bulk-delete", json={"uids": ["color"]})
+    assert response.status_code == 404
@@ -0,0 +1,147 @@
+import random
+
+import pytest
+
+from product_catalog.domain.query import CatalogQuery, parse_filter_mapping
+
+
+# короткие строки из разделителей прежнего формата ключа, кавычек и экранирования JSON часто совпадают
+# при склейке, на них ключ и проверяется
+ALPHABET = ["a", "b", ",", ":", "=", '"', "\\", "я"]
+SORTS = [None, "name", "name:desc", "uid:desc", "property_a:desc,name", "property_b,uid"]
+
+
+def random_text(rng: random.Random, max_length: int = 3) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, max_length)))
+
+
+def random_params(rng: random.Random) -> list[tuple[str, str]]:
+    params = []
+    for _ in range(rng.randint(0, 3)):
+        # без "_": uid вида x_from разбирается как граница диапазона свойства x
+        property_uid = "".join(rng.choice("a,:") for _ in range(rng.randint(1, 2)))
+        if any(key.startswith(f"property_{property_uid}") for key, _ in params):
+            continue
+        if rng.random() < 0.3:
+            if rng.random() < 0.7:
+                params.append((f"property_{property_uid}_from", str(rng.randint(-5, 5))))
+            if rng.random() < 0.7:
+                params.append((f"property_{property_uid}_to", str(rng.randint(-5, 5))))
+        else:
+            values = [random_text(rng) for _ in range(rng.randint(1, 3))]
+            # повтор значения не меняет запрос
+            params.extend((f"property_{property_uid}", value) for value in values + values[:rng.randint(0, 1)])
+    params.append(("page", "1"))  # посторонние параметры пропускаются
+    return params
+
+
+def random_query(rng: random.Random) -> tuple[list[tuple[str, str]], dict]:
+    arguments = {
+        "page": rng.randint(1, 3),
+        "page_size": rng.choice([10, 20]),
+        "name": rng.choice([None, random_text(rng)]),
+        "sort": rng.choice(SORTS),
+        "cursor": rng.choice([None, None, random_text(rng)]),
+    }
+    return random_params(rng), arguments
+
+
+def test_cache_key_separates_value_with_comma_from_two_values():
+    one_value = CatalogQuery.from_params([("property_x", "v1,v2")])
+    two_values = CatalogQuery.from_params([("property_x", "v1"), ("property_x", "v2")])
+    assert one_value != two_values
+    assert one_value.cache_key != two_values.cache_key
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ([("property_x", "a:b")], [("property_x:a", "b")]),
+        ([("property_x", "1")], [("property_x_from", "1")]),
+        ([("property_x", "a"), ("property_y", "b")], [("property_x", "a:y=b")]),
+    ],
+)
+def test_cache_key_separates_filters_with_delimiters(first, second):
+    assert CatalogQuery.from_params(first).cache_key != CatalogQuery.from_params(second).cache_key
+
+
+def test_cache_key_separates_name_from_filters():
+    with_name = CatalogQuery.from_params([], name="a:filters=x=1")
+    with_filter = CatalogQuery.from_params([("property_x", "1")], name="a")
+    assert with_name.cache_key != with_filter.cache_key
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cache_key_is_stable_under_parameter_reordering(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        params, arguments = random_query(rng)
+        query = CatalogQuery.from_params(params, **arguments)
+        shuffled = params[:]
+        rng.shuffle(shuffled)
+        reordered = CatalogQuery.from_params(shuffled, **arguments)
+        assert reordered == query
+        assert reordered.cache_key == query.cache_key
+
+
+def small_random_params(rng: random.Random) -> list[tuple[str, str]]:
+    # маленькое пространство запросов: соседние запросы, отличающиеся только расстановкой разделителей,
+    # встречаются часто
+    params = []
+    for property_uid in rng.sample(["a", ":", "a:"], rng.randint(0, 2)):
+        values = ["".join(rng.choice("a,:=") for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(1, 2))]
+        params.extend((f"property_{property_uid}", value) for value in values)
+    return params
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_different_queries_never_share_cache_key(seed):
+    rng = random.Random(seed)
+    queries_by_key: dict[str, CatalogQuery] = {}
+    for _ in range(2000):
+        if rng.random() < 0.5:
+            params, arguments = random_query(rng)
+        else:
+            params, arguments = small_random_params(rng), {"name": rng.choice([None, "a", "a:filters=a=a"])}
+        try:
+            query = CatalogQuery.from_params(params, **arguments)
+        except ValueError:
+            continue
+        assert queries_by_key.setdefault(query.cache_key, query) == query
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_filter_mapping_round_trip(seed):
+    # тело bulk delete в формате property_filters разбирается в те же фильтры, что и query-строка
+    rng = random.Random(seed)
+    for _ in range(500):
+        try:
+            query = CatalogQuery.from_params(random_params(rng))
+        except ValueError:
+            continue
+        assert parse_filter_mapping(query.property_filters) == query.filters
+
+
+@pytest.mark.parametrize("filters", [
+    {"weight": {}},
+    {"weight": {"gte": 1}},
+    {"weight": {"from": 1, "values": ["a"]}},
+    {"weight": {"from": "1"}},
+    {"weight": {"to": False}},
+    {"color": []},
+    {"color": ["a", 1]},
+    {"color": "a"},
+])
+def test_filter_mapping_rejects_malformed_filters(filters):
+    with pytest.raises(ValueError):
+        parse_filter_mapping(filters)
+
+
+def test_cursor_query_ignores_page():
+    first = CatalogQuery.from_params([("property_x", "a")], page=1, cursor="c1")
+    third = CatalogQuery.from_params([("property_x", "a")], page=3, cursor="c1")
+    assert first == third
+    assert first.cache_key == third.cache_key
+    assert CatalogQuery(page=3, cursor="c1").cache_key == CatalogQuery(cursor="c1").cache_key
+    # без курсора страницы различаются
+    assert CatalogQuery.from_params([], page=1).cache_key != CatalogQuery.from_params([], page=3).cache_key
@@ -0,0 +1,125 @@
+import logging
+import socket
+import time
+from types import SimpleNamespace
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def redis_down(monkeypatch):
+    # свободный порт, на котором никто не слушает
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    monkeypatch.setenv("REDIS__ENABLED", "true")
+    monkeypatch.setenv("REDIS__HOST", "127.0.0.1")
+    monkeypatch.setenv("REDIS__PORT", str(port))
+
+
+async def test_catalog_bypasses_unavailable_redis(redis_down, client, caplog):
+    caplog.set_level(logging.WARNING, logger="product_catalog.adapters.redis_cache")
+    response = await client.post("/properties/", json={"uid": "weight", "name": "Вес", "type": "int"})
+    assert response.status_code == 201
+
+    for params in ({}, {"page": 2}, {"name": "Товар"}):
+        response = await client.get("/catalog/", params=params)
+        assert response.status_code == 200
+        assert response.json()["count"] == 0
+
+    # предупреждение о недоступности выводится один раз при старте, а не на каждый запрос
+    assert not [record for record in caplog.records if record.name == "product_catalog.adapters.redis_cache"]
+
+
+async def test_cache_stats_respond_503_while_redis_is_down(redis_down, client):
+    response = await client.get("/debug/cache")
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Cache is unavailable"
+
+
+@pytest.fixture
+def cache_env(monkeypatch):
+    monkeypatch.setenv("REDIS__ENABLED", "true")
+    monkeypatch.setenv("CACHE__MIN_TTL", "60")
+    monkeypatch.setenv("CACHE__TTL", "3600")
+    monkeypatch.setenv("CACHE__HOT_REQUESTS", "5")
+    monkeypatch.setenv("CACHE__MAX_FILTERED_KEYS", "3")
+
+
+@pytest.fixture
+async def cache(cache_env, monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    from product_catalog.adapters import redis_cache
+
+    # время последнего обращения к странице растёт на каждом вызове: порядок вытеснения не зависит от скорости теста
+    # (подменяется только в модуле кеша: TTL в fakeredis идут по настоящему времени)
+    clock = iter(range(1_200_000, 1_300_000))  # начало окна статистики
+    monkeypatch.setattr(redis_cache, "time", SimpleNamespace(
+        time=lambda: float(next(clock)), perf_counter=time.perf_counter
+    ))
+    instance = redis_cache.RedisCache()
+    instance.client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield instance
+    await instance.client.aclose()
+
+
+async def test_adaptive_ttl_grows_with_requests(cache):
+    ttls = [cache.adaptive_ttl(requests) for requests in range(7)]
+    assert ttls == [60, 60, 945, 1830, 2715, 3600, 3600]
+
+    cache.config = cache.config.model_copy(update={"hot_requests": 1})
+    assert cache.adaptive_ttl(0) == 3600
+
+
+async def test_page_ttl_follows_popularity(cache):
+    from product_catalog.adapters.redis_cache import page_tags_key, product_tag
+
+    await cache.set("catalog:rare", {"page": 1}, tags=[product_tag("p1")])
+    assert 0 < await cache.client.ttl("catalog:rare") <= 60
+
+    # страница, ставшая популярной после записи, продлевается при попадании вместе с тегами
+    for _ in range(5):
+        assert await cache.get("catalog:rare") == {"page": 1}
+    for key in ("catalog:rare", page_tags_key("catalog:rare"), product_tag("p1")):
+        assert await cache.client.ttl(key) > 3000, key
+
+    # запись популярной страницы сразу получает полный ttl
+    await cache.set("catalog:rare", {"page": 1})
+    assert await cache.client.ttl("catalog:rare") > 3000
+
+
+async def test_capped_pages_evict_least_recently_used(cache):
+    from product_catalog.adapters.redis_cache import FILTERED_KEYS, page_tags_key
+
+    for index in range(3):
+        await cache.set(f"catalog:f{index}", index, tags=["catalog:tag:name"], capped=True)
+    await cache.set("catalog:plain", "plain")
+    # обращение обновляет время использования f0: вытесняется f1, к которому дольше всего не обращались
+    assert await cache.get("catalog:f0") == 0
+
+    await cache.set("catalog:f3", 3, capped=True)
+    assert await cache.client.zrange(FILTERED_KEYS, 0, -1) == ["catalog:f2", "catalog:f0", "catalog:f3"]
+    assert await cache.get("catalog:f1") is None
+    assert not await cache.client.exists(page_tags_key("catalog:f1"))
+    # страницы без ограничения не учитываются и не вытесняются
+    assert await cache.get("catalog:plain") == "plain"
+    assert await cache.get("catalog:f2") == 2
+
+
+async def test_key_stats_rank_by_hit_ratio(cache):
+    # frequent: больше попаданий (4 из 8), steady: больше доля попаданий (3 из 4)
+    for key, misses, hits in (("catalog:frequent", 4, 4), ("catalog:steady", 1, 3)):
+        for _ in range(misses):
+            await cache.client.delete(key)
+            assert await cache.get(key) is None
+            await cache.set(key, "x" * 10)
+        for _ in range(hits):
+            assert await cache.get(key) == "x" * 10
+
+    stats = await cache.key_stats(limit=10)
+    assert [(entry["key"], entry["hits"], entry["hit_ratio"]) for entry in stats["by_hits"]] == [
+        ("catalog:steady", 3, 0.75), ("catalog:frequent", 4, 0.5)
+    ]
@@ -0,0 +1,300 @@
+"""
+Пути репозиториев, которые различаются по диалекту: IN против = ANY(:array), фасеты одним GROUP BY против LATERAL,
+INSERT против COPY. Тесты выполняются на SQLite и на PostgreSQL (если задан TEST_POSTGRES_URL), а результат
+сравнивается с ожидаемым, посчитанным по тем же данным в Python.
+"""
+import random
+
+import pytest
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from product_catalog.adapters.repository import CatalogRepository, ProductRepository, PropertyRepository
+from product_catalog.config import get_settings
+from product_catalog.di.database import create_engine_from_config
+from product_catalog.domain.dto import (
+    ProductCreate, ProductPropertyCreate, ProductUpdate, PropertyCreate, PropertyValueCreate
+)
+from product_catalog.domain.exceptions import VersionConflictError
+from product_catalog.domain.models import (
+    CatalogEvent, Product, ProductProperty, Property, PropertyType, PropertyValue
+)
+
+
+pytestmark = pytest.mark.anyio
+
+
+def repository_class(session: AsyncSession, base: type) -> type:
+    if session.bind.dialect.name != "postgresql":
+        return base
+    from product_catalog.adapters import postgres
+
+    return getattr(postgres, f"Postgres{base.__name__}")
+
+
+async def seed(engine, products: int = 60) -> list[dict]:
+    """
+    Два списочных и одно числовое свойство; у товара - случайное подмножество свойств.
+    """
+    rng = random.Random(0)
+    properties = [
+        {"uid": "color", "name": "Цвет", "type": PropertyType.LIST},
+        {"uid": "size", "name": "Размер", "type": PropertyType.LIST},
+        {"uid": "weight", "name": "Вес", "type": PropertyType.INT},
+    ]
+    values = [
+        {"uid": f"{property_uid}{index}", "value": f"{property_uid} {index}", "property_uid": property_uid}
+        for property_uid in ("color", "size") for index in range(4)
+    ]
+    rows = []
+    for index in range(products):
+        product_uid = f"p{index:03d}"
+        for property_uid in rng.sample(["color", "size", "weight"], rng.randint(0, 3)):
+            row = {"product_uid": product_uid, "property_uid": property_uid, "value_uid": None, "int_value": None}
+            if property_uid == "weight":
+                row["int_value"] = rng.randint(0, 100)
+            else:
+                row["value_uid"] = f"{property_uid}{rng.randrange(4)}"
+            rows.append(row)
+    async with engine.begin() as conn:
+        await conn.execute(insert(Property), properties)
+        await conn.execute(insert(PropertyValue), values)
+        await conn.execute(insert(Product), [{"uid": f"p{i:03d}", "name": f"Товар {i}"} for i in range(products)])
+        await conn.execute(insert(ProductProperty), rows)
+    return rows
+
+
+def expected_stats(rows: list[dict], product_uids: set[str]) -> dict:
+    stats: dict = {"count": len(product_uids)}
+    for row in rows:
+        if row["product_uid"] not in product_uids:
+            continue
+        if row["value_uid"]:
+            counts = stats.setdefault(row["property_uid"], {})
+            counts[row["value_uid"]] = counts.get(row["value_uid"], 0) + 1
+        else:
+            value = row["int_value"]
+            bounds = stats.setdefault(row["property_uid"], {"min_value": value, "max_value": value})
+            bounds["min_value"] = min(bounds["min_value"], value)
+            bounds["max_value"] = max(bounds["max_value"], value)
+    return stats
+
+
+def matching_products(rows: list[dict], filters: dict) -> set[str]:
+    products = {f"p{i:03d}" for i in range(60)}
+    for property_uid, condition in filters.items():
+        matched = set()
+        for row in rows:
+            if row["property_uid"] != property_uid:
+                continue
+            if isinstance(condition, list):
+                if row["value_uid"] in condition:
+                    matched.add(row["product_uid"])
+            elif condition.get("from", -1) <= row["int_value"] <= condition.get("to", 1000):
+                matched.add(row["product_uid"])
+        products &= matched
+    return products
+
+
+def test_postgres_in_values_binds_one_array_parameter():
+    from product_catalog.adapters.postgres import PostgresCatalogRepository
+
+    condition = PostgresCatalogRepository.in_values(Product.uid, ["p1", "p2", "p3"])
+    compiled = condition.compile(dialect=postgresql.dialect())
+    assert "= ANY (" in str(compiled)
+    assert list(compiled.params.values()) == [["p1", "p2", "p3"]]
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"color": ["color0", "color1"]},
+    {"color": ["color2"], "size": ["size0", "size3"]},
+    {"weight": {"from": 20, "to": 70}},
+    {"size": ["size1"], "weight": {"from": 50}},
+    {"color": ["missing"]},
+])
+async def test_filter_stats_match_expected(engine, filters):
+    rows = await seed(engine)
+    async with AsyncSession(engine) as session:
+        repository = repository_class(session, CatalogRepository)(session)
+        stats = await repository.get_filter_stats(property_filters=filters)
+    assert stats == expected_stats(rows, matching_products(rows, filters))
+
+
+async def test_catalog_filters_by_values(engine):
+    rows = await seed(engine)
+    filters = {"color": ["color0", "color3"], "size": ["size1", "size2"]}
+    async with AsyncSession(engine) as session:
+        repository = repository_class(session, CatalogRepository)(session)
+        products, count, _ = await repository.get_all(page_size=100, property_filters=filters)
+    expected = matching_products(rows, filters)
+    assert count == len(expected)
+    assert {product.uid for product in products} == expected
+
+
+async def test_delete_many_by_uids(engine):
+    await seed(engine)
+    uids = [f"p{i:03d}" for i in range(0, 60, 3)] + ["missing"]
+    async with AsyncSession(engine) as session:
+        repository = repository_class(session, ProductRepository)(session)
+        repository.chunk_size = 7  # несколько пачек
+        deleted = await repository.delete_many(uids=uids)
+    assert sorted(deleted) == uids[:-1]
+    async with AsyncSession(engine) as session:
+        remaining = (await session.execute(select(func.count()).select_from(Product))).scalar()
+        assert remaining == 40
+
+
+async def test_property_values_are_inserted_in_bulk(engine):
+    # от COPY_THRESHOLD значений PostgreSQL-репозиторий вставляет их через COPY
+    values = [PropertyValueCreate(value_uid=f"v{index}", value=f"Значение {index}") for index in range(150)]
+    async with AsyncSession(engine) as session:
+        repository = repository_class(session, PropertyRepository)(session)
+        await repository.add(PropertyCreate(uid="material", name="Материал", type=PropertyType.LIST, values=values))
+    async with AsyncSession(engine) as session:
+        result = await session.execute(select(PropertyValue.uid, PropertyValue.value, PropertyValue.property_uid))
+        stored = sorted(result.tuples().all(), key=lambda row: int(row[0][1:]))
+    assert stored == [(value.value_uid, value.value, "material") for value in values]
+
+
+async def test_copy_rows_runs_inside_the_transaction(engine):
+    if engine.dialect.name != "postgresql":
+        pytest.skip("COPY is used only with PostgreSQL")
+    from product_catalog.adapters.postgres import copy_rows
+
+    rows = [{"uid": f"prop{index}", "name": f"Свойство {index}", "type": PropertyType.INT} for index in range(3)]
+    # COPY - первая операция транзакции: откат должен отменить и её
+    async with engine.connect() as conn:
+        await copy_rows(conn, Property.__table__, rows)
+        await conn.rollback()
+    async with engine.connect() as conn:
+        assert (await conn.execute(select(func.count()).select_from(Property))).scalar() == 0
+
+    # значения проходят через bind-процессоры типов: Enum сохраняется так же, как через insert()
+    async with engine.begin() as conn:
+        await copy_rows(conn, Property.__table__, rows)
+    async with engine.connect() as conn:
+        stored = (await conn.execute(select(Property.uid, Property.type).order_by(Property.uid))).tuples().all()
+    assert stored == [(row["uid"], PropertyType.INT) for row in rows]
+
+
+async def create_product(engine) -> None:
+    await seed(engine, products=1)
+    async with AsyncSession(engine) as session:
+        await repository_class(session, ProductRepository)(session).add(ProductCreate(
+            uid="item",
+            name="Товар",
+            properties=[
+                ProductPropertyCreate(uid="color", value_uid="color0"),
+                ProductPropertyCreate(uid="size", value_uid="size0"),
+                ProductPropertyCreate(uid="weight", value=10),
+            ],
+        ))
+
+
+async def stored_state(engine) -> tuple[int, dict, list]:
+    async with AsyncSession(engine) as session:
+        version = (await session.execute(select(Product.version).where(Product.uid == "item"))).scalar()
+        properties = (await session.execute(
+            select(ProductProperty.property_uid, ProductProperty.value_uid, ProductProperty.int_value)
+            .where(ProductProperty.product_uid == "item")
+        )).tuples().all()
+        events = (await session.execute(
+            select(CatalogEvent.payload).where(CatalogEvent.event_type == "product.updated").order_by(CatalogEvent.id)
+        )).scalars().all()
+    return version, {uid: (value_uid, int_value) for uid, value_uid, int_value in properties}, list(events)
+
+
+async def test_update_inserts_updates_and_removes_properties(engine):
+    await create_product(engine)
+    async with AsyncSession(engine) as session:
+        await repository_class(session, PropertyRepository)(session).add(
+            PropertyCreate(uid="height", name="Высота", type=PropertyType.INT)
+        )
+        product = await repository_class(session, ProductRepository)(session).update("item", ProductUpdate(
+            version=1,
+            properties=[
+                ProductPropertyCreate(uid="color", value_uid="color2"),
+                ProductPropertyCreate(uid="size", value_uid="size0"),
+                ProductPropertyCreate(uid="height", value=7),
+            ],
+            remove_properties=["weight"],
+        ))
+    assert product.version == 2
+
+    version, properties, events = await stored_state(engine)
+    assert version == 2
+    assert properties == {"color": ("color2", None), "size": ("size0", None), "height": (None, 7)}
+    # в событии - только реально изменившиеся свойства: size передан с прежним значением
+    assert events == [{"properties": ["color", "height", "weight"], "name_changed": False, "version": 2}]
+
+
+async def test_noop_update_keeps_version(engine):
+    await create_product(engine)
+    async with AsyncSession(engine) as session:
+        product = await repository_class(session, ProductRepository)(session).update("item", ProductUpdate(
+            version=1,
+            name="Товар",
+            properties=[ProductPropertyCreate(uid="weight", value=10)],
+        ))
+    assert product.version == 1
+    assert await stored_state(engine) == (
+        1, {"color": ("color0", None), "size": ("size0", None), "weight": (None, 10)}, []
+    )
+
+
+async def test_update_with_stale_version_conflicts(engine):
+    await create_product(engine)
+    async with AsyncSession(engine) as session:
+        repository = repository_class(session, ProductRepository)(session)
+        await repository.update("item", ProductUpdate(version=1, name="Новое название"))
+        with pytest.raises(VersionConflictError) as error:
+            await repository.update("item", ProductUpdate(version=1, name="Другое название"))
+    assert (error.value.expected, error.value.actual) == (1, 2)
+    version, _, events = await stored_state(engine)
+    assert version == 2
+    assert events == [{"properties": [], "name_changed": True, "version": 2}]
+
+
+async def test_concurrent_update_is_rolled_back(engine):
+    """
+    Товар изменён другим запросом между проверкой версии и условным UPDATE: UPDATE не находит строку,
+    изменения свойств и событие откатываются.
+    """
+    await create_product(engine)
+    other_engine = create_engine_from_config(get_settings().database)
+    try:
+        async with AsyncSession(engine) as session:
+            repository = repository_class(session, ProductRepository)(session)
+            validate_properties = repository._validate_properties
+
+            async def concurrent_update(properties):
+                async with other_engine.begin() as conn:
+                    await conn.execute(update(Product).where(Product.uid == "item").values(version=2))
+                await validate_properties(properties)
+
+            repository._validate_properties = concurrent_update
+            with pytest.raises(VersionConflictError) as error:
+                await repository.update("item", ProductUpdate(
+                    version=1,
+                    properties=[ProductPropertyCreate(uid="color", value_uid="color3")],
+                    remove_properties=["weight"],
+                ))
+            assert (error.value.expected, error.value.actual) == (1, 2)
+            # единственное соединение движка записи занято сессией: состояние читается через другой движок
+            assert await stored_state(other_engine) == (
+                2, {"color": ("color0", None), "size": ("size0", None), "weight": (None, 10)}, []
+            )
+
+            # после отката сессия пригодна для повтора с актуальной версией
+            repository._validate_properties = validate_properties
+            await repository.update("item", ProductUpdate(
+                version=error.value.actual, properties=[ProductPropertyCreate(uid="color", value_uid="color3")]
+            ))
+    finally:
+        await other_engine.dispose()
+
+    version, properties, events = await stored_state(engine)
+    assert (version, properties["color"]) == (3, ("color3", None))
+    assert events == [{"properties": ["color"], "name_changed": False, "version": 3}]
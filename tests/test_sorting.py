@@ -0,0 +1,67 @@
+import base64
+import json
+
+import pytest
+
+from product_catalog.domain.sorting import decode_cursor, encode_cursor, format_sort, parse_sort
+
+
+def raw_cursor(sort: str, values) -> str:
+    payload = json.dumps([sort, values]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("sort, values", [
+    ("uid", ["p1"]),
+    ("name:desc", ["Товар", "p1"]),
+    ("property_size,name", [None, "Товар", "p1"]),
+    ("property_size,name", [42, "Товар", "p1"]),
+    ("property_size,name", ["XL", "Товар", "p1"]),
+])
+def test_cursor_round_trip(sort, values):
+    keys = parse_sort(sort)
+    assert decode_cursor(keys, encode_cursor(keys, values)) == values
+
+
+@pytest.mark.parametrize("sort, values", [
+    ("uid", [{"a": 1}]),
+    ("uid", [["p1"]]),
+    ("uid", [None]),
+    ("uid", [1]),
+    ("name", [1.5, "p1"]),
+    ("property_size", [True, "p1"]),
+    ("property_size", [1.5, "p1"]),
+    ("property_size", [{"a": 1}, "p1"]),
+])
+def test_cursor_with_invalid_values_is_rejected(sort, values):
+    keys = parse_sort(sort)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(keys, raw_cursor(format_sort(keys), values))
+
+
+@pytest.mark.parametrize("cursor", ["!!!", raw_cursor("uid:asc", ["p1"])[:-3], base64.b64encode(b"[1]").decode()])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(parse_sort("uid"), cursor)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("sort, values", [
+    ("uid", [{"a": 1}]),
+    ("property_weight", ["heavy", "p1"]),
+    ("property_color", [5, "p1"]),
+])
+async def test_catalog_rejects_cursor_of_wrong_kind(client, sort, values):
+    await client.post("/properties/", json={"uid": "weight", "name": "Вес", "type": "int"})
+    await client.post("/properties/", json={
+        "uid": "color", "name": "Цвет", "type": "list", "values": [{"value_uid": "red", "value": "Красный"}]
+    })
+    await client.post("/product/", json={
+        "uid": "p1",
+        "name": "Товар",
+        "properties": [{"uid": "weight", "value": 5}, {"uid": "color", "value_uid": "red"}],
+    })
+    cursor = raw_cursor(format_sort(parse_sort(sort)), values)
+    response = await client.get("/catalog/", params={"sort": sort, "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}